@@ -0,0 +1,11 @@
+"""
+Benchmark suite for the Blackjack Card Counter API.
+
+The benchmarks follow the asv layout: every ``bench_*.py`` module contains
+classes with an optional ``setup`` method and ``time_*`` methods, optionally
+parameterized through ``params`` and ``param_names``. They can be executed
+with the bundled runner, which writes the results as JSON:
+
+    python -m benchmarks --output benchmarks/results/latest.json
+    python -m benchmarks --compare benchmarks/results/baseline.json
+"""
@@ -0,0 +1,81 @@
+"""
+End-to-end endpoint benchmarks through an in-process ASGI client.
+
+Requests go through the full middleware stack and routing of the
+application, without opening a socket.
+"""
+import abc
+import asyncio
+import random
+
+import httpx
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+
+
+class _ASGIClientSuite(abc.ABC):
+    """Base class that owns an event loop and an httpx client for ``app``."""
+
+    @abc.abstractmethod
+    async def make_app(self):
+        """Return the ASGI application under test."""
+
+    def setup(self, *params):
+        random.seed(1234)
+        self.loop = asyncio.new_event_loop()
+        app = self.loop.run_until_complete(self.make_app())
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        )
+
+    def teardown(self, *params):
+        self.loop.run_until_complete(self.client.aclose())
+        self.loop.close()
+
+    def post(self, path, payload):
+        response = self.loop.run_until_complete(self.client.post(path, json=payload))
+        assert response.status_code == 200, response.text
+        return response
+
+
+class CardsAnalyzeEndpointSuite(_ASGIClientSuite):
+    """``POST /api/cards/analyze`` on the main application."""
+
+    params = [[2, 20, 200]]
+    param_names = ["num_cards"]
+
+    async def make_app(self):
+        from src.api.main import create_app
+
+        FastAPICache.init(InMemoryBackend(), prefix="bench-cache")
+        return await create_app(testing=True)
+
+    def setup(self, num_cards):
+        super().setup(num_cards)
+        cards = (["A", "8", "K", "5", "2", "9", "Q", "4", "7", "3"] * 20)[:num_cards]
+        self.payload = {"cards": cards, "dealer_card": "6", "decks": 6.0}
+
+    def time_cards_analyze(self, num_cards):
+        self.post("/api/cards/analyze", self.payload)
+
+
+class StrategyEndpointSuite(_ASGIClientSuite):
+    """``POST /strategy``, backed by the Monte Carlo decision engine."""
+
+    params = [[(["10", "6"], "9"), (["A", "7"], "10")]]
+    param_names = ["hand"]
+    number = 1
+    repeat = 3
+
+    async def make_app(self):
+        from src.api.server import app
+
+        return app
+
+    def setup(self, hand):
+        super().setup(hand)
+        player_hand, dealer_card = hand
+        self.payload = {"player_hand": player_hand, "dealer_card": dealer_card}
+
+    def time_strategy(self, hand):
+        self.post("/strategy", self.payload)
@@ -0,0 +1,52 @@
+"""
+Benchmarks for hand values and card counting on shoe-sized inputs.
+"""
+import random
+
+from src.api.decision_engine import BlackjackDecisionEngine
+from src.api.utils import card_utils, counting_systems
+
+RANKS = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"]
+
+
+def build_shoe(decks: int, seed: int = 42) -> list:
+    """Return a shuffled shoe with ``decks`` full decks."""
+    shoe = RANKS * 4 * decks
+    random.Random(seed).shuffle(shoe)
+    return shoe
+
+
+class HandValueSuite:
+    """Hand value calculation for typical hand sizes."""
+
+    params = [[2, 3, 5]]
+    param_names = ["hand_size"]
+
+    def setup(self, hand_size):
+        self.hand = build_shoe(1)[:hand_size]
+        self.engine = BlackjackDecisionEngine(num_decks=6)
+
+    def time_card_utils_hand_value(self, hand_size):
+        card_utils.calculate_hand_value(self.hand)
+
+    def time_engine_hand_value(self, hand_size):
+        self.engine.calculate_hand_value(self.hand)
+
+
+class RunningCountSuite:
+    """Running and true count over a complete shoe."""
+
+    params = [[1, 6, 8], ["hiLo", "zenCount"]]
+    param_names = ["decks", "counting_system"]
+
+    def setup(self, decks, counting_system):
+        self.shoe = build_shoe(decks)
+
+    def time_running_count(self, decks, counting_system):
+        counting_systems.calculate_running_count(self.shoe, counting_system)
+
+    def time_true_count(self, decks, counting_system):
+        running_count = counting_systems.calculate_running_count(
+            self.shoe, counting_system
+        )
+        counting_systems.calculate_true_count(running_count, decks / 2)
@@ -0,0 +1,102 @@
+"""
+Benchmarks for the Monte Carlo decision engine and the analysis services.
+"""
+import random
+
+from src.api import simulation_kernel
+from src.api.decision_engine import (
+    BlackjackDecisionEngine,
+    get_decision_recommendations,
+)
+from src.api.models.schemas import CardInput
+from src.api.services.card_service import analyze_cards
+
+
+class DealerSimulationSuite:
+    """A single dealer hand drawn from a full or partially played shoe."""
+
+    params = [["2", "6", "10", "A"], [0, 156]]
+    param_names = ["dealer_upcard", "cards_seen"]
+
+    def setup(self, dealer_upcard, cards_seen):
+        random.seed(1234)
+        self.engine = BlackjackDecisionEngine(num_decks=6)
+        seen = (["2", "3", "4", "5", "6", "10", "J", "Q", "K", "A"] * 16)[:cards_seen]
+        self.remaining = self.engine.get_remaining_cards(seen)
+
+    def time_simulate_dealer_hand(self, dealer_upcard, cards_seen):
+        self.engine.simulate_dealer_hand(dealer_upcard, self.remaining)
+
+
+class ExpectedValueSuite:
+    """Expected values for every legal action of a two-card hand."""
+
+    params = [
+        [(["10", "6"], "9"), (["A", "7"], "10"), (["8", "8"], "6")],
+        [200, 1000],
+        # The kernel is only timed when it is compiled
+        [False, True] if simulation_kernel.NUMBA_AVAILABLE else [False],
+    ]
+    param_names = ["hand", "simulation_rounds", "use_kernel"]
+    number = 1
+    repeat = 3
+
+    def setup(self, hand, simulation_rounds, use_kernel):
+        random.seed(1234)
+        self.engine = BlackjackDecisionEngine(
+            num_decks=6, simulation_rounds=simulation_rounds, use_kernel=use_kernel
+        )
+        self.player_cards, self.dealer_upcard = hand
+        self.seen_cards = self.player_cards + [self.dealer_upcard]
+        if use_kernel:
+            # Compile outside the timed call
+            self.time_calculate_expected_values(hand, simulation_rounds, use_kernel)
+
+    def time_calculate_expected_values(self, hand, simulation_rounds, use_kernel):
+        self.engine.calculate_expected_values(
+            self.player_cards, self.dealer_upcard, self.seen_cards, 0.0
+        )
+
+
+class BatchedDecisionSuite:
+    """Distinct decisions evaluated together, as the micro-batcher submits them."""
+
+    params = [[1, 16, 64]]
+    param_names = ["batch_size"]
+    number = 1
+    repeat = 3
+
+    def setup(self, batch_size):
+        random.seed(1234)
+        hands = [
+            (["10", str(value)], upcard)
+            for value in range(2, 10)
+            for upcard in ("2", "7", "10", "A")
+        ]
+        self.requests = [
+            {
+                "player_cards": cards,
+                "dealer_card": upcard,
+                "seen_cards": cards + [upcard],
+            }
+            for cards, upcard in (hands * 2)[:batch_size]
+        ]
+        # Compile outside the timed call
+        get_decision_recommendations(self.requests[:1], simulation_rounds=10)
+
+    def time_get_decision_recommendations(self, batch_size):
+        get_decision_recommendations(self.requests, simulation_rounds=1000)
+
+
+class AnalyzeCardsSuite:
+    """The card analysis service behind ``/api/cards/analyze``."""
+
+    params = [[2, 20, 200]]
+    param_names = ["num_cards"]
+
+    def setup(self, num_cards):
+        cards = (["A", "8", "K", "5", "2", "9", "Q", "4", "7", "3"] * 20)[:num_cards]
+        self.card_input = CardInput(cards=cards, dealer_card="6", decks=6.0)
+
+    def time_analyze_cards(self, num_cards):
+        analyze_cards(self.card_input)
@@ -0,0 +1,73 @@
+"""
+Overhead of the request instrumentation middleware.
+
+Both benchmarks drive a trivial ASGI application directly (no HTTP client),
+once bare and once wrapped in ``InstrumentationMiddleware``; the difference
+per call is the cost the middleware adds to every request.
+"""
+import asyncio
+
+from src.api.metrics import Histogram
+from src.api.middleware.instrumentation import InstrumentationMiddleware
+
+CALLS = 1000
+
+
+async def _endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _app(scope, receive, send):
+    scope["endpoint"] = _endpoint
+    await _endpoint(scope, receive, send)
+
+
+class _Router:
+    routes = []
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    pass
+
+
+class InstrumentationOverheadSuite:
+    """1000 requests through a bare and an instrumented ASGI app."""
+
+    def setup(self):
+        self.loop = asyncio.new_event_loop()
+        self.instrumented = InstrumentationMiddleware(_app)
+        self.instrumented._route_paths[_endpoint] = "/bench"
+        self.scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/bench",
+            "app": _Router(),
+        }
+
+    def teardown(self):
+        self.loop.close()
+
+    async def _drive(self, app):
+        for _ in range(CALLS):
+            await app(dict(self.scope), _receive, _send)
+
+    def time_bare_app(self):
+        self.loop.run_until_complete(self._drive(_app))
+
+    def time_instrumented_app(self):
+        self.loop.run_until_complete(self._drive(self.instrumented))
+
+
+class HistogramObserveSuite:
+    """Cost of a labelled histogram observation."""
+
+    def setup(self):
+        self.histogram = Histogram("bench_seconds", "Benchmark", ("route",))
+
+    def time_labelled_observe(self):
+        self.histogram.labels("/bench").observe(0.0042)
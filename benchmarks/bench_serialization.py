@@ -0,0 +1,40 @@
+"""
+Cost of rendering analysis results as a JSON response body.
+
+Compares FastAPI's default path (``jsonable_encoder`` followed by the
+standard library ``json``) with :class:`FastJSONResponse`, which the
+analysis and strategy endpoints return directly, and with the MessagePack
+encoding those endpoints negotiate for bulk clients.
+"""
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from src.api.models.schemas import CardInput
+from src.api.negotiation import MsgPackResponse
+from src.api.responses import dumps
+from src.api.services import card_service
+
+CARDS = ["A", "8", "K", "5", "2", "9", "Q", "4", "7", "3"]
+
+
+class AnalysisSerializationSuite:
+    """Rendering one ``/api/cards/analyze`` result, repeated per batch size."""
+
+    params = [[1, 10, 100]]
+    param_names = ["results"]
+
+    def setup(self, results):
+        analysis = card_service.analyze_cards(
+            CardInput(cards=CARDS[:2], dealer_card="6", decks=6.0)
+        )
+        self.payload = [analysis] * results
+
+    def time_jsonable_encoder_and_json(self, results):
+        json.dumps(jsonable_encoder(self.payload)).encode("utf-8")
+
+    def time_fast_json_response(self, results):
+        dumps(self.payload)
+
+    def time_msgpack_response(self, results):
+        MsgPackResponse(self.payload)
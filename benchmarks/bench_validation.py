@@ -0,0 +1,115 @@
+"""
+Cost of validating card input, by request size.
+
+Each request model validates its cards through the precomputed lookup in
+``card_utils``; these benchmarks time that stage on its own and as part of
+model validation for hands and shoes of increasing size, and the full
+validation path of a JSON request with and without the validation middleware.
+"""
+import asyncio
+import json
+
+from fastapi import Request
+
+from src.api.middleware.request_validation import (
+    BlackjackRequest,
+    RequestValidationMiddleware,
+    validated_body,
+)
+from src.api.models.schemas import CardInput
+from src.api.negotiation import decode_body, pack_cards
+from src.api.utils.card_utils import card_indices
+
+CARDS = ["A", "8", "k", "5", "2", "9", "q", "4", "7", "10"]
+CALLS = 100
+
+
+class CardValidationSuite:
+    """Card validation for requests with 2, 20 and 200 cards."""
+
+    params = [[2, 20, 200]]
+    param_names = ["num_cards"]
+
+    def setup(self, num_cards):
+        cards = (CARDS * 20)[:num_cards]
+        self.cards = cards
+        self.payload = {"cards": cards, "dealer_card": "6", "decks": 6.0}
+
+    def time_card_indices(self, num_cards):
+        card_indices(self.cards)
+
+    def time_card_input_model(self, num_cards):
+        CardInput.model_validate(self.payload)
+
+    def time_blackjack_request_model(self, num_cards):
+        BlackjackRequest.model_validate(self.payload)
+
+
+class BodyDecodingSuite:
+    """Decoding an analyze request body as JSON and as MessagePack."""
+
+    params = [[2, 20, 200]]
+    param_names = ["num_cards"]
+
+    def setup(self, num_cards):
+        import msgpack
+
+        cards = [card.upper() for card in (CARDS * 20)[:num_cards]]
+        payload = {"cards": cards, "dealer_card": "6", "decks": 6.0}
+        self.json_body = json.dumps(payload).encode()
+        self.msgpack_body = msgpack.packb({**payload, "cards": pack_cards(cards)})
+
+    def time_decode_json(self, num_cards):
+        decode_body("application/json", self.json_body)
+
+    def time_decode_msgpack_packed_cards(self, num_cards):
+        decode_body("application/msgpack", self.msgpack_body)
+
+
+_card_input_body = validated_body(CardInput)
+
+
+async def _handler(scope, receive, send):
+    # What a route does: resolve its body dependency, then respond
+    await _card_input_body(Request(scope, receive))
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _send(message):
+    pass
+
+
+class ValidationMiddlewareSuite:
+    """100 JSON requests through a route handler, bare and behind the middleware."""
+
+    params = [[2, 20, 200]]
+    param_names = ["num_cards"]
+
+    def setup(self, num_cards):
+        self.loop = asyncio.new_event_loop()
+        self.validated = RequestValidationMiddleware(_handler)
+        cards = (CARDS * 20)[:num_cards]
+        self.body = json.dumps({"cards": cards, "dealer_card": "6"}).encode()
+        self.scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/analyze",
+            "headers": [(b"content-type", b"application/json")],
+        }
+
+    def teardown(self, num_cards):
+        self.loop.close()
+
+    async def _receive(self):
+        return {"type": "http.request", "body": self.body, "more_body": False}
+
+    async def _drive(self, app):
+        for _ in range(CALLS):
+            await app(dict(self.scope), self._receive, _send)
+
+    def time_handler_only(self, num_cards):
+        self.loop.run_until_complete(self._drive(_handler))
+
+    def time_handler_with_middleware(self, num_cards):
+        self.loop.run_until_complete(self._drive(self.validated))
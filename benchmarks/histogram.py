@@ -0,0 +1,131 @@
+"""
+HDR-style latency histogram.
+
+Values are recorded as integers (microseconds by convention) into
+log-linear buckets: every power-of-two range is split into the same number
+of linear sub-buckets, so the relative error of a reported percentile is
+bounded by ``1 / 2 ** (significant_bits - 1)`` regardless of magnitude,
+while memory only grows with the number of distinct buckets hit.
+"""
+import math
+from typing import Dict, Iterator, List, Tuple
+
+
+class LatencyHistogram:
+    """Log-linear histogram with bounded relative error."""
+
+    def __init__(self, significant_bits: int = 8):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            significant_bits: Bits of precision kept per value; 8 bits bound
+                the relative error of reported values to under 1%
+        """
+        if significant_bits < 2:
+            raise ValueError("significant_bits must be at least 2")
+        self.significant_bits = significant_bits
+        self._sub_bucket_count = 1 << significant_bits
+        self._half_count = self._sub_bucket_count >> 1
+        self.counts: Dict[int, int] = {}
+        self.total_count = 0
+        self.min_value = 0
+        self.max_value = 0
+        self._sum = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.significant_bits
+        return shift * self._half_count + (value >> shift)
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self._sub_bucket_count:
+            return index
+        shift = index // self._half_count - 1
+        sub_bucket = index - shift * self._half_count
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, value: int, count: int = 1) -> None:
+        """
+        Record ``count`` occurrences of ``value``.
+
+        Args:
+            value: Non-negative integer value, e.g. latency in microseconds
+            count: Number of occurrences
+        """
+        value = int(value)
+        if value < 0:
+            raise ValueError(f"Cannot record negative value {value}")
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        if self.total_count == 0 or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+        self.total_count += count
+        self._sum += value * count
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add all values recorded in ``other`` to this histogram."""
+        if other.significant_bits != self.significant_bits:
+            raise ValueError("Cannot merge histograms with different precision")
+        if other.total_count == 0:
+            return
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        if self.total_count == 0 or other.min_value < self.min_value:
+            self.min_value = other.min_value
+        self.max_value = max(self.max_value, other.max_value)
+        self.total_count += other.total_count
+        self._sum += other._sum
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.total_count if self.total_count else 0.0
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Return the value at the given percentile.
+
+        Args:
+            percentile: Percentile between 0 and 100
+
+        Returns:
+            int: Highest value equivalent to the bucket holding the percentile
+        """
+        if self.total_count == 0:
+            return 0
+        target = max(1, math.ceil(percentile / 100.0 * self.total_count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max_value)
+        return self.max_value
+
+    def buckets(self) -> Iterator[Tuple[int, int]]:
+        """Yield ``(highest_equivalent_value, count)`` in ascending order."""
+        for index in sorted(self.counts):
+            yield self._highest_equivalent(index), self.counts[index]
+
+    def summary(self, percentiles: Tuple[float, ...] = (50, 95, 99)) -> Dict:
+        """Return count, min, mean, max and the requested percentiles."""
+        result = {
+            "count": self.total_count,
+            "min": self.min_value,
+            "mean": round(self.mean, 1),
+            "max": self.max_value,
+        }
+        for p in percentiles:
+            result[f"p{p:g}"] = self.percentile(p)
+        return result
+
+    def to_dict(self) -> Dict:
+        """Serialize the summary and the raw buckets for later analysis."""
+        buckets: List[List[int]] = [[value, count] for value, count in self.buckets()]
+        return {
+            "significant_bits": self.significant_bits,
+            **self.summary(),
+            "buckets": buckets,
+        }
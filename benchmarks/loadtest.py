@@ -0,0 +1,367 @@
+"""
+Load generator for the Blackjack Card Counter API.
+
+Drives the ASGI application in-process (no sockets) or a server listening on
+localhost with a configurable mix of analyze, strategy and bankroll calls
+from many concurrent clients, and records latency into HDR-style histograms.
+
+Examples:
+
+    # 200 concurrent in-process clients for 30 seconds, Redis replaced by fakeredis
+    python -m benchmarks.loadtest --app src.api.main:app --fake-redis \\
+        --concurrency 200 --duration 30
+
+    # Against a running server, strategy-heavy mix, 10 000 requests
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 \\
+        --mix analyze=1,strategy=4,bankroll=1 --requests 10000
+"""
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .histogram import LatencyHistogram
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+CARDS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+
+def _analyze_request(rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+    return "/api/cards/analyze", {
+        "cards": rng.choices(CARDS, k=rng.randint(2, 12)),
+        "dealer_card": rng.choice(CARDS),
+        "true_count": round(rng.uniform(-3, 3), 1),
+        "decks": 6.0,
+        "counting_system": "hiLo",
+        "penetration": 0.5,
+    }
+
+
+def _strategy_request(rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+    return "/api/strategy/recommend", {
+        "player_hand": rng.choices(CARDS, k=2),
+        "dealer_card": rng.choice(CARDS),
+        "true_count": float(rng.randint(-3, 3)),
+        "decks_remaining": 4.0,
+        "counting_system": "hiLo",
+    }
+
+
+def _bankroll_request(rng: random.Random) -> Tuple[str, Dict[str, Any]]:
+    return "/api/bankroll/calculate", {
+        "bankroll": float(rng.choice([500, 1000, 5000, 10000])),
+        "true_count": float(rng.randint(-2, 5)),
+        "risk_tolerance": 0.02,
+        "min_bet": 10.0,
+        "max_bet": 500.0,
+    }
+
+
+# Scenario name -> request factory returning (path, JSON body)
+SCENARIOS: Dict[str, Callable[[random.Random], Tuple[str, Dict[str, Any]]]] = {
+    "analyze": _analyze_request,
+    "strategy": _strategy_request,
+    "bankroll": _bankroll_request,
+}
+
+DEFAULT_MIX = {"analyze": 5, "strategy": 3, "bankroll": 2}
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    """
+    Parse a mix specification such as ``analyze=5,strategy=3,bankroll=2``.
+
+    Raises:
+        ValueError: If a scenario is unknown or a weight is not a positive integer
+    """
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(
+                f"Unknown scenario {name!r}. Must be one of: {', '.join(SCENARIOS)}"
+            )
+        mix[name] = int(weight or 1)
+        if mix[name] <= 0:
+            raise ValueError(f"Weight for {name!r} must be positive")
+    return mix
+
+
+@dataclass
+class ScenarioStats:
+    """Latency and outcome counters for one scenario."""
+
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    status_codes: Dict[int, int] = field(default_factory=dict)
+    errors: int = 0
+
+
+@dataclass
+class LoadTestResult:
+    """Aggregated results of a load test run."""
+
+    elapsed: float
+    concurrency: int
+    scenarios: Dict[str, ScenarioStats]
+
+    @property
+    def overall(self) -> LatencyHistogram:
+        histogram = LatencyHistogram()
+        for stats in self.scenarios.values():
+            histogram.merge(stats.histogram)
+        return histogram
+
+    @property
+    def throughput(self) -> float:
+        return self.overall.total_count / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "elapsed_seconds": round(self.elapsed, 3),
+            "concurrency": self.concurrency,
+            "throughput_rps": round(self.throughput, 1),
+            "latency_unit": "us",
+            "overall": self.overall.to_dict(),
+            "scenarios": {
+                name: {
+                    "status_codes": {str(k): v for k, v in stats.status_codes.items()},
+                    "errors": stats.errors,
+                    "latency": stats.histogram.to_dict(),
+                }
+                for name, stats in self.scenarios.items()
+            },
+        }
+
+
+async def install_fake_redis() -> Any:
+    """
+    Route rate limiting and caching through an in-process fakeredis server.
+
+    Returns:
+        The fakeredis client now used by the limiter and the cache
+
+    Raises:
+        RuntimeError: If fakeredis is not installed
+    """
+    try:
+        from fakeredis import aioredis as fake_aioredis
+    except ImportError as e:
+        raise RuntimeError(
+            "fakeredis is required for --fake-redis (pip install fakeredis)"
+        ) from e
+
+    from fastapi_cache import FastAPICache
+    from fastapi_cache.backends.redis import RedisBackend
+    from fastapi_limiter import FastAPILimiter
+
+    from src.api.cache import InstrumentedBackend
+
+    redis_connection = fake_aioredis.FakeRedis(encoding="utf-8", decode_responses=True)
+    FastAPILimiter.redis = redis_connection
+    FastAPICache.init(
+        InstrumentedBackend(RedisBackend(redis_connection)), prefix="fastapi-cache"
+    )
+    return redis_connection
+
+
+async def load_app(spec: str) -> Any:
+    """
+    Import an ASGI application from a ``module:attribute`` specification.
+
+    Awaitables (such as the coroutine returned by ``create_app``) are awaited.
+    """
+    module_name, _, attribute = spec.partition(":")
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    app = getattr(importlib.import_module(module_name), attribute or "app")
+    if inspect.isawaitable(app):
+        app = await app
+    return app
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: Optional[float] = None,
+    total_requests: Optional[int] = None,
+    seed: int = 0,
+    distinct_clients: bool = False,
+) -> LoadTestResult:
+    """
+    Run ``concurrency`` closed-loop clients against ``client``.
+
+    Each client picks a scenario by weight, sends the request, records the
+    latency and immediately sends the next one until the duration elapses or
+    the total number of requests has been issued.
+
+    Args:
+        client: httpx client bound to the target application
+        mix: Scenario name -> relative weight
+        concurrency: Number of concurrent clients
+        duration: Run length in seconds
+        total_requests: Total number of requests across all clients
+        distinct_clients: Send a per-client ``X-Forwarded-For`` address so
+            rate limits apply per simulated client instead of to the whole run
+
+    Returns:
+        LoadTestResult: Per-scenario histograms, status codes and throughput
+    """
+    if duration is None and total_requests is None:
+        raise ValueError("Either duration or total_requests must be given")
+
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    scenarios = {name: ScenarioStats() for name in names}
+    remaining = [total_requests if total_requests is not None else -1]
+    start = time.monotonic()
+    deadline = start + duration if duration is not None else None
+
+    def next_request_allowed() -> bool:
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        if remaining[0] == 0:
+            return False
+        if remaining[0] > 0:
+            remaining[0] -= 1
+        return True
+
+    async def worker(worker_id: int) -> None:
+        rng = random.Random(seed * 100003 + worker_id)
+        octets = (worker_id >> 16 & 255, worker_id >> 8 & 255, worker_id & 255)
+        address = "10." + ".".join(map(str, octets))
+        headers = {"X-Forwarded-For": address} if distinct_clients else None
+        while next_request_allowed():
+            name = rng.choices(names, weights)[0]
+            path, body = SCENARIOS[name](rng)
+            stats = scenarios[name]
+            sent = time.perf_counter_ns()
+            try:
+                response = await client.post(path, json=body, headers=headers)
+            except Exception:
+                # Transport failures and exceptions raised by an in-process
+                # app must not abort the run and discard the histograms
+                stats.errors += 1
+                continue
+            stats.histogram.record((time.perf_counter_ns() - sent) // 1000)
+            stats.status_codes[response.status_code] = (
+                stats.status_codes.get(response.status_code, 0) + 1
+            )
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return LoadTestResult(
+        elapsed=time.monotonic() - start, concurrency=concurrency, scenarios=scenarios
+    )
+
+
+def format_report(result: LoadTestResult) -> str:
+    """Render a human-readable latency table (milliseconds)."""
+    lines = [
+        f"{'scenario':<10} {'count':>8} {'errors':>7} {'p50':>9} {'p95':>9} "
+        f"{'p99':>9} {'max':>9}  status codes"
+    ]
+    rows: List[Tuple[str, LatencyHistogram, int, Dict[int, int]]] = [
+        (name, s.histogram, s.errors, s.status_codes)
+        for name, s in result.scenarios.items()
+    ]
+    total_errors = sum(s.errors for s in result.scenarios.values())
+    rows.append(("overall", result.overall, total_errors, {}))
+    for name, histogram, errors, codes in rows:
+        summary = histogram.summary()
+        ms = {k: summary[k] / 1000 for k in ("p50", "p95", "p99", "max")}
+        lines.append(
+            f"{name:<10} {summary['count']:>8} {errors:>7} {ms['p50']:>8.2f}ms "
+            f"{ms['p95']:>7.2f}ms {ms['p99']:>7.2f}ms {ms['max']:>7.2f}ms  "
+            + ", ".join(f"{code}: {n}" for code, n in sorted(codes.items()))
+        )
+    lines.append(
+        f"\n{result.throughput:,.1f} requests/s over {result.elapsed:.2f}s "
+        f"with {result.concurrency} clients"
+    )
+    return "\n".join(lines)
+
+
+async def _main(args: argparse.Namespace) -> LoadTestResult:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    if args.url:
+        client = httpx.AsyncClient(
+            base_url=args.url, limits=limits, timeout=args.timeout
+        )
+    else:
+        app = await load_app(args.app)
+        if args.fake_redis:
+            await install_fake_redis()
+        client = httpx.AsyncClient(
+            # Report unhandled app exceptions as 500s like a real server would
+            transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+            base_url="http://loadtest",
+            timeout=args.timeout,
+        )
+    async with client:
+        return await run_load(
+            client,
+            parse_mix(args.mix),
+            args.concurrency,
+            duration=args.duration,
+            total_requests=args.requests,
+            seed=args.seed,
+            distinct_clients=args.distinct_clients,
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the Blackjack API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument(
+        "--app",
+        default="src.api.main:app",
+        help="ASGI app to drive in-process (default: src.api.main:app)",
+    )
+    target.add_argument("--url", help="Base URL of a running server instead")
+    parser.add_argument(
+        "--fake-redis",
+        action="store_true",
+        help="Use fakeredis for rate limiting and caching (in-process only)",
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=100)
+    parser.add_argument(
+        "--distinct-clients",
+        action="store_true",
+        help="Give every simulated client its own X-Forwarded-For address",
+    )
+    stop = parser.add_mutually_exclusive_group()
+    stop.add_argument("-d", "--duration", type=float, help="Run length in seconds")
+    stop.add_argument("-n", "--requests", type=int, help="Total number of requests")
+    parser.add_argument(
+        "--mix",
+        default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+        help="Weighted scenario mix (default: %(default)s)",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args(argv)
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+
+    result = asyncio.run(_main(args))
+    print(format_report(result))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result.to_dict(), indent=2))
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Minimal runner for the asv-style benchmark suite.
+
+Discovers ``time_*`` methods on the classes in ``benchmarks/bench_*.py``,
+times them with a monotonic clock and stores the statistics as JSON so runs
+can be compared against a baseline.
+"""
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+BENCHMARK_DIR = Path(__file__).parent
+PROJECT_ROOT = BENCHMARK_DIR.parent
+RESULTS_DIR = BENCHMARK_DIR / "results"
+
+# Default timing configuration, overridable per class via attributes
+DEFAULT_REPEAT = 5
+MIN_SAMPLE_TIME = 0.02  # seconds per sample when calibrating ``number``
+MAX_NUMBER = 10000
+
+
+def discover(pattern: Optional[str] = None) -> Iterator[Tuple[str, type, str]]:
+    """
+    Yield ``(module_name, suite_class, method_name)`` for every benchmark.
+
+    Args:
+        pattern: Optional substring the full benchmark name must contain
+
+    Yields:
+        Tuple describing one benchmark method
+    """
+    for path in sorted(BENCHMARK_DIR.glob("bench_*.py")):
+        module_name = f"benchmarks.{path.stem}"
+        module = importlib.import_module(module_name)
+        for class_name, suite in inspect.getmembers(module, inspect.isclass):
+            if class_name.startswith("_") or suite.__module__ != module_name:
+                continue
+            for method_name in sorted(dir(suite)):
+                if not method_name.startswith("time_"):
+                    continue
+                name = f"{path.stem}.{class_name}.{method_name}"
+                if pattern and pattern not in name:
+                    continue
+                yield path.stem, suite, method_name
+
+
+def _param_combinations(suite: type) -> Tuple[List[str], List[tuple]]:
+    params = getattr(suite, "params", None)
+    if not params:
+        return [], [()]
+    names = list(getattr(suite, "param_names", [f"p{i}" for i in range(len(params))]))
+    return names, list(itertools.product(*params))
+
+
+def _calibrate(func: Callable[[], Any]) -> int:
+    number = 1
+    while number < MAX_NUMBER:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= MIN_SAMPLE_TIME:
+            break
+        number *= 10
+    return number
+
+
+def time_benchmark(
+    suite: type, method_name: str, params: tuple, quick: bool = False
+) -> Dict[str, Any]:
+    """
+    Time one benchmark method for one parameter combination.
+
+    Args:
+        suite: Benchmark class
+        method_name: Name of the ``time_*`` method
+        params: Parameter values passed to ``setup`` and the method
+        quick: Run a single sample of a single call (smoke mode)
+
+    Returns:
+        Dict with the per-call timing statistics in seconds
+    """
+    instance = suite()
+    if hasattr(instance, "setup"):
+        instance.setup(*params)
+    try:
+        method = getattr(instance, method_name)
+
+        def call() -> Any:
+            return method(*params)
+
+        if quick:
+            number, repeat = 1, 1
+        else:
+            number = getattr(suite, "number", None) or _calibrate(call)
+            repeat = getattr(suite, "repeat", DEFAULT_REPEAT)
+
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                call()
+            samples.append((time.perf_counter() - start) / number)
+    finally:
+        if hasattr(instance, "teardown"):
+            instance.teardown(*params)
+
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "max": max(samples),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=PROJECT_ROOT,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(pattern: Optional[str] = None, quick: bool = False) -> Dict[str, Any]:
+    """
+    Run all matching benchmarks.
+
+    Args:
+        pattern: Optional substring filter on the benchmark name
+        quick: Smoke mode with a single call per benchmark
+
+    Returns:
+        Dict with run metadata and results keyed by benchmark name
+    """
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for module_name, suite, method_name in discover(pattern):
+        name = f"{module_name}.{suite.__name__}.{method_name}"
+        param_names, combinations = _param_combinations(suite)
+        for params in combinations:
+            stats = time_benchmark(suite, method_name, params, quick=quick)
+            results.setdefault(name, []).append(
+                {
+                    "params": {k: repr(v) for k, v in zip(param_names, params)},
+                    "stats": stats,
+                }
+            )
+            label = ", ".join(f"{k}={v!r}" for k, v in zip(param_names, params))
+            print(f"{name}({label}): {stats['median'] * 1e6:,.1f} us")
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = 0.10
+) -> List[str]:
+    """
+    Compare median timings against a baseline run.
+
+    Args:
+        current: Result document of the current run
+        baseline: Result document of the baseline run
+        threshold: Allowed relative slowdown before reporting a regression
+
+    Returns:
+        List of human-readable regression descriptions
+    """
+    regressions = []
+    for name, entries in current["results"].items():
+        baseline_entries = {
+            json.dumps(e["params"], sort_keys=True): e["stats"]
+            for e in baseline.get("results", {}).get(name, [])
+        }
+        for entry in entries:
+            key = json.dumps(entry["params"], sort_keys=True)
+            if key not in baseline_entries:
+                continue
+            before = baseline_entries[key]["median"]
+            after = entry["stats"]["median"]
+            if before > 0 and (after - before) / before > threshold:
+                regressions.append(
+                    f"{name}{entry['params']}: {before * 1e6:,.1f} us -> "
+                    f"{after * 1e6:,.1f} us (+{(after - before) / before:.0%})"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("-k", "--pattern", help="Only run benchmarks matching this")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="JSON file for the results (default: benchmarks/results/<timestamp>.json)",
+    )
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Relative slowdown reported as a regression (default: 0.10)",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Single call per benchmark (smoke test)"
+    )
+    args = parser.parse_args(argv)
+
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+
+    document = run(args.pattern, quick=args.quick)
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        output = RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        regressions = compare(
+            document, json.loads(args.compare.read_text()), args.threshold
+        )
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
@@ -11,6 +11,25 @@ SERVER_HOST = os.getenv(
 API_PORT = int(os.getenv("PORT", "8000"))  # Standard port for Railway/Render
 FRONTEND_PORT = API_PORT  # Use same port for frontend and backend in production
 
+# Produktionsserver (start.py)
+APP_MODULE = "src.api.main:app"
+WORKERS = int(
+    os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))
+)  # One worker per CPU by default
+WORKER_MAX_REQUESTS = int(
+    os.getenv("WORKER_MAX_REQUESTS", "10000")
+)  # Recycle a worker after this many requests (0 disables)
+WORKER_MAX_REQUESTS_JITTER = int(
+    os.getenv("WORKER_MAX_REQUESTS_JITTER", "1000")
+)  # Random extra requests so workers do not all restart at once
+WORKER_TIMEOUT = int(os.getenv("WORKER_TIMEOUT", "60"))  # Seconds
+GRACEFUL_TIMEOUT = int(
+    os.getenv("GRACEFUL_TIMEOUT", "30")
+)  # Seconds to finish in-flight requests on reload or shutdown
+PRELOAD_APP = (
+    os.getenv("PRELOAD_APP", "False").lower() == "true"
+)  # Import the app before forking; code changes then need a full restart
+
 # Anwendungseinstellungen
 DEFAULT_DECKS = 3
 DEFAULT_COUNT_METHOD = "hiLo"
@@ -2,51 +2,45 @@
 Blackjack Card Counter API
 
 This package contains the API for the Blackjack Card Counter application.
-"""
-
-# Import models
-from .models import CardInput, StrategyRequest, BankrollRequest
-
-# Import error classes from middleware
-from .middleware.error_handler import (
-    BlackjackError,
-    InvalidCardError,
-    InvalidDeckCountError,
-    InvalidCountingSystemError,
-)
-
-# Import decision engine and related functions
-from .decision_engine import (
-    BlackjackDecisionEngine,
-    get_decision_recommendation,
-    calculate_action_probabilities,
-)
-
-# Import counting systems
-from .utils.counting_systems import COUNTING_SYSTEMS, get_counting_system
 
-# Import the main FastAPI app
-from .main import app
-
-# Import counting systems from utils
-from .utils.counting_systems import COUNTING_SYSTEMS
-
-# Import utility functions
-from .utils import (
-    calculate_hand_value,
-    calculate_advanced_probabilities,
-    get_counting_system,
-    calculate_running_count,
-    calculate_true_count,
-)
+The names below are loaded on first access (PEP 562), so importing a single
+submodule such as ``src.api.utils.counting_systems`` does not build the app,
+connect to Redis or import NumPy and FastAPI.
+"""
+import importlib
+from typing import Any, Dict
 
-# Import services
-from .services import (
-    analyze_cards,
-    get_strategy_recommendation,
-    manage_bankroll,
-    calculate_bankroll_needed,
-)
+# Public name -> submodule that defines it
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    # Models
+    "CardInput": ".models",
+    "StrategyRequest": ".models",
+    "BankrollRequest": ".models",
+    # Error classes
+    "BlackjackError": ".middleware.error_handler",
+    "InvalidCardError": ".middleware.error_handler",
+    "InvalidDeckCountError": ".middleware.error_handler",
+    "InvalidCountingSystemError": ".middleware.error_handler",
+    # Decision engine
+    "BlackjackDecisionEngine": ".decision_engine",
+    "get_decision_recommendation": ".decision_engine",
+    "calculate_action_probabilities": ".decision_engine",
+    # Main app
+    "app": ".main",
+    # Counting systems
+    "COUNTING_SYSTEMS": ".utils.counting_systems",
+    "get_counting_system": ".utils.counting_systems",
+    # Utility functions
+    "calculate_hand_value": ".utils.card_utils",
+    "calculate_advanced_probabilities": ".utils.card_utils",
+    "calculate_running_count": ".utils.counting_systems",
+    "calculate_true_count": ".utils.counting_systems",
+    # Services
+    "analyze_cards": ".services.card_service",
+    "get_strategy_recommendation": ".services.strategy_service",
+    "manage_bankroll": ".services.bankroll_service",
+    "calculate_bankroll_needed": ".services.bankroll_service",
+}
 
 __all__ = [
     # Models
@@ -74,3 +68,17 @@ __all__ = [
     "manage_bankroll",
     "calculate_bankroll_needed",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,164 @@
+"""
+Cache backend helpers for the Blackjack Card Counter API.
+
+This module wraps fastapi-cache backends to record hit and miss counters
+per cache namespace and to report each lookup to the rate limiter, so
+cached answers are charged less than computed ones, to keep serving from
+a fallback while Redis is slow or unavailable, and to keep entries in a
+local :class:`~.result_store.ResultStore` that survives restarts.
+
+Environment variables:
+    CACHE_BACKEND_TIMEOUT: Seconds a cache operation may take before the
+        in-memory fallback is used (default: 0.05)
+    CACHE_RETRY_INTERVAL: Seconds to stay on the fallback after a slow or
+        failed operation (default: 5)
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Optional, Tuple
+
+from fastapi_cache.backends import Backend
+from fastapi_cache.backends.inmemory import InMemoryBackend
+
+from .metrics import CACHE_REQUESTS
+from .request_cost import charge_cache_lookup
+from .result_store import ResultStore
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND_TIMEOUT = float(os.getenv("CACHE_BACKEND_TIMEOUT", "0.05"))
+CACHE_RETRY_INTERVAL = float(os.getenv("CACHE_RETRY_INTERVAL", "5"))
+
+
+def _namespace(key: str) -> str:
+    # fastapi-cache keys have the form "<prefix>:<namespace>:<hash>"
+    parts = key.split(":")
+    return (parts[1] or "default") if len(parts) >= 3 else "default"
+
+
+class InstrumentedBackend(Backend):
+    """
+    fastapi-cache backend that counts hits and misses of a wrapped backend.
+
+    Args:
+        backend: The backend actually storing the values
+    """
+
+    def __init__(self, backend: Backend) -> None:
+        self.backend = backend
+
+    def _record(self, key: str, value: Optional[str]) -> None:
+        CACHE_REQUESTS.labels(_namespace(key), "miss" if value is None else "hit").inc()
+        charge_cache_lookup(value is not None)
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[str]]:
+        ttl, value = await self.backend.get_with_ttl(key)
+        self._record(key, value)
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.backend.get(key)
+        self._record(key, value)
+        return value
+
+    async def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        await self.backend.set(key, value, expire)
+
+    async def clear(
+        self, namespace: Optional[str] = None, key: Optional[str] = None
+    ) -> int:
+        return await self.backend.clear(namespace, key)
+
+
+class FallbackBackend(Backend):
+    """
+    fastapi-cache backend that degrades to a fallback when its primary is slow.
+
+    Every operation on the primary backend is bounded by ``timeout``. A slow
+    or failed operation is answered by the fallback instead, and the primary
+    is left alone for ``retry_interval`` seconds, so a Redis hiccup costs
+    one request at most ``timeout`` rather than stalling every request.
+
+    Args:
+        backend: Primary backend (normally Redis)
+        fallback: Backend used while the primary is unavailable
+        timeout: Seconds an operation on the primary may take
+        retry_interval: Seconds to stay on the fallback after a failure
+    """
+
+    def __init__(
+        self,
+        backend: Backend,
+        fallback: Optional[Backend] = None,
+        timeout: float = CACHE_BACKEND_TIMEOUT,
+        retry_interval: float = CACHE_RETRY_INTERVAL,
+    ) -> None:
+        self.backend = backend
+        self.fallback = fallback if fallback is not None else InMemoryBackend()
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._down_until = 0.0
+
+    @property
+    def degraded(self) -> bool:
+        """Whether operations currently go to the fallback."""
+        return time.monotonic() < self._down_until
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        now = time.monotonic()
+        if now >= self._down_until:
+            try:
+                return await asyncio.wait_for(
+                    getattr(self.backend, method)(*args), self.timeout
+                )
+            except Exception as e:
+                logger.warning(f"Cache falling back: {method} failed: {e!r}")
+                self._down_until = now + self.retry_interval
+        return await getattr(self.fallback, method)(*args)
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[str]]:
+        return await self._call("get_with_ttl", key)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._call("get", key)
+
+    async def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        await self._call("set", key, value, expire)
+
+    async def clear(
+        self, namespace: Optional[str] = None, key: Optional[str] = None
+    ) -> int:
+        return await self._call("clear", namespace, key)
+
+
+class StoreBackend(Backend):
+    """
+    fastapi-cache backend keeping entries in a persistent result store.
+
+    Entries outlive the process and are shared by the worker processes.
+    Lookups are local, memory-mapped SQLite reads and writes are queued for
+    the store's writer thread, so neither waits on the network or a disk
+    write.
+
+    Args:
+        store: Store holding the entries
+    """
+
+    def __init__(self, store: ResultStore) -> None:
+        self.store = store
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[str]]:
+        return self.store.get_with_ttl(key)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.store.get(key)
+
+    async def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        self.store.put(key, value, expire or None)
+
+    async def clear(
+        self, namespace: Optional[str] = None, key: Optional[str] = None
+    ) -> int:
+        return self.store.clear(prefix=namespace, key=key)
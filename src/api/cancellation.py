@@ -0,0 +1,132 @@
+"""
+Cooperative cancellation of engine computations.
+
+Engine work runs on executor threads, and cancelling the task that awaits
+it does not stop the thread: the engine keeps simulating rounds nobody will
+read. A :class:`CancellationToken` is a flag the engine checks between
+chunks of work. ``EngineExecutor`` trips the token of a job whose caller is
+cancelled, and the micro-batcher trips the token of each batched request
+whose caller is cancelled, so abandoned work stops within one chunk.
+
+:func:`run_until_disconnected` is the route side: it cancels an engine
+request when the client disconnects or a server-side deadline passes.
+
+Like the request cost, the token of the current job lives in a context
+variable, so it follows the job into the engine worker thread.
+"""
+import asyncio
+import contextvars
+from typing import Awaitable, Optional, TypeVar
+
+from starlette.requests import Request
+
+T = TypeVar("T")
+
+
+class ComputationCancelled(Exception):
+    """Raised by a computation whose cancellation token was tripped."""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before its answer was ready."""
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an answer was not ready within the server-side deadline."""
+
+
+class CancellationToken:
+    """Flag telling a computation on another thread that its caller left."""
+
+    __slots__ = ("cancelled",)
+
+    def __init__(self) -> None:
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Ask the computation to stop at its next check."""
+        self.cancelled = True
+
+    def check(self) -> None:
+        """
+        Raise if the computation was asked to stop.
+
+        Raises:
+            ComputationCancelled: If :meth:`cancel` was called
+        """
+        if self.cancelled:
+            raise ComputationCancelled()
+
+
+_current_token: contextvars.ContextVar[
+    Optional[CancellationToken]
+] = contextvars.ContextVar("cancellation_token", default=None)
+
+
+def set_cancellation_token(token: CancellationToken) -> None:
+    """Make ``token`` the cancellation token of the current context."""
+    _current_token.set(token)
+
+
+def current_cancellation_token() -> Optional[CancellationToken]:
+    """Return the cancellation token of the current context, if any."""
+    return _current_token.get()
+
+
+def check_cancelled() -> None:
+    """
+    Raise if the current context's computation was asked to stop.
+
+    Raises:
+        ComputationCancelled: If the current token was tripped
+    """
+    token = _current_token.get()
+    if token is not None:
+        token.check()
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    # Once the body is read, the server's receive blocks until the client
+    # disconnects or the response is complete
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def run_until_disconnected(
+    request: Request, work: Awaitable[T], timeout: Optional[float] = None
+) -> T:
+    """
+    Await ``work`` while the client is connected and the deadline holds.
+
+    If the client disconnects or ``timeout`` passes first, ``work`` is
+    cancelled, which trips the tokens of the engine jobs it is awaiting.
+
+    Args:
+        request: Request whose client is watched
+        work: Awaitable producing the answer
+        timeout: Seconds to wait for the answer; None waits indefinitely
+
+    Returns:
+        The result of ``work``
+
+    Raises:
+        ClientDisconnected: If the client disconnected first
+        DeadlineExceeded: If ``timeout`` passed first
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        done, _ = await asyncio.wait(
+            {task, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        watcher.cancel()
+        task.cancel()
+
+    if task in done:
+        return task.result()
+    if watcher in done:
+        # A failing receive also means the client is gone
+        watcher.exception()
+        raise ClientDisconnected()
+    raise DeadlineExceeded()
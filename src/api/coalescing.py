@@ -0,0 +1,218 @@
+"""
+Request coalescing and early refresh for cached computations.
+
+Identical requests often arrive together: several clients at one table ask
+about the same hand at the same moment. Without coordination, every one of
+them misses the cache and starts its own computation. :class:`SingleFlight`
+lets the first caller for a key compute the answer while concurrent callers
+with the same key await that one result.
+
+A cache entry that expires while it is still popular causes the same
+stampede. :func:`coalesced_cache` therefore refreshes entries
+probabilistically before they expire ("XFetch", Vattani et al., VLDB 2015).
+Each lookup recomputes early with a probability that rises as the expiry
+nears, scaled by how long the computation takes. One request refreshes the
+entry while the others keep getting the cached value.
+
+Environment variables:
+    EARLY_REFRESH_BETA: How eagerly entries are refreshed before they
+        expire; 0 disables early refresh (default: 1.0)
+"""
+import asyncio
+import functools
+import logging
+import math
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from fastapi_cache import FastAPICache
+
+from .metrics import CACHE_EARLY_REFRESHES, COALESCED_REQUESTS
+from .request_cost import charge_shared_answer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+EARLY_REFRESH_BETA = float(os.getenv("EARLY_REFRESH_BETA", "1.0"))
+
+# Weight of the newest duration in the running average of computation time
+_DURATION_SMOOTHING = 0.2
+
+
+class SingleFlight:
+    """
+    Run at most one computation per key at a time.
+
+    The computation runs in its own task. A caller that is cancelled stops
+    waiting, but the other callers still get the result; once every caller
+    has stopped waiting, the computation is cancelled.
+
+    Args:
+        namespace: Label for the coalescing metrics
+    """
+
+    def __init__(self, namespace: str) -> None:
+        self.namespace = namespace
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[asyncio.Future, int] = {}
+        # Running average of the computation time, in seconds
+        self.duration: Optional[float] = None
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Return whether a computation for ``key`` is running."""
+        return key in self._calls
+
+    def _observe(self, seconds: float) -> None:
+        if self.duration is None:
+            self.duration = seconds
+        else:
+            self.duration += _DURATION_SMOOTHING * (seconds - self.duration)
+
+    async def _timed(self, func: Callable[[], Awaitable[T]]) -> T:
+        start = time.perf_counter()
+        result = await func()
+        self._observe(time.perf_counter() - start)
+        return result
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Return ``await func()``, sharing one call among concurrent callers.
+
+        Args:
+            key: Canonical form of the request
+            func: Computes the result; called only if no call for ``key``
+                is in flight
+
+        Returns:
+            The result of the call in flight for ``key``
+
+        Raises:
+            Exception: Whatever the shared call raised, for every caller
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._timed(func))
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            COALESCED_REQUESTS.labels(self.namespace).inc()
+            # A shared answer costs the caller as much as a cached one
+            charge_shared_answer()
+        self._waiters[future] = self._waiters.get(future, 0) + 1
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._waiters[future] -= 1
+            if not self._waiters[future]:
+                del self._waiters[future]
+                if not future.done():
+                    # Nobody is left to use the result; later callers for
+                    # the key start afresh
+                    if self._calls.get(key) is future:
+                        del self._calls[key]
+                    future.cancel()
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # Mark a failure as retrieved; if every caller stopped waiting,
+            # asyncio would otherwise log it as never retrieved
+            future.exception()
+
+
+def should_refresh_early(
+    ttl: float, duration: Optional[float], beta: float = EARLY_REFRESH_BETA
+) -> bool:
+    """
+    Decide whether to recompute a cache entry before it expires.
+
+    Args:
+        ttl: Seconds until the entry expires
+        duration: Typical seconds to recompute it, if known
+        beta: Eagerness; larger values refresh earlier
+
+    Returns:
+        bool: True with a probability that rises as ``ttl`` approaches 0
+    """
+    if not duration or beta <= 0 or ttl <= 0:
+        return False
+    # -log(U) is exponentially distributed, so the refresh point lands a few
+    # computation times before expiry and differs from request to request
+    return duration * beta * -math.log(1.0 - random.random()) >= ttl
+
+
+def coalesced_cache(
+    namespace: str,
+    expire: int,
+    key: Callable[..., str],
+    beta: float = EARLY_REFRESH_BETA,
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """
+    Cache an async function in the fastapi-cache backend, with coalescing.
+
+    Entries are stored like ``fastapi_cache.decorator.cache`` stores them,
+    so the instrumented backend counts hits and misses per namespace. On a
+    miss, or when an entry is due for early refresh, the computation runs
+    through a :class:`SingleFlight`, so concurrent callers for one key share
+    a single computation. While an entry is being refreshed, other callers
+    get the cached value. Without an initialized cache, calls are only
+    coalesced.
+
+    Args:
+        namespace: Cache namespace
+        expire: Seconds an entry lives
+        key: Builds the canonical key from the function's arguments
+        beta: Early refresh eagerness (see :func:`should_refresh_early`)
+    """
+
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        flight = SingleFlight(namespace)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            canonical = key(*args, **kwargs)
+            try:
+                backend = FastAPICache.get_backend()
+                coder = FastAPICache.get_coder()
+                cache_key = f"{FastAPICache.get_prefix()}:{namespace}:{canonical}"
+            except AssertionError:
+                # Cache not initialized
+                return await flight.run(
+                    canonical, functools.partial(func, *args, **kwargs)
+                )
+            if not FastAPICache.get_enable():
+                return await func(*args, **kwargs)
+
+            try:
+                ttl, cached = await backend.get_with_ttl(cache_key)
+            except Exception:
+                logger.warning(f"Error reading cache key {cache_key}", exc_info=True)
+                ttl, cached = 0, None
+
+            if cached is not None:
+                if flight.in_flight(cache_key) or not should_refresh_early(
+                    ttl, flight.duration, beta
+                ):
+                    return coder.decode(cached)
+                CACHE_EARLY_REFRESHES.labels(namespace).inc()
+
+            async def compute() -> T:
+                result = await func(*args, **kwargs)
+                try:
+                    await backend.set(cache_key, coder.encode(result), expire)
+                except Exception:
+                    logger.warning(
+                        f"Error setting cache key {cache_key}", exc_info=True
+                    )
+                return result
+
+            return await flight.run(cache_key, compute)
+
+        wrapper.flight = flight  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
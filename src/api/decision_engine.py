@@ -14,11 +14,68 @@ to determine the optimal play for any given situation.
 """
 
 import random
+import time
 import numpy as np
 from typing import List, Dict, Tuple, Optional
 from collections import defaultdict
 import itertools
 
+from .metrics import (
+    ENGINE_SIMULATIONS,
+    ENGINE_SIMULATION_DURATION,
+    ENGINE_SIMULATION_ROUNDS,
+)
+from .cancellation import (
+    CancellationToken,
+    ComputationCancelled,
+    current_cancellation_token,
+)
+from .request_cost import charge_rounds
+from . import simulation_kernel
+
+
+# Monte Carlo rounds simulated per action unless configured otherwise
+DEFAULT_SIMULATION_ROUNDS = 10000
+
+# Rounds simulated between checks for cancellation
+SIMULATION_CHUNK_ROUNDS = 250
+
+# Added to a job's seed for each chunk, so its chunks draw different rounds
+_CHUNK_SEED_STRIDE = 0x9E3779B9
+
+# Expected value gained per point of true count (higher count favors player)
+COUNT_ADJUSTMENT = 0.005
+
+# Bump when a change alters the engine's answers, so results persisted by
+# another version are not served
+ENGINE_VERSION = 1
+
+# Rules and settings the engine's answers depend on; persisted results are
+# filed under their hash
+ENGINE_RULES = {
+    "dealer_hits_soft_17": True,
+    "count_adjustment": COUNT_ADJUSTMENT,
+    "simulation_rounds": DEFAULT_SIMULATION_ROUNDS,
+}
+
+
+def count_adjustment(true_count: float) -> float:
+    """Return the expected value adjustment for the true count."""
+    return true_count * COUNT_ADJUSTMENT
+
+
+def round_chunks(rounds: int) -> List[int]:
+    """Split ``rounds`` into chunks of at most ``SIMULATION_CHUNK_ROUNDS``."""
+    full, rest = divmod(rounds, SIMULATION_CHUNK_ROUNDS)
+    return [SIMULATION_CHUNK_ROUNDS] * full + ([rest] if rest else [])
+
+
+def record_simulations(action: str, seconds: float, rounds: int) -> None:
+    """Publish metrics for one simulated action."""
+    ENGINE_SIMULATION_DURATION.labels(action).observe(seconds)
+    ENGINE_SIMULATIONS.labels(action).inc()
+    ENGINE_SIMULATION_ROUNDS.inc(rounds)
+
 
 class BlackjackDecisionEngine:
     """
@@ -28,16 +85,32 @@ class BlackjackDecisionEngine:
     the best action for any given game state.
     """
 
-    def __init__(self, num_decks: int = 6, simulation_rounds: int = 10000):
+    def __init__(
+        self,
+        num_decks: int = 6,
+        simulation_rounds: int = DEFAULT_SIMULATION_ROUNDS,
+        use_kernel: Optional[bool] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ):
         """
         Initialize the decision engine.
 
         Args:
             num_decks: Number of decks in play
             simulation_rounds: Number of Monte Carlo simulation rounds per action
+            use_kernel: Simulate with the compiled kernel in
+                ``simulation_kernel``; defaults to whether Numba is installed
+            cancellation: Token checked between chunks of simulated rounds;
+                defaults to the token of the current engine executor job
         """
         self.num_decks = num_decks
         self.simulation_rounds = simulation_rounds
+        if use_kernel is None:
+            use_kernel = simulation_kernel.NUMBA_AVAILABLE
+        self.use_kernel = use_kernel
+        if cancellation is None:
+            cancellation = current_cancellation_token()
+        self.cancellation = cancellation
         self.card_values = {
             "A": [1, 11],
             "2": [2],
@@ -176,11 +249,30 @@ class BlackjackDecisionEngine:
 
         Returns:
             Expected return for this action (-1 to +2.5 for blackjack)
+
+        Raises:
+            ComputationCancelled: If the engine's token was tripped
         """
+        if self.use_kernel:
+            player = simulation_kernel.hand_indices(player_cards)
+            code = simulation_kernel.ACTION_CODES.get(action, simulation_kernel.STAND)
+            upcard = simulation_kernel.CARD_INDEX[dealer_upcard]
+            counts = simulation_kernel.shoe_counts(remaining_cards)
+            total = 0.0
+            for rounds in round_chunks(self.simulation_rounds):
+                self._check_cancelled()
+                total += rounds * simulation_kernel.simulate_action(
+                    player, code, upcard, counts, rounds, random.getrandbits(32)
+                )
+            return total / max(self.simulation_rounds, 1)
+
         wins = 0
         total_simulations = 0
 
-        for _ in range(self.simulation_rounds):
+        for round_number in range(self.simulation_rounds):
+            if round_number % SIMULATION_CHUNK_ROUNDS == 0:
+                self._check_cancelled()
+
             # Create working copies
             player_hand = player_cards.copy()
             deck_copy = remaining_cards.copy()
@@ -266,6 +358,15 @@ class BlackjackDecisionEngine:
 
         return wins / max(total_simulations, 1)
 
+    @property
+    def cancelled(self) -> bool:
+        """Whether the engine's cancellation token was tripped."""
+        return self.cancellation is not None and self.cancellation.cancelled
+
+    def _check_cancelled(self) -> None:
+        if self.cancelled:
+            raise ComputationCancelled()
+
     def calculate_expected_values(
         self,
         player_cards: List[str],
@@ -286,6 +387,38 @@ class BlackjackDecisionEngine:
             Dictionary of action -> expected value
         """
         remaining_cards = self.get_remaining_cards(seen_cards)
+        actions = self.available_actions(player_cards)
+
+        # Don't hit if already busted
+        if not actions:
+            return {"stand": -1.0}
+
+        expected_values = {}
+
+        for action in actions:
+            start = time.perf_counter()
+            ev = self.simulate_player_action(
+                player_cards, action, dealer_upcard, remaining_cards
+            )
+            record_simulations(
+                action, time.perf_counter() - start, self.simulation_rounds
+            )
+            charge_rounds(self.simulation_rounds)
+
+            expected_values[action] = ev + count_adjustment(true_count)
+
+        return expected_values
+
+    def available_actions(self, player_cards: List[str]) -> List[str]:
+        """
+        List the actions worth simulating for a hand.
+
+        Args:
+            player_cards: Current player hand
+
+        Returns:
+            List of actions; empty if the hand is already busted
+        """
         player_value, is_soft = self.calculate_hand_value(player_cards)
 
         # Available actions
@@ -309,22 +442,9 @@ class BlackjackDecisionEngine:
 
         # Don't hit if already busted
         if player_value > 21:
-            return {"stand": -1.0}
-
-        expected_values = {}
-
-        for action in actions:
-            ev = self.simulate_player_action(
-                player_cards, action, dealer_upcard, remaining_cards
-            )
-
-            # Adjust EV based on true count (higher count favors player)
-            count_adjustment = true_count * 0.005  # Small adjustment factor
-            ev += count_adjustment
-
-            expected_values[action] = ev
+            return []
 
-        return expected_values
+        return actions
 
     def get_optimal_decision(
         self,
@@ -349,7 +469,32 @@ class BlackjackDecisionEngine:
         expected_values = self.calculate_expected_values(
             player_cards, dealer_upcard, seen_cards, true_count
         )
+        return self.build_decision(
+            player_cards, dealer_upcard, seen_cards, true_count, expected_values
+        )
+
+    def build_decision(
+        self,
+        player_cards: List[str],
+        dealer_upcard: str,
+        seen_cards: List[str],
+        true_count: float,
+        expected_values: Dict[str, float],
+    ) -> Dict:
+        """
+        Assemble the decision analysis from already calculated expected values.
+
+        Args:
+            player_cards: Current player hand
+            dealer_upcard: Dealer's upcard
+            seen_cards: All cards seen so far
+            true_count: Current true count
+            expected_values: Action -> expected value, as returned by
+                :meth:`calculate_expected_values`
 
+        Returns:
+            Dictionary containing optimal action and analysis
+        """
         # Find optimal action
         optimal_action = max(expected_values.items(), key=lambda x: x[1])
 
@@ -459,6 +604,7 @@ def get_decision_recommendation(
     seen_cards: List[str],
     true_count: float = 0.0,
     num_decks: int = 6,
+    cancellation: Optional[CancellationToken] = None,
 ) -> Dict:
     """
     Get optimal decision recommendation using the mathematical engine.
@@ -469,16 +615,143 @@ def get_decision_recommendation(
         seen_cards: All cards seen in the current shoe
         true_count: Current true count
         num_decks: Number of decks in play
+        cancellation: Token that stops the simulation when tripped
 
     Returns:
         Decision analysis dictionary
+
+    Raises:
+        ComputationCancelled: If ``cancellation`` was tripped
     """
-    engine = BlackjackDecisionEngine(num_decks=num_decks)
+    engine = BlackjackDecisionEngine(num_decks=num_decks, cancellation=cancellation)
     return engine.get_optimal_decision(
         player_cards, dealer_card, seen_cards, true_count
     )
 
 
+def get_decision_recommendations(
+    requests: List[Dict], simulation_rounds: int = DEFAULT_SIMULATION_ROUNDS
+) -> List[Optional[Dict]]:
+    """
+    Get decision recommendations for many game states in one engine pass.
+
+    With the compiled kernel, every action of every request is simulated in
+    :func:`simulation_kernel.simulate_batch` calls of
+    ``SIMULATION_CHUNK_ROUNDS`` rounds each; between calls, the jobs of
+    cancelled requests are dropped. Otherwise the requests are evaluated one
+    after another.
+
+    Args:
+        requests: Keyword arguments for :func:`get_decision_recommendation`,
+            one dict per game state
+        simulation_rounds: Number of Monte Carlo rounds per action
+
+    Returns:
+        List of decision analysis dictionaries, in the order of ``requests``;
+        None for requests whose ``cancellation`` token was tripped
+    """
+    engines = [
+        BlackjackDecisionEngine(
+            num_decks=request.get("num_decks", 6),
+            simulation_rounds=simulation_rounds,
+            cancellation=request.get("cancellation"),
+        )
+        for request in requests
+    ]
+    if not requests or not engines[0].use_kernel:
+        decisions: List[Optional[Dict]] = []
+        for engine, request in zip(engines, requests):
+            try:
+                decisions.append(
+                    engine.get_optimal_decision(
+                        request["player_cards"],
+                        request["dealer_card"],
+                        request["seen_cards"],
+                        request.get("true_count", 0.0),
+                    )
+                )
+            except ComputationCancelled:
+                decisions.append(None)
+        return decisions
+
+    # One kernel job per legal action of each request
+    jobs = []
+    for index, (engine, request) in enumerate(zip(engines, requests)):
+        remaining_cards = engine.get_remaining_cards(request["seen_cards"])
+        for action in engine.available_actions(request["player_cards"]):
+            jobs.append((index, action, remaining_cards))
+
+    totals = np.zeros(len(jobs))
+    rounds_run = np.zeros(len(jobs), dtype=np.int64)
+    if jobs:
+        hands = [requests[index]["player_cards"] for index, _, _ in jobs]
+        players = np.zeros((len(jobs), max(map(len, hands))), dtype=np.int64)
+        for row, hand in enumerate(hands):
+            players[row, : len(hand)] = simulation_kernel.hand_indices(hand)
+        hand_sizes = np.array([len(hand) for hand in hands], dtype=np.int64)
+        actions = np.array(
+            [simulation_kernel.ACTION_CODES[action] for _, action, _ in jobs],
+            dtype=np.int64,
+        )
+        upcards = np.array(
+            [
+                simulation_kernel.CARD_INDEX[requests[index]["dealer_card"]]
+                for index, _, _ in jobs
+            ],
+            dtype=np.int64,
+        )
+        counts = np.array(
+            [simulation_kernel.shoe_counts(remaining) for _, _, remaining in jobs]
+        )
+        seeds = np.array([random.getrandbits(32) for _ in jobs], dtype=np.int64)
+
+        start = time.perf_counter()
+        for chunk, rounds in enumerate(round_chunks(simulation_rounds)):
+            live = np.flatnonzero(
+                [not engines[index].cancelled for index, _, _ in jobs]
+            )
+            if not live.size:
+                break
+            totals[live] += rounds * simulation_kernel.simulate_batch(
+                players[live],
+                hand_sizes[live],
+                actions[live],
+                upcards[live],
+                counts[live],
+                rounds,
+                (seeds[live] + chunk * _CHUNK_SEED_STRIDE) % 2**32,
+            )
+            rounds_run[live] += rounds
+        # The jobs run in parallel; attribute an equal share to each
+        seconds = (time.perf_counter() - start) / len(jobs)
+        for (_, action, _), run in zip(jobs, rounds_run):
+            if run == simulation_rounds:
+                record_simulations(action, seconds, simulation_rounds)
+
+    expected_values: List[Optional[Dict[str, float]]] = [{} for _ in requests]
+    for (index, action, _), total, run in zip(jobs, totals, rounds_run):
+        values = expected_values[index]
+        if run < simulation_rounds:
+            expected_values[index] = None
+        elif values is not None:
+            ev = total / max(simulation_rounds, 1)
+            true_count = requests[index].get("true_count", 0.0)
+            values[action] = float(ev) + count_adjustment(true_count)
+
+    return [
+        None
+        if values is None
+        else engine.build_decision(
+            request["player_cards"],
+            request["dealer_card"],
+            request["seen_cards"],
+            request.get("true_count", 0.0),
+            values or {"stand": -1.0},
+        )
+        for engine, request, values in zip(engines, requests, expected_values)
+    ]
+
+
 def calculate_action_probabilities(
     player_cards: List[str], dealer_card: str, remaining_cards: Dict[str, int]
 ) -> Dict[str, float]:
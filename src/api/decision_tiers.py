@@ -0,0 +1,262 @@
+"""
+Tiered decision answers for a latency budget or accuracy target.
+
+The Monte Carlo engine gives the most faithful answer but takes the longest.
+A strategy request can instead name the accuracy it needs, or the time it
+can wait, and is answered by the cheapest tier that meets it:
+
+``table``
+    Looks the hand up in the precomputed tables of :mod:`tables`, for the
+    nearest tabulated deck count. Ignores which cards have been seen.
+``approximate``
+    Corrects the table values linearly for the cards seen, using each
+    rank's precomputed effect of removal.
+``exact``
+    Computes the expected values for the actual composition of the shoe,
+    enumerating every card the player can draw.
+``simulation``
+    Runs the Monte Carlo decision engine.
+
+Every tier values the actions as the engine plays them and returns the
+engine's decision format, so tiers differ only in precision and speed.
+"""
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import tables
+from .cancellation import check_cancelled
+from .decision_engine import ENGINE_RULES, BlackjackDecisionEngine, count_adjustment
+from .metrics import DECISION_TIER_ANSWERS
+
+TIERS = ("table", "approximate", "exact", "simulation")
+
+# Typical latency of each tier in milliseconds, refined by measurement
+DEFAULT_TIER_LATENCY_MS = {
+    "table": 0.1,
+    "approximate": 0.3,
+    "exact": 25.0,
+    "simulation": 100.0,
+}
+
+# Weight of the newest duration in the running average of tier latency
+_LATENCY_SMOOTHING = 0.2
+
+# Tables and exact values follow the engine's dealer rule
+_HITS_SOFT_17 = ENGINE_RULES["dealer_hits_soft_17"]
+_DEALER_RULE = tables.HIT_SOFT_17 if _HITS_SOFT_17 else tables.STAND
+
+# Table rank index (2-9, ten, ace) of every card value
+_RANK_INDEX = {
+    **{str(value): value - 2 for value in range(2, 11)},
+    "J": 8,
+    "Q": 8,
+    "K": 8,
+    "A": 9,
+}
+
+_latency_ms = dict(DEFAULT_TIER_LATENCY_MS)
+
+
+def tier_latency_ms(tier: str) -> float:
+    """Return the typical latency of ``tier`` in milliseconds."""
+    return _latency_ms[tier]
+
+
+def record_tier_latency(tier: str, milliseconds: float) -> None:
+    """Fold an observed answer time into the typical latency of ``tier``."""
+    DECISION_TIER_ANSWERS.labels(tier).inc()
+    _latency_ms[tier] += _LATENCY_SMOOTHING * (milliseconds - _latency_ms[tier])
+
+
+def choose_tier(
+    max_latency_ms: Optional[float] = None, accuracy: Optional[str] = None
+) -> str:
+    """
+    Choose the tier that answers a request.
+
+    Args:
+        max_latency_ms: Time the client can wait; tiers that typically take
+            longer are skipped, except the table, which always answers
+        accuracy: Tier whose precision the client needs
+
+    Returns:
+        str: ``accuracy`` if it fits the budget, otherwise the most precise
+        tier that does; ``simulation`` if neither is given
+    """
+    if max_latency_ms is None:
+        return accuracy or "simulation"
+    fitting = [tier for tier in TIERS if tier_latency_ms(tier) <= max_latency_ms]
+    if accuracy in fitting:
+        return accuracy
+    return fitting[-1] if fitting else TIERS[0]
+
+
+def _rank_counts(remaining_cards: Dict[str, int]) -> np.ndarray:
+    counts = np.zeros(len(tables.UPCARDS), dtype=np.int64)
+    for card, count in remaining_cards.items():
+        counts[_RANK_INDEX[card]] += count
+    return counts
+
+
+def _hand(player_cards: List[str]) -> Tuple[List[int], int, int]:
+    # Rank indices of the cards, the hand total and its soft aces
+    hand = [_RANK_INDEX[card] for card in player_cards]
+    total, soft_aces = 0, 0
+    for card in hand:
+        total, soft_aces = tables.add_card(total, soft_aces, card)
+    return hand, total, soft_aces
+
+
+def _is_pair(player_cards: List[str]) -> bool:
+    return len(player_cards) == 2 and player_cards[0] == player_cards[1]
+
+
+def _split_value(
+    card: int, probabilities: Sequence[float], stand: Sequence[float]
+) -> float:
+    # The engine plays one split hand: the card plus one more, then stands
+    return sum(
+        probability * stand[tables.add_card(*tables.add_card(0, 0, card), drawn)[0]]
+        for drawn, probability in enumerate(probabilities)
+    )
+
+
+def _exact_values(
+    player_cards: List[str], counts: np.ndarray, upcard: int
+) -> Dict[str, float]:
+    # The engine's dealer draws from the shoe as it stood before the
+    # player's draws, so one dealer distribution serves every line of play
+    stand = tables.stand_values(
+        tables.dealer_distribution(counts, upcard, _HITS_SOFT_17)
+    )
+    memo: Dict[Tuple[int, int, Tuple[int, ...]], float] = {}
+
+    def draws(shoe: List[int]):
+        cards_left = sum(shoe)
+        for card, count in enumerate(shoe):
+            if count:
+                shoe[card] -= 1
+                yield card, count / cards_left
+                shoe[card] += 1
+
+    def hit(total: int, soft_aces: int, shoe: List[int]) -> float:
+        if total >= 21 or not any(shoe):
+            return stand[total]
+        key = (total, soft_aces, tuple(shoe))
+        if key not in memo:
+            check_cancelled()
+            value = 0.0
+            for card, probability in draws(shoe):
+                new_total, new_soft = tables.add_card(total, soft_aces, card)
+                if new_total > 21:
+                    outcome = -1.0
+                elif total >= 17 or new_total == 21:
+                    outcome = stand[new_total]
+                else:
+                    outcome = hit(new_total, new_soft, shoe)
+                value += probability * outcome
+            memo[key] = value
+        return memo[key]
+
+    hand, total, soft_aces = _hand(player_cards)
+
+    shoe = counts.tolist()
+    double = 0.0
+    for card, probability in draws(shoe):
+        new_total, _ = tables.add_card(total, soft_aces, card)
+        double += 2 * probability * (-1.0 if new_total > 21 else stand[new_total])
+
+    values = {
+        "stand": stand[total],
+        "hit": hit(total, soft_aces, shoe),
+        "double": double,
+    }
+    if _is_pair(player_cards):
+        values["split"] = _split_value(hand[0], counts / counts.sum(), stand)
+    return {action: float(value) for action, value in values.items()}
+
+
+def _tabulated_values(
+    player_cards: List[str],
+    counts: np.ndarray,
+    upcard: int,
+    num_decks: int,
+    correct_for_removal: bool,
+) -> Dict[str, float]:
+    deck_index = min(
+        range(len(tables.DECK_COUNTS)),
+        key=lambda index: abs(tables.DECK_COUNTS[index] - num_decks),
+    )
+    table = tables.get_tables()
+    values = np.array(table["player_ev"][_DEALER_RULE, deck_index, upcard])
+    shoe = np.array(tables.full_shoe(tables.DECK_COUNTS[deck_index]))
+    shoe[upcard] -= 1
+    if correct_for_removal and counts.any():
+        # Cards gone from a full shoe of this size, besides the upcard
+        full = np.array(tables.full_shoe(max(num_decks, 1)))
+        full[upcard] -= 1
+        # A card moves the odds less the larger the shoe it leaves
+        scale = tables.DECK_COUNTS[deck_index] / max(num_decks, 1)
+        effects = table["removal_effects"][_DEALER_RULE, deck_index, upcard]
+        values += scale * effects @ (full - counts)
+        shoe = counts
+
+    hand, total, soft_aces = _hand(player_cards)
+
+    stand = values[:, 0, 0]
+    result = dict(zip(tables.PLAYER_ACTIONS, values[total, min(soft_aces, 1)]))
+    if _is_pair(player_cards):
+        result["split"] = _split_value(hand[0], shoe / shoe.sum(), stand)
+    return {action: float(value) for action, value in result.items()}
+
+
+def get_tiered_decision(
+    tier: str,
+    player_cards: List[str],
+    dealer_card: str,
+    seen_cards: List[str],
+    true_count: float = 0.0,
+    num_decks: int = 6,
+) -> Dict:
+    """
+    Get a decision recommendation from the ``table``, ``approximate`` or
+    ``exact`` tier.
+
+    Takes the arguments of :func:`get_decision_recommendation` and returns
+    its decision format, with the answering tier under ``"tier"``.
+
+    Raises:
+        ValueError: If ``tier`` is not one of these three tiers
+        ComputationCancelled: If the engine executor job computing an
+            ``exact`` answer was cancelled
+    """
+    if tier not in TIERS[:3]:
+        raise ValueError(f"Tier {tier!r} is answered by the decision engine")
+
+    start = time.perf_counter()
+    engine = BlackjackDecisionEngine(num_decks=num_decks)
+    actions = engine.available_actions(player_cards)
+    expected_values = {"stand": -1.0}
+    if actions:
+        counts = _rank_counts(engine.get_remaining_cards(seen_cards))
+        upcard = _RANK_INDEX[dealer_card]
+        if tier == "exact":
+            values = _exact_values(player_cards, counts, upcard)
+        else:
+            values = _tabulated_values(
+                player_cards, counts, upcard, num_decks, tier == "approximate"
+            )
+        # Cards of equal value but different rank do not split in the engine
+        values.setdefault("split", values["stand"])
+        expected_values = {
+            action: values[action] + count_adjustment(true_count) for action in actions
+        }
+
+    decision = engine.build_decision(
+        player_cards, dealer_card, seen_cards, true_count, expected_values
+    )
+    decision["tier"] = tier
+    record_tier_latency(tier, (time.perf_counter() - start) * 1000)
+    return decision
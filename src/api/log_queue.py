@@ -0,0 +1,116 @@
+"""
+Non-blocking, queued logging handlers.
+
+Logging calls made on the event loop only put the record on a bounded
+in-memory queue; a listener thread does the formatting and the actual I/O
+(console, rotating log files). When the queue is full, for example during
+an error storm, records are dropped and counted instead of stalling the
+request that tried to log. While the listener is stopped (after application
+shutdown), records are written synchronously so none are lost.
+
+Environment variables:
+    LOG_QUEUE_SIZE: Maximum number of records waiting to be written
+        (default: 10000)
+"""
+import atexit
+import copy
+import logging
+import logging.handlers
+import os
+import queue
+from typing import Iterable, Optional, Tuple
+
+from .metrics import LOG_RECORDS_DROPPED
+
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks the caller.
+
+    Only the message and its arguments are merged on the calling thread;
+    exception tracebacks are formatted later by the listener. Records that
+    do not fit in the queue are dropped and counted in the
+    ``log_records_dropped_total`` metric.
+
+    Args:
+        log_queue: Bounded queue shared with the listener
+        pipeline: Name used as the metric label
+        listener: Listener serving the queue; records are handed to it
+            directly while it is stopped
+    """
+
+    def __init__(
+        self,
+        log_queue: queue.Queue,
+        pipeline: str = "root",
+        listener: Optional["FlushingQueueListener"] = None,
+    ) -> None:
+        super().__init__(log_queue)
+        self.listener = listener
+        self._dropped = LOG_RECORDS_DROPPED.labels(pipeline)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.listener is not None and not self.listener.running:
+            self.listener.handle(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._dropped.inc()
+
+
+class FlushingQueueListener(logging.handlers.QueueListener):
+    """Queue listener that drains every queued record when stopped.
+
+    ``stop`` waits for room for the sentinel instead of failing on a full
+    queue. ``start`` and ``stop`` can safely be called more than once (on
+    application startup and shutdown, and again at interpreter exit).
+    """
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+    def start(self) -> None:
+        if self._thread is None:
+            super().start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+
+
+def queued_handlers(
+    handlers: Iterable[logging.Handler],
+    maxsize: int = LOG_QUEUE_SIZE,
+    pipeline: str = "root",
+) -> Tuple[NonBlockingQueueHandler, FlushingQueueListener]:
+    """
+    Put ``handlers`` behind a bounded queue served by a listener thread.
+
+    The listener is started immediately and stopped (flushing the queue) at
+    interpreter exit.
+
+    Args:
+        handlers: Handlers doing the actual output
+        maxsize: Maximum number of queued records
+        pipeline: Name used as the metric label for dropped records
+
+    Returns:
+        Tuple of the handler to attach to loggers and the running listener
+    """
+    log_queue: queue.Queue = queue.Queue(maxsize=maxsize)
+    listener = FlushingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return NonBlockingQueueHandler(log_queue, pipeline, listener), listener
@@ -4,17 +4,17 @@ Main FastAPI application for the Blackjack Card Counter API.
 This module creates and configures the FastAPI application with all routes,
 middleware, and exception handlers.
 """
+import asyncio
 import logging
 import logging.handlers
 import os
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 from fastapi import FastAPI, Request, status, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from fastapi_limiter import FastAPILimiter
 from fastapi_limiter.depends import RateLimiter
-import redis.asyncio as redis
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from fastapi_cache.decorator import cache
@@ -22,6 +22,16 @@ from fastapi_cache.decorator import cache
 # Import routes
 from .routes import router as api_router
 from .middleware.rate_limiter import rate_limit_middleware
+from .middleware.instrumentation import InstrumentationMiddleware
+from .middleware.gcra import GCRA_SCRIPT
+from .middleware.token_bucket import TOKEN_BUCKET_SCRIPT
+from .cache import FallbackBackend, InstrumentedBackend, StoreBackend
+from .redis_pool import close_redis_client, create_redis_client, warm_up
+from .result_store import ResultStore, store_version
+from .log_queue import queued_handlers
+from .responses import FastJSONResponse
+from .services.simulation_jobs import job_manager
+from .tables import get_tables
 
 # Configure logging
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -31,21 +41,24 @@ LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 # Create logs directory if it doesn't exist
 os.makedirs("logs", exist_ok=True)
 
+# Console and file output run on a listener thread behind a bounded queue,
+# so log calls on the event loop never wait for disk I/O or file rotation
+_log_formatter = logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT)
+_log_handlers = [
+    logging.StreamHandler(),
+    logging.handlers.RotatingFileHandler(
+        "logs/blackjack_api.log",
+        maxBytes=10 * 1024 * 1024,  # 10MB
+        backupCount=5,
+        encoding="utf-8",
+    ),
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue_handler, log_listener = queued_handlers(_log_handlers)
+
 # Configure root logger
-logging.basicConfig(
-    level=LOG_LEVEL,
-    format=LOG_FORMAT,
-    datefmt=LOG_DATE_FORMAT,
-    handlers=[
-        logging.StreamHandler(),
-        logging.handlers.RotatingFileHandler(
-            "logs/blackjack_api.log",
-            maxBytes=10 * 1024 * 1024,  # 10MB
-            backupCount=5,
-            encoding="utf-8",
-        ),
-    ],
-)
+logging.basicConfig(level=LOG_LEVEL, handlers=[_log_queue_handler])
 
 # Configure specific loggers
 logging.getLogger("uvicorn").setLevel(logging.WARNING)
@@ -77,6 +90,7 @@ async def create_app(testing: bool = False) -> FastAPI:
         docs_url="/api/docs",
         redoc_url="/api/redoc",
         openapi_url="/api/openapi.json",
+        default_response_class=FastJSONResponse,
     )
 
     # Configure CORS
@@ -91,23 +105,48 @@ async def create_app(testing: bool = False) -> FastAPI:
     # Add rate limiting middleware
     app.middleware("http")(rate_limit_middleware)
 
+    # Record per-route latency (outermost, so rate-limited requests are timed too)
+    app.add_middleware(InstrumentationMiddleware)
+
     # Skip Redis initialization in test mode
+    app.state.redis = None
     if not testing:
+        # Cached responses kept on local disk, filed under the API version;
+        # they outlive restarts and serve while Redis is unavailable
+        response_store = StoreBackend(
+            ResultStore("responses", store_version(app.version))
+        )
+        redis_connection = None
         try:
-            # Initialize Redis connection for rate limiting and caching
-            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-            redis_connection = redis.from_url(
-                redis_url, encoding="utf-8", decode_responses=True
-            )
+            # One pooled client shared by rate limiting and caching
+            redis_connection = create_redis_client()
 
             # Initialize FastAPILimiter for rate limiting
             await FastAPILimiter.init(redis_connection)
 
-            # Initialize FastAPI Cache with Redis backend
-            FastAPICache.init(RedisBackend(redis_connection), prefix="fastapi-cache")
+            # Initialize FastAPI Cache with Redis backend, served from disk
+            # while Redis is slow or unreachable
+            FastAPICache.init(
+                InstrumentedBackend(
+                    FallbackBackend(
+                        RedisBackend(redis_connection), fallback=response_store
+                    )
+                ),
+                prefix="fastapi-cache",
+            )
+            app.state.redis = redis_connection
         except Exception as e:
+            # FastAPILimiter keeps the client even when its init fails; drop
+            # it so the rate limiter is really off, and release the pool
+            FastAPILimiter.redis = None
+            if redis_connection is not None:
+                await close_redis_client(redis_connection)
             logger.warning(
-                f"Failed to initialize Redis: {e}. Running without rate limiting and caching."
+                f"Failed to initialize Redis: {e}. Running without rate limiting; "
+                "caching on local disk."
+            )
+            FastAPICache.init(
+                InstrumentedBackend(response_store), prefix="fastapi-cache"
             )
 
     # Include API routes
@@ -116,21 +155,35 @@ async def create_app(testing: bool = False) -> FastAPI:
     # Add startup and shutdown event handlers
     @app.on_event("startup")
     async def startup():
+        # Restart the log listener if a previous app instance stopped it
+        log_listener.start()
         logger.info("Starting up application...")
-        # Verify Redis connection
-        if not testing:
+        # Map the shared probability tables (or build them if the parent
+        # process did not preload them) before the first request needs them
+        get_tables()
+        # Open pooled connections and load the limiter scripts ahead of
+        # traffic; if Redis is down, the limiter and cache run locally
+        if app.state.redis is not None:
             try:
-                await redis.ping()
-                logger.info("Successfully connected to Redis")
+                connections = await warm_up(
+                    app.state.redis, scripts=[TOKEN_BUCKET_SCRIPT, GCRA_SCRIPT]
+                )
+                logger.info(f"Connected to Redis ({connections} connections warmed)")
             except Exception as e:
-                logger.error(f"Failed to connect to Redis: {e}")
-                raise
+                logger.warning(
+                    f"Failed to connect to Redis: {e}. Falling back to local "
+                    "rate limiting and in-memory caching until it recovers."
+                )
 
     @app.on_event("shutdown")
     async def shutdown():
         logger.info("Shutting down application...")
-        if not testing:
-            await redis.close()
+        if app.state.redis is not None:
+            await close_redis_client(app.state.redis)
+        # Stop simulation jobs; finished results stay on disk until they expire
+        job_manager.shutdown()
+        # Write out everything still queued; later records are written directly
+        log_listener.stop()
 
     # Add exception handlers
     @app.exception_handler(RequestValidationError)
@@ -166,8 +219,47 @@ async def create_app(testing: bool = False) -> FastAPI:
     return app
 
 
-# Create the application instance
-app = create_app()
+class LazyApplication:
+    """
+    ASGI entry point that builds the application on first use.
+
+    ``create_app`` is a coroutine because it connects to Redis, and those
+    connections belong to the event loop that opens them. Building the app
+    at import time would tie them to the wrong loop, or to the server's
+    parent process when workers are forked. This wrapper defers
+    ``create_app`` to the first ASGI event (the lifespan startup), which
+    runs inside the worker's own loop.
+
+    Awaiting the wrapper builds the app and returns it, so callers that
+    used to await ``main.app`` keep working.
+
+    Args:
+        factory: Coroutine function returning the application
+    """
+
+    def __init__(self, factory: Callable[[], Awaitable[FastAPI]]) -> None:
+        self.factory = factory
+        self._app: Optional[FastAPI] = None
+        self._lock = asyncio.Lock()
+
+    async def build(self) -> FastAPI:
+        """Return the application, creating it on the first call."""
+        if self._app is None:
+            async with self._lock:
+                if self._app is None:
+                    self._app = await self.factory()
+        return self._app
+
+    def __await__(self):
+        return self.build().__await__()
+
+    async def __call__(self, scope, receive, send) -> None:
+        app = self._app if self._app is not None else await self.build()
+        await app(scope, receive, send)
+
+
+# The application served by ``start.py`` and ``uvicorn src.api.main:app``
+app = LazyApplication(create_app)
 
 if __name__ == "__main__":
     import uvicorn
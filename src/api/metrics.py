@@ -0,0 +1,442 @@
+"""
+Prometheus-style metrics for the Blackjack Card Counter API.
+
+This module provides minimal, dependency-free counters, gauges and
+histograms together with a registry that renders them in the Prometheus
+text exposition format. The hot-path operations (``inc``, ``set``,
+``observe``) are plain dictionary and list updates so that instrumenting a
+request costs a few microseconds.
+"""
+import bisect
+import math
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default latency buckets in seconds (0.5 ms up to 30 s)
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """Base class for metrics with an optional set of labels.
+
+    Label values are bound with ``labels(...)``, which returns a cached child
+    series; metrics without labels can be updated directly.
+    """
+
+    metric_type = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, "_Child"] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self) -> "_Child":
+        raise NotImplementedError
+
+    def labels(self, *labelvalues: str) -> "_Child":
+        """Return the series for the given label values, creating it if needed."""
+        child = self._children.get(labelvalues)
+        if child is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} expects labels {self.labelnames}, got {labelvalues}"
+                )
+            with self._lock:
+                child = self._children.setdefault(
+                    tuple(str(v) for v in labelvalues), self._new_child()
+                )
+            self._children[labelvalues] = child
+        return child
+
+    def _series(self) -> List[Tuple[LabelValues, "_Child"]]:
+        seen = set()
+        series = []
+        for key, child in sorted(self._children.items(), key=lambda kv: kv[0]):
+            if id(child) not in seen:
+                seen.add(id(child))
+                series.append((tuple(str(v) for v in key), child))
+        return series
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class _Child:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+
+class _CounterChild(_Child):
+    __slots__ = ()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_Child):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class _HistogramChild(_Child):
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        super().__init__()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment an unlabelled counter."""
+        self.labels().inc(amount)
+
+    def samples(self):
+        return [
+            ("_total", _format_labels(self.labelnames, key), child.value)
+            for key, child in self._series()
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    metric_type = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def samples(self):
+        return [
+            ("", _format_labels(self.labelnames, key), child.value)
+            for key, child in self._series()
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record an observation on an unlabelled histogram."""
+        self.labels().observe(value)
+
+    def samples(self):
+        result = []
+        bucket_labelnames = self.labelnames + ("le",)
+        for key, child in self._series():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                result.append(
+                    (
+                        "_bucket",
+                        _format_labels(
+                            bucket_labelnames, key + (_format_value(bound),)
+                        ),
+                        cumulative,
+                    )
+                )
+            labels = _format_labels(self.labelnames, key)
+            result.append(("_count", labels, cumulative))
+            result.append(("_sum", labels, child.sum))
+        return result
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# HTTP layer
+REQUEST_LATENCY = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route.",
+        ("method", "route", "status"),
+    )
+)
+RATE_LIMIT_REJECTIONS = REGISTRY.register(
+    Counter(
+        "rate_limit_rejections",
+        "Requests rejected by the rate limiter.",
+        ("limit_type",),
+    )
+)
+
+# Logging
+LOG_RECORDS_DROPPED = REGISTRY.register(
+    Counter(
+        "log_records_dropped",
+        "Log records dropped because the log queue was full.",
+        ("pipeline",),
+    )
+)
+
+# Caching
+CACHE_REQUESTS = REGISTRY.register(
+    Counter(
+        "cache_requests",
+        "Cache lookups by namespace and result (hit or miss).",
+        ("namespace", "result"),
+    )
+)
+COALESCED_REQUESTS = REGISTRY.register(
+    Counter(
+        "coalesced_requests",
+        "Requests answered by sharing an identical computation in flight.",
+        ("namespace",),
+    )
+)
+CACHE_EARLY_REFRESHES = REGISTRY.register(
+    Counter(
+        "cache_early_refreshes",
+        "Cache entries recomputed before expiry to avoid a stampede.",
+        ("namespace",),
+    )
+)
+
+# Decision engine
+ENGINE_SIMULATIONS = REGISTRY.register(
+    Counter(
+        "engine_simulations",
+        "Monte Carlo action simulations run by the decision engine.",
+        ("action",),
+    )
+)
+ENGINE_SIMULATION_ROUNDS = REGISTRY.register(
+    Counter(
+        "engine_simulation_rounds",
+        "Simulated rounds played by the decision engine.",
+    )
+)
+ENGINE_SIMULATION_DURATION = REGISTRY.register(
+    Histogram(
+        "engine_simulation_duration_seconds",
+        "Duration of a single action simulation.",
+        ("action",),
+    )
+)
+DECISION_TIER_ANSWERS = REGISTRY.register(
+    Counter(
+        "decision_tier_answers",
+        "Strategy decisions by the tier that answered them.",
+        ("tier",),
+    )
+)
+ENGINE_BATCH_SIZES = REGISTRY.register(
+    Histogram(
+        "engine_batch_size",
+        "Requests evaluated together in one micro-batch.",
+        buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+    )
+)
+EXECUTOR_QUEUE_DEPTH = REGISTRY.register(
+    Gauge(
+        "engine_executor_queue_depth",
+        "Engine jobs waiting for a free executor worker.",
+    )
+)
+EXECUTOR_QUEUE_WAIT = REGISTRY.register(
+    Histogram(
+        "engine_executor_queue_wait_seconds",
+        "Time engine jobs waited for a free executor worker.",
+    )
+)
+EXECUTOR_IN_FLIGHT = REGISTRY.register(
+    Gauge(
+        "engine_executor_in_flight",
+        "Engine jobs currently running on an executor worker.",
+    )
+)
+
+# Admission control
+ENGINE_ADMITTED = REGISTRY.register(
+    Gauge(
+        "engine_admitted_requests",
+        "Requests admitted to the decision engine and not yet answered.",
+    )
+)
+ENGINE_REQUESTS_DEGRADED = REGISTRY.register(
+    Counter(
+        "engine_requests_degraded",
+        "Requests answered from the tables because the engine was overloaded.",
+        ("route",),
+    )
+)
+ENGINE_REQUESTS_SHED = REGISTRY.register(
+    Counter(
+        "engine_requests_shed",
+        "Requests rejected with 503 because the engine was overloaded.",
+        ("route",),
+    )
+)
+
+# Cancellation
+ENGINE_REQUESTS_ABANDONED = REGISTRY.register(
+    Counter(
+        "engine_requests_abandoned",
+        "Engine requests cancelled before their answer was ready.",
+        ("route", "reason"),
+    )
+)
+
+# Simulation jobs
+SIMULATION_JOBS_ACTIVE = REGISTRY.register(
+    Gauge(
+        "simulation_jobs_active",
+        "Background simulation jobs queued or running.",
+    )
+)
+SIMULATION_JOBS_FINISHED = REGISTRY.register(
+    Counter(
+        "simulation_jobs_finished",
+        "Background simulation jobs finished, by final status.",
+        ("status",),
+    )
+)
+
+# Result store
+RESULT_STORE_WRITES_DROPPED = REGISTRY.register(
+    Counter(
+        "result_store_writes_dropped",
+        "Results not persisted because the store's write queue was full.",
+        ("store",),
+    )
+)
+RESULT_STORE_ROWS_COMPACTED = REGISTRY.register(
+    Counter(
+        "result_store_rows_compacted",
+        "Expired results removed from the store's file.",
+        ("store",),
+    )
+)
@@ -2,6 +2,9 @@
 Error handling middleware and utilities for the Blackjack API.
 """
 import logging
+import time
+import traceback
+import uuid
 from typing import Any, Dict, Optional, List, Union, Tuple
 
 from fastapi import Request, status, HTTPException
@@ -0,0 +1,152 @@
+"""
+Exact rate limiting with the generic cell rate algorithm (GCRA).
+
+GCRA stores a single "theoretical arrival time" (TAT) per key. A request
+is allowed if, after adding its emission interval to the TAT, the TAT is
+no more than one period ahead of the current time. This is equivalent to a
+sliding window of ``limit`` requests per ``period`` without storing a log
+of timestamps, and every check is one atomic Redis script call, so
+concurrent requests from several processes cannot overshoot the limit.
+
+Denied keys are cached locally until their retry time, so clients that
+keep hammering an exhausted limit cost no further Redis calls.
+"""
+import logging
+import time
+from typing import Any, Tuple
+
+from .token_bucket import DenyCache, LocalTokenBuckets, RateLimitDecision
+
+logger = logging.getLogger(__name__)
+
+# Seconds to stay on local buckets after a Redis error
+REDIS_RETRY_INTERVAL = 5.0
+
+# KEYS[1]: TAT key
+# ARGV: now (ms), emission interval (ms), period (ms), cost,
+#       force (1 to record the cost even if it exceeds the limit)
+# Returns {allowed (0/1), retry after (ms), TAT - now (ms)}; the times are
+# strings because Lua numbers are truncated to integers in the reply
+GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local period = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local force = tonumber(ARGV[5])
+
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if tat == nil or tat < now then
+    tat = now
+end
+
+local new_tat = tat + interval * cost
+local allow_at = new_tat - period
+if allow_at > now and force ~= 1 then
+    return {0, tostring(allow_at - now), tostring(tat - now)}
+end
+
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil(new_tat - now))
+return {1, '0', tostring(new_tat - now)}
+"""
+
+
+class GCRALimiter:
+    """
+    Redis-backed GCRA limiter, one script call per admitted request.
+
+    Args:
+        redis: Async Redis client (``redis.asyncio`` compatible)
+    """
+
+    def __init__(self, redis: Any) -> None:
+        self.redis = redis
+        self._fallback = LocalTokenBuckets()
+        self._denied = DenyCache()
+        self._redis_down_until = 0.0
+        self._script = redis.register_script(GCRA_SCRIPT)
+
+    async def acquire(
+        self, key: str, limit: int, period: float = 60.0, cost: float = 1.0
+    ) -> RateLimitDecision:
+        """
+        Admit the request for ``key`` if it fits in the sliding window.
+
+        Args:
+            key: Rate-limit key
+            limit: Requests allowed per ``period``
+            period: Window length in seconds
+            cost: Number of requests this one counts as
+
+        Returns:
+            RateLimitDecision: Whether the request is allowed
+        """
+        now = time.monotonic()
+        if now < self._redis_down_until:
+            return self._fallback.acquire(key, limit, period, cost)
+
+        denied_for = self._denied.retry_after(key, now)
+        if denied_for:
+            return RateLimitDecision(
+                allowed=False, limit=limit, remaining=0.0, retry_after=denied_for
+            )
+
+        try:
+            allowed, retry_ms, ahead_ms = await self._run(key, limit, period, cost)
+        except Exception as e:
+            self._redis_failed(now, e)
+            return self._fallback.acquire(key, limit, period, cost)
+
+        ahead = float(ahead_ms) / 1000.0
+        if int(allowed):
+            return RateLimitDecision(
+                allowed=True,
+                limit=limit,
+                remaining=max(0.0, (period - ahead) * limit / period),
+                reset_after=ahead,
+            )
+        retry_after = float(retry_ms) / 1000.0
+        self._denied.deny(key, now, retry_after)
+        return RateLimitDecision(
+            allowed=False,
+            limit=limit,
+            remaining=0.0,
+            retry_after=retry_after,
+            reset_after=ahead,
+        )
+
+    async def charge(self, key: str, limit: int, period: float, cost: float) -> None:
+        """
+        Bill ``cost`` requests' worth of work to ``key`` after the fact.
+
+        The charge always moves the key's arrival time forward, even past
+        the limit, so later requests wait until the work is paid off.
+        """
+        now = time.monotonic()
+        if now < self._redis_down_until:
+            self._fallback.charge(key, limit, period, cost)
+            return
+        try:
+            await self._run(key, limit, period, cost, force=True)
+        except Exception as e:
+            self._redis_failed(now, e)
+            self._fallback.charge(key, limit, period, cost)
+
+    async def _run(
+        self, key: str, limit: int, period: float, cost: float, force: bool = False
+    ) -> Tuple[Any, str, str]:
+        return await self._script(
+            keys=[f"{key}:gcra"],
+            args=[
+                time.time() * 1000.0,
+                period * 1000.0 / limit,
+                period * 1000.0,
+                cost,
+                int(force),
+            ],
+        )
+
+    def _redis_failed(self, now: float, error: Exception) -> None:
+        logger.warning(
+            f"Rate limiter falling back to local buckets: Redis error: {error}"
+        )
+        self._redis_down_until = now + REDIS_RETRY_INTERVAL
@@ -2,17 +2,35 @@
 Rate limiting middleware for the Blackjack Card Counter API.
 
 This module provides rate limiting functionality to prevent abuse of the API
-and ensure fair usage for all clients.
+and ensure fair usage for all clients. Two algorithms are available,
+selected with the ``RATE_LIMIT_ALGORITHM`` environment variable:
+
+- ``token_bucket`` (default): token buckets served from local leases and
+  reconciled with Redis in batches (see ``token_bucket``)
+- ``gcra``: exact sliding-window limiting with one atomic Redis script per
+  request (see ``gcra``)
+
+Limits are cost weighted: a request is admitted for the price of the
+cheapest possible answer, and the compute it actually consumed (cache hit
+or miss, simulated engine rounds, see ``request_cost``) is charged to the
+client's bucket once the response is ready.
 """
+import math
+import os
 import time
 import json
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
 from fastapi_limiter import FastAPILimiter
 from fastapi_limiter.depends import RateLimiter
-from typing import Callable, Awaitable, Dict, Any
+from typing import Callable, Awaitable, Dict, Any, Optional
 import logging
 
+from ..metrics import RATE_LIMIT_REJECTIONS
+from ..request_cost import CACHE_HIT_COST, start_request_cost
+from .gcra import GCRALimiter
+from .token_bucket import TokenBucketLimiter
+
 logger = logging.getLogger(__name__)
 
 # Rate limit configuration (requests per minute)
@@ -22,14 +40,49 @@ RATE_LIMITS = {
     "intensive": 10,  # 10 requests per minute for resource-intensive operations
 }
 
+# Seconds for an empty bucket to refill completely (or sliding window length)
+RATE_LIMIT_PERIOD = 60
+
+# Limiter implementation: "token_bucket" or "gcra"
+RATE_LIMIT_ALGORITHMS = {"token_bucket": TokenBucketLimiter, "gcra": GCRALimiter}
+RATE_LIMIT_ALGORITHM = os.getenv("RATE_LIMIT_ALGORITHM", "token_bucket")
+
 # Path-based rate limiting rules
 PATH_RATE_LIMITS = {
     "/api/strategy/recommend": "strategy",
     "/api/strategy/basic-strategy": "strategy",
     "/api/strategy/counting-system": "strategy",
     "/api/bankroll/calculate": "intensive",
+    "/strategy": "strategy",
 }
 
+# Tokens taken to admit a request; the rest of its cost is charged afterwards
+ADMISSION_COST = CACHE_HIT_COST
+
+
+_limiter: Optional[Any] = None
+
+
+def get_limiter(redis: Any) -> Any:
+    """
+    Return the configured limiter bound to ``redis``.
+
+    The limiter keeps local state (leases, denied clients), so it is shared
+    across requests and only recreated when the Redis client changes.
+
+    Raises:
+        ValueError: If ``RATE_LIMIT_ALGORITHM`` is not a known algorithm
+    """
+    global _limiter
+    if _limiter is None or _limiter.redis is not redis:
+        if RATE_LIMIT_ALGORITHM not in RATE_LIMIT_ALGORITHMS:
+            raise ValueError(
+                f"Unknown RATE_LIMIT_ALGORITHM {RATE_LIMIT_ALGORITHM!r}. Must be one "
+                f"of: {', '.join(RATE_LIMIT_ALGORITHMS)}"
+            )
+        _limiter = RATE_LIMIT_ALGORITHMS[RATE_LIMIT_ALGORITHM](redis)
+    return _limiter
+
 
 async def get_rate_limit_key(request: Request) -> str:
     """
@@ -73,7 +126,13 @@ async def rate_limit_middleware(
         HTTPException: 429 if rate limit is exceeded
     """
     # Skip rate limiting for certain paths (e.g., health checks)
-    if request.url.path in ["/api/health", "/docs", "/redoc", "/openapi.json"]:
+    if request.url.path in [
+        "/api/health",
+        "/docs",
+        "/redoc",
+        "/openapi.json",
+        "/metrics",
+    ]:
         return await call_next(request)
 
     # Skip rate limiting in test mode or if Redis is not initialized
@@ -88,22 +147,25 @@ async def rate_limit_middleware(
     # Generate a unique key for this client and endpoint
     key = await get_rate_limit_key(request)
 
-    # Check if we've exceeded the rate limit
-    current = await redis.get(key)
+    limiter = get_limiter(redis)
+    decision = await limiter.acquire(
+        key, rate_limit, RATE_LIMIT_PERIOD, cost=ADMISSION_COST
+    )
+    now = time.time()
 
-    if current and int(current) >= rate_limit:
-        # Calculate retry-after time (in seconds)
-        retry_after = 60 - int(time.time() % 60)
+    if not decision.allowed:
+        retry_after = max(1, math.ceil(decision.retry_after))
 
         # Set rate limit headers
         headers = {
             "Retry-After": str(retry_after),
             "X-RateLimit-Limit": str(rate_limit),
             "X-RateLimit-Remaining": "0",
-            "X-RateLimit-Reset": str(int(time.time()) + retry_after),
+            "X-RateLimit-Reset": str(int(now) + retry_after),
         }
 
         logger.warning(f"Rate limit exceeded for {key}")
+        RATE_LIMIT_REJECTIONS.labels(rate_limit_type).inc()
 
         return JSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -114,20 +176,22 @@ async def rate_limit_middleware(
             headers=headers,
         )
 
-    # Increment the request count
-    pipeline = redis.pipeline()
-    pipeline.incr(key)
-    pipeline.expire(key, 60)  # Reset counter after 60 seconds
-    await pipeline.execute()
-
-    # Add rate limit headers to the response
-    remaining = max(0, rate_limit - (int(current or 0) + 1))
+    cost = start_request_cost()
     response = await call_next(request)
 
+    # Charge the compute the request actually consumed
+    extra_cost = cost.total - ADMISSION_COST
+    if extra_cost > 0:
+        await limiter.charge(key, rate_limit, RATE_LIMIT_PERIOD, extra_cost)
+
+    # Add rate limit headers to the response
     response.headers["X-RateLimit-Limit"] = str(rate_limit)
-    response.headers["X-RateLimit-Remaining"] = str(remaining)
+    response.headers["X-RateLimit-Remaining"] = str(
+        max(0, int(decision.remaining - max(0.0, extra_cost)))
+    )
+    response.headers["X-RateLimit-Cost"] = f"{cost.total:g}"
     response.headers["X-RateLimit-Reset"] = str(
-        int(time.time()) + 60 - int(time.time() % 60)
+        int(now + math.ceil(decision.reset_after))
     )
 
     return response
@@ -3,6 +3,7 @@ Request-related utility functions.
 
 This module contains utility functions for working with HTTP requests.
 """
+import uuid
 from datetime import datetime
 from typing import Dict, Any, Optional
 from fastapi import Request
@@ -7,9 +7,22 @@ It ensures that incoming requests contain valid data before they reach the route
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict, List, Optional, Type, TypeVar, cast
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+)
 from fastapi import Request, HTTPException, status
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from pydantic import (
     BaseModel,
     field_validator,
@@ -18,19 +31,34 @@ from pydantic import (
     ValidationError,
 )
 
+from ..negotiation import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPES,
+    decode_body,
+)
+
 # Import validation utilities
+from ..utils.card_utils import normalize_cards
 from ..utils.validation import (
-    validate_card,
     validate_decks,
     validate_counting_system,
     validate_penetration,
-    # validate_true_count,
+    validate_true_count,
     validate_bet_limits,
     VALID_CARDS,
     VALID_COUNTING_SYSTEMS,
     # VALID_DEALER_ACTIONS
 )
 
+logger = logging.getLogger(__name__)
+
+# Requests whose JSON body is parsed and validated by the middleware
+BODY_METHODS = frozenset({"POST", "PUT", "PATCH"})
+
+# Path prefixes that are never validated (static files and docs)
+SKIP_PATHS = ("/static", "/docs", "/redoc", "/openapi.json", "/api/docs", "/api/redoc")
+
 # Type variable for generic type hints
 T = TypeVar("T", bound="BaseModel")
 
@@ -54,7 +82,7 @@ class BlackjackRequest(BaseModel):
         """Validate each card in the list."""
         if not isinstance(cards, list):
             raise ValueError("Cards must be a list")
-        return [validate_card(card) for card in cards]
+        return normalize_cards(cards)
 
     @field_validator("dealer_card")
     @classmethod
@@ -62,7 +90,7 @@ class BlackjackRequest(BaseModel):
         """Validate the dealer's up card."""
         if v is None:
             return None
-        return validate_card(v)
+        return normalize_cards([v])[0]
 
     @field_validator("decks")
     @classmethod
@@ -178,85 +206,162 @@ def validate_request_data(data: Dict[str, Any]) -> Dict[str, Any]:
         )
 
 
-async def request_validation_middleware(
-    request: Request, call_next: Callable[[Request], Awaitable[Any]]
-) -> Any:
+def _json_error(status_code: int, content: Dict[str, Any]) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content=content)
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+
+def _content_type(scope: Scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"content-type":
+            return value.decode("latin-1")
+    return None
+
+
+def _is_parsed_here(content_type: Optional[str]) -> bool:
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    return media_type == JSON_MEDIA_TYPE or media_type in MSGPACK_MEDIA_TYPES
+
+
+class RequestValidationMiddleware:
     """
-    Middleware to validate incoming requests.
+    ASGI middleware that parses and validates request bodies once.
 
-    This middleware validates both POST and GET requests, normalizes the data,
-    and attaches the validated data to the request state for use in route handlers.
+    The body of a JSON or MessagePack POST, PUT or PATCH request is read and
+    decoded here and stored in the request state as ``parsed_body``. Route
+    handlers read it back through :func:`validated_body`, which validates it
+    once against the route's own model, instead of decoding the body again.
+    GET requests and static or docs paths pass straight through.
+
+    It is implemented as a plain ASGI middleware so the body can be handed
+    downstream through its own ``receive`` rather than by patching the
+    request object.
+    """
+
+    def __init__(self, app: ASGIApp, skip_paths: Tuple[str, ...] = SKIP_PATHS) -> None:
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in BODY_METHODS
+            or scope["path"].startswith(self.skip_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+        content_type = _content_type(scope)
+        if not _is_parsed_here(content_type):
+            await self.app(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        response = None
+        try:
+            json_data = decode_body(content_type, body) if body else {}
+            if not isinstance(json_data, dict):
+                raise ValueError("Request body must be an object")
+        except HTTPException as e:
+            response = _json_error(e.status_code, {"detail": e.detail})
+        except ValueError as e:
+            response = _json_error(
+                status.HTTP_400_BAD_REQUEST,
+                {"message": "Invalid request body", "detail": str(e)},
+            )
+
+        if response is not None:
+            await response(scope, receive, send)
+            return
+
+        # Request.state is backed by scope["state"]
+        state = scope.setdefault("state", {})
+        state["parsed_body"] = json_data
+
+        # Hand the body we consumed to the next app once, then fall through
+        # to the server's receive (e.g. for http.disconnect)
+        body_sent = False
+
+        async def replay() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        await self.app(scope, replay, send)
+
+
+def validated_body(model: Type[T]) -> Callable[[Request], Awaitable[T]]:
+    """
+    Build a dependency that returns the request body as ``model``.
+
+    The body decoded by :class:`RequestValidationMiddleware` is reused when
+    present, so the request is not decoded a second time; without the
+    middleware the body is read and decoded here. JSON and MessagePack
+    bodies are accepted (see ``negotiation.decode_body``).
 
     Args:
-        request: The incoming FastAPI request
-        call_next: Callable to pass the request to the next middleware or route handler
+        model: Pydantic model for the request body
 
     Returns:
-        Response: The response from the next middleware or route handler
+        Callable: FastAPI dependency resolving to a ``model`` instance
 
     Raises:
-        HTTPException: If request validation fails with status code 400 or 422
-    """
-    # Skip validation for static files and docs
-    if any(
-        request.url.path.startswith(p)
-        for p in ("/static", "/docs", "/redoc", "/openapi.json")
-    ):
-        return await call_next(request)
+        RequestValidationError: If the body does not match ``model``
 
-    try:
-        request_data = {}
+    Example:
+        >>> @app.post("/analyze", openapi_extra=body_openapi(CardInput))
+        ... async def analyze(data: CardInput = Depends(validated_body(CardInput))):
+        ...     ...
+    """
 
-        # For POST requests, validate the JSON body
-        if request.method == "POST":
+    async def dependency(request: Request) -> T:
+        data = getattr(request.state, "parsed_body", None)
+        if data is None:
             try:
-                json_data = await request.json()
-                if not isinstance(json_data, dict):
-                    raise ValueError("Request body must be a JSON object")
-                request_data.update(json_data)
+                data = decode_body(
+                    request.headers.get("content-type"), await request.body()
+                )
             except ValueError as e:
-                return JSONResponse(
+                raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    content={"message": "Invalid request body", "detail": str(e)},
+                    detail=f"Invalid request body: {e}",
                 )
+        try:
+            return model.model_validate(data)
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+            )
 
-        # For GET requests, use query parameters
-        elif request.method == "GET":
-            request_data.update(dict(request.query_params))
+    return dependency
 
-        # Validate and normalize the request data
-        if request_data:
-            try:
-                validated_data = validate_request_data(request_data)
-                # Store validated data in request state for use in route handlers
-                request.state.validated_data = validated_data
-            except HTTPException as e:
-                # Re-raise the exception to be handled by FastAPI's exception handlers
-                return JSONResponse(
-                    status_code=e.status_code,
-                    content=e.detail
-                    if isinstance(e.detail, dict)
-                    else {"detail": str(e.detail)},
-                )
 
-        return await call_next(request)
+def body_openapi(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Return ``openapi_extra`` documenting ``model`` as the request body.
 
-    except HTTPException as e:
-        # Handle HTTP exceptions with proper error formatting
-        return JSONResponse(
-            status_code=e.status_code,
-            content={
-                "message": "Validation error",
-                "detail": str(e.detail) if hasattr(e, "detail") else str(e),
-            },
-        )
-    except Exception as e:
-        # Log unexpected errors
-        logger.error(f"Unexpected error in request validation: {str(e)}", exc_info=True)
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={
-                "message": "Internal server error",
-                "detail": "An unexpected error occurred while processing your request",
+    Routes that take their body through :func:`validated_body` have no body
+    parameter, so FastAPI cannot derive the schema on its own.
+    """
+    schema = model.model_json_schema()
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                media_type: {"schema": schema}
+                for media_type in (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE)
             },
-        )
+        }
+    }
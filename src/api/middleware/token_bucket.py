@@ -0,0 +1,368 @@
+"""
+Token-bucket rate limiting with local leases and Redis reconciliation.
+
+Each rate-limit key (see ``get_rate_limit_key``) owns a token bucket holding
+up to ``limit`` tokens that refills continuously at ``limit / period``
+tokens per second, so there is no fixed window whose boundary allows a
+double burst.
+
+The authoritative bucket lives in Redis and is updated by a single Lua
+script, which makes the take-and-refill step atomic across processes. To
+keep Redis off the fast path, each process leases a small batch of tokens
+at a time and serves requests from its local lease; Redis is only called
+when the lease runs out. If Redis fails, the limiter falls back to purely
+local buckets until it recovers.
+
+Clients that are over the limit are remembered in a local ``DenyCache``
+until their retry time, so rejecting them again costs no Redis call.
+
+Besides ``acquire``, which admits or rejects a request, every limiter has a
+``charge`` method that bills work measured after the fact (see
+``request_cost``). Charges are always applied and may drive a bucket into
+debt, which delays the client's next requests accordingly.
+"""
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fraction of a bucket's capacity leased from Redis at a time
+LEASE_FRACTION = 0.1
+
+# Seconds a lease may be used before its remaining tokens are handed back
+LEASE_TTL = 1.0
+
+# Maximum number of keys tracked locally before idle entries are evicted
+MAX_TRACKED_KEYS = 100_000
+
+# Seconds to stay on local buckets after a Redis error
+REDIS_RETRY_INTERVAL = 5.0
+
+# KEYS[1]: bucket key
+# ARGV: capacity, refill rate (tokens/s), now (s), requested tokens,
+#       force (1 to take the tokens even if that leaves the bucket in debt),
+#       returned tokens (left unused in an expired lease)
+# Returns {granted, tokens left in the bucket} as strings (Lua numbers
+# would be truncated to integers in the reply)
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local requested = tonumber(ARGV[4])
+local force = tonumber(ARGV[5])
+local returned = tonumber(ARGV[6]) or 0
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate + returned)
+
+local granted = 0
+if force == 1 then
+    granted = requested
+elseif tokens > 0 then
+    granted = math.min(requested, tokens)
+end
+tokens = tokens - granted
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {tostring(granted), tostring(tokens)}
+"""
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of a rate-limit check."""
+
+    allowed: bool
+    limit: int
+    remaining: float
+    retry_after: float = 0.0
+    reset_after: float = 0.0
+
+
+class TokenBucket:
+    """In-process token bucket.
+
+    Args:
+        capacity: Maximum number of tokens (burst size)
+        rate: Tokens added per second
+    """
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float) -> None:
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+    def take(self, cost: float = 1.0, now: Optional[float] = None) -> bool:
+        """Take ``cost`` tokens if available."""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def charge(self, cost: float, now: Optional[float] = None) -> None:
+        """Take ``cost`` tokens unconditionally, possibly going into debt."""
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens -= cost
+
+    def retry_after(self, cost: float = 1.0) -> float:
+        """Seconds until ``cost`` tokens will be available."""
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+    def reset_after(self) -> float:
+        """Seconds until the bucket is full again."""
+        return max(0.0, (self.capacity - self.tokens) / self.rate)
+
+
+class DenyCache:
+    """Local record of keys that are over their limit, and until when."""
+
+    def __init__(self) -> None:
+        self._until: Dict[str, float] = {}
+
+    def retry_after(self, key: str, now: float) -> float:
+        """Seconds ``key`` remains denied, or 0 if it is not cached."""
+        until = self._until.get(key)
+        if until is None:
+            return 0.0
+        if until <= now:
+            del self._until[key]
+            return 0.0
+        return until - now
+
+    def deny(self, key: str, now: float, retry_after: float) -> None:
+        """Remember that ``key`` is denied for ``retry_after`` seconds."""
+        _evict(self._until, lambda until: until <= now)
+        self._until[key] = now + retry_after
+
+
+def _evict(entries: Dict[str, Any], is_idle) -> None:
+    """Keep ``entries`` bounded by dropping idle, then oldest, entries."""
+    if len(entries) <= MAX_TRACKED_KEYS:
+        return
+    for key in [k for k, v in entries.items() if is_idle(v)]:
+        del entries[key]
+    while len(entries) > MAX_TRACKED_KEYS:
+        del entries[next(iter(entries))]
+
+
+class LocalTokenBuckets:
+    """Token buckets kept entirely in process memory."""
+
+    def __init__(self) -> None:
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _bucket(self, key: str, limit: int, period: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            _evict(self._buckets, lambda b: b.tokens >= b.capacity)
+            bucket = self._buckets[key] = TokenBucket(limit, limit / period)
+        return bucket
+
+    def charge(self, key: str, limit: int, period: float, cost: float) -> None:
+        """Bill ``cost`` tokens to ``key`` after the fact."""
+        self._bucket(key, limit, period).charge(cost)
+
+    def acquire(
+        self, key: str, limit: int, period: float = 60.0, cost: float = 1.0
+    ) -> RateLimitDecision:
+        """
+        Take ``cost`` tokens from the bucket for ``key``.
+
+        Args:
+            key: Rate-limit key
+            limit: Bucket capacity (requests per ``period``)
+            period: Seconds for an empty bucket to refill completely
+            cost: Tokens charged for this request
+
+        Returns:
+            RateLimitDecision: Whether the request is allowed
+        """
+        bucket = self._bucket(key, limit, period)
+        allowed = bucket.take(cost)
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=limit,
+            remaining=bucket.tokens,
+            retry_after=0.0 if allowed else bucket.retry_after(cost),
+            reset_after=bucket.reset_after(),
+        )
+
+
+class _Lease:
+    __slots__ = ("tokens", "bucket_tokens", "expires")
+
+    def __init__(self) -> None:
+        self.tokens = 0.0
+        self.bucket_tokens = 0.0
+        self.expires = 0.0
+
+
+class TokenBucketLimiter:
+    """
+    Redis-backed token buckets served from local leases.
+
+    Args:
+        redis: Async Redis client (``redis.asyncio`` compatible)
+        lease_fraction: Fraction of the capacity leased per Redis call
+        lease_ttl: Seconds a lease stays valid
+    """
+
+    def __init__(
+        self,
+        redis: Any,
+        lease_fraction: float = LEASE_FRACTION,
+        lease_ttl: float = LEASE_TTL,
+    ) -> None:
+        self.redis = redis
+        self.lease_fraction = lease_fraction
+        self.lease_ttl = lease_ttl
+        self._leases: Dict[str, _Lease] = {}
+        self._fallback = LocalTokenBuckets()
+        self._denied = DenyCache()
+        self._redis_down_until = 0.0
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(
+        self, key: str, limit: int, period: float = 60.0, cost: float = 1.0
+    ) -> RateLimitDecision:
+        """
+        Take ``cost`` tokens from the bucket for ``key``.
+
+        The request is served from the local lease when it holds enough
+        tokens; otherwise a new batch is leased from Redis in one script
+        call.
+
+        Args:
+            key: Rate-limit key
+            limit: Bucket capacity (requests per ``period``)
+            period: Seconds for an empty bucket to refill completely
+            cost: Tokens charged for this request
+
+        Returns:
+            RateLimitDecision: Whether the request is allowed
+        """
+        now = time.monotonic()
+        if now < self._redis_down_until:
+            return self._fallback.acquire(key, limit, period, cost)
+
+        denied_for = self._denied.retry_after(key, now)
+        if denied_for:
+            return RateLimitDecision(
+                allowed=False, limit=limit, remaining=0.0, retry_after=denied_for
+            )
+
+        rate = limit / period
+        lease = self._leases.get(key)
+        returned = 0.0
+        if lease is None:
+            _evict(self._leases, lambda lease: lease.expires <= now)
+            lease = self._leases[key] = _Lease()
+        elif lease.expires <= now:
+            # Hand the unused tokens back with the renewal, so the client
+            # keeps them and other processes see them in the bucket
+            returned, lease.tokens = lease.tokens, 0.0
+
+        if lease.tokens < cost:
+            requested = max(cost - lease.tokens, math.ceil(limit * self.lease_fraction))
+            try:
+                granted, bucket_tokens = await self._take(
+                    key, limit, rate, requested, returned=returned
+                )
+            except Exception as e:
+                self._redis_failed(now, e)
+                return self._fallback.acquire(key, limit, period, cost)
+            lease.tokens += granted
+            lease.bucket_tokens = bucket_tokens
+            lease.expires = now + self.lease_ttl
+
+        remaining = lease.tokens + lease.bucket_tokens
+        if lease.tokens >= cost:
+            lease.tokens -= cost
+            return RateLimitDecision(
+                allowed=True,
+                limit=limit,
+                remaining=remaining - cost,
+                reset_after=max(0.0, (limit - remaining + cost) / rate),
+            )
+        # A bucket in debt (see ``charge``) has to pay that off first
+        retry_after = (cost - lease.tokens + max(0.0, -lease.bucket_tokens)) / rate
+        self._denied.deny(key, now, retry_after)
+        return RateLimitDecision(
+            allowed=False,
+            limit=limit,
+            remaining=0.0,
+            retry_after=retry_after,
+            reset_after=max(0.0, (limit - remaining) / rate),
+        )
+
+    async def charge(self, key: str, limit: int, period: float, cost: float) -> None:
+        """
+        Bill ``cost`` tokens to ``key`` after the fact.
+
+        The charge is paid from the local lease first; any remainder is
+        taken from the Redis bucket even if that leaves it in debt.
+        """
+        now = time.monotonic()
+        if now < self._redis_down_until:
+            self._fallback.charge(key, limit, period, cost)
+            return
+
+        lease = self._leases.get(key)
+        if lease is not None and lease.expires > now:
+            paid = min(lease.tokens, cost)
+            lease.tokens -= paid
+            cost -= paid
+        if cost <= 0:
+            return
+        try:
+            _, bucket_tokens = await self._take(
+                key, limit, limit / period, cost, force=True
+            )
+        except Exception as e:
+            self._redis_failed(now, e)
+            self._fallback.charge(key, limit, period, cost)
+            return
+        if lease is not None:
+            lease.bucket_tokens = bucket_tokens
+
+    async def _take(
+        self,
+        key: str,
+        limit: int,
+        rate: float,
+        requested: float,
+        force: bool = False,
+        returned: float = 0.0,
+    ) -> Tuple[float, float]:
+        granted, bucket_tokens = await self._script(
+            keys=[f"{key}:bucket"],
+            args=[limit, rate, time.time(), requested, int(force), returned],
+        )
+        return float(granted), float(bucket_tokens)
+
+    def _redis_failed(self, now: float, error: Exception) -> None:
+        logger.warning(
+            f"Rate limiter falling back to local buckets: Redis error: {error}"
+        )
+        self._redis_down_until = now + REDIS_RETRY_INTERVAL
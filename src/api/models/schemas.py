@@ -3,8 +3,16 @@ Data models for the Blackjack Card Counter API.
 
 This module contains Pydantic models for request/response validation.
 """
-from pydantic import BaseModel, Field, field_validator, ValidationInfo
-from typing import List, Dict, Optional, Union, Any
+from pydantic import (
+    BaseModel,
+    Field,
+    field_validator,
+    model_validator,
+    ValidationInfo,
+)
+from typing import List, Dict, Literal, Optional, Union, Any
+
+from ..utils.card_utils import normalize_cards
 
 
 class CardInput(BaseModel):
@@ -21,26 +29,18 @@ class CardInput(BaseModel):
     @classmethod
     def validate_card_values(cls, cards: List[str]) -> List[str]:
         """Validate each card in the cards list."""
-        valid_cards = {"A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"}
-        result = []
-        for card in cards:
-            card_upper = card.upper()
-            if card_upper not in valid_cards:
-                raise ValueError(f"Invalid card value: {card}")
-            result.append(card_upper)
-        return result
+        return normalize_cards(cards)
 
     @field_validator("dealer_card")
     @classmethod
     def validate_dealer_card(cls, v: str) -> str:
         """Validate dealer's up card."""
-        valid_cards = {"2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"}
         if not v:
             return ""
-        card = v.upper()
-        if card not in valid_cards:
+        try:
+            return normalize_cards([v])[0]
+        except ValueError:
             raise ValueError(f"Invalid dealer card: {v}")
-        return card
 
     @field_validator("counting_system")
     @classmethod
@@ -65,6 +65,21 @@ class StrategyRequest(BaseModel):
     )
     counting_system: str = Field("hiLo", description="Card counting system to use")
 
+    @field_validator("player_hand")
+    @classmethod
+    def validate_player_hand(cls, cards: List[str]) -> List[str]:
+        """Validate each card in the player's hand."""
+        return normalize_cards(cards)
+
+    @field_validator("dealer_card")
+    @classmethod
+    def validate_dealer_card(cls, v: str) -> str:
+        """Validate dealer's up card."""
+        try:
+            return normalize_cards([v])[0]
+        except ValueError:
+            raise ValueError(f"Invalid dealer card: {v}")
+
 
 class BankrollRequest(BaseModel):
     """Input model for bankroll management."""
@@ -84,3 +99,57 @@ class BankrollRequest(BaseModel):
                 f"max_bet ({v}) must be greater than min_bet ({info.data['min_bet']})"
             )
         return v
+
+
+class SimulationJobRequest(BaseModel):
+    """Input model for a background simulation job."""
+
+    kind: Literal["decision", "chart"] = Field(
+        "decision",
+        description="'decision' simulates one hand; 'chart' simulates every "
+        "hand against every dealer up card",
+    )
+    player_hand: Optional[List[str]] = Field(
+        None, description="Player's hand (decision jobs)"
+    )
+    dealer_card: Optional[str] = Field(
+        None, description="Dealer's up card (decision jobs)"
+    )
+    seen_cards: Optional[List[str]] = Field(
+        None,
+        description="All cards seen in the shoe (decision jobs); defaults to the "
+        "player's hand and the dealer's up card",
+    )
+    true_count: float = Field(0.0, description="Current true count")
+    num_decks: int = Field(6, ge=1, le=8, description="Number of decks in the shoe")
+    rounds: Optional[int] = Field(
+        None,
+        ge=1,
+        le=100_000_000,
+        description="Rounds simulated per action (default: 1,000,000 for a "
+        "decision, 10,000 per hand for a chart)",
+    )
+
+    @field_validator("player_hand", "seen_cards")
+    @classmethod
+    def validate_cards(cls, cards: Optional[List[str]]) -> Optional[List[str]]:
+        """Validate each card in the list."""
+        return None if cards is None else normalize_cards(cards)
+
+    @field_validator("dealer_card")
+    @classmethod
+    def validate_dealer_card(cls, v: Optional[str]) -> Optional[str]:
+        """Validate dealer's up card."""
+        if v is None:
+            return None
+        try:
+            return normalize_cards([v])[0]
+        except ValueError:
+            raise ValueError(f"Invalid dealer card: {v}")
+
+    @model_validator(mode="after")
+    def validate_decision_hand(self) -> "SimulationJobRequest":
+        """Require a hand and a dealer card for decision jobs."""
+        if self.kind == "decision" and (not self.player_hand or not self.dealer_card):
+            raise ValueError("Decision jobs need player_hand and dealer_card")
+        return self
@@ -0,0 +1,176 @@
+"""
+Content negotiation for the Blackjack Card Counter API.
+
+JSON stays the default. Clients that call the analysis endpoints many times
+per second can instead send and receive MessagePack, which is smaller and
+cheaper to parse:
+
+- Request bodies sent with ``Content-Type: application/msgpack`` are decoded
+  here and then validated by the same request models as JSON bodies.
+- In MessagePack bodies, a card array may be sent as a ``bin`` value of card
+  indices, one byte per card, in ``CARD_RANKS`` order (0 = "2" ... 8 = "10",
+  9 = "J", 10 = "Q", 11 = "K", 12 = "A"). See :func:`pack_cards`.
+- Responses are encoded as MessagePack when the ``Accept`` header prefers it
+  over JSON; otherwise they are JSON.
+
+MessagePack support needs the ``msgpack`` package. Without it, MessagePack
+request bodies are rejected with 415 and responses are always JSON.
+"""
+import json
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response
+
+from .responses import FastJSONResponse, encode_default
+from .utils.card_utils import CARD_INDEX, CARD_RANKS
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is listed in requirements.txt
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = frozenset(
+    {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+)
+
+
+def pack_cards(cards: List[str]) -> bytes:
+    """
+    Encode cards as one index byte per card.
+
+    Args:
+        cards: Card values (e.g., ['A', 'K'])
+
+    Returns:
+        bytes: Card indices into ``CARD_RANKS``
+
+    Raises:
+        KeyError: If a card is not a valid card value
+    """
+    return bytes(CARD_INDEX[card] for card in cards)
+
+
+def unpack_cards(data: bytes) -> List[str]:
+    """
+    Decode cards packed by :func:`pack_cards`.
+
+    Raises:
+        ValueError: If a byte is not a valid card index
+    """
+    try:
+        return [CARD_RANKS[index] for index in data]
+    except IndexError:
+        raise ValueError(
+            f"Invalid card index in packed cards (expected 0-{len(CARD_RANKS) - 1})"
+        )
+
+
+def _media_type(header: Optional[str]) -> str:
+    return (header or "").split(";", 1)[0].strip().lower()
+
+
+def _unpack_card_arrays(data: Any) -> Any:
+    # Packed card arrays are the only binary values the API accepts
+    if isinstance(data, bytes):
+        return unpack_cards(data)
+    if isinstance(data, dict):
+        return {
+            key: unpack_cards(value) if isinstance(value, bytes) else value
+            for key, value in data.items()
+        }
+    return data
+
+
+def decode_body(content_type: Optional[str], body: bytes) -> Any:
+    """
+    Decode a request body according to its content type.
+
+    Bodies without a MessagePack content type are decoded as JSON.
+
+    Args:
+        content_type: Value of the Content-Type header
+        body: Raw request body
+
+    Returns:
+        Any: Decoded body, with packed card arrays expanded to card values
+
+    Raises:
+        HTTPException: 415 if MessagePack is sent but not available
+        ValueError: If the body cannot be decoded
+    """
+    if _media_type(content_type) in MSGPACK_MEDIA_TYPES:
+        if msgpack is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="MessagePack is not supported by this server",
+            )
+        return _unpack_card_arrays(msgpack.unpackb(body, raw=False))
+    return json.loads(body)
+
+
+def header_quality(item: str) -> float:
+    """
+    Return the ``q`` weight of one item of an Accept-style header.
+
+    Example:
+        >>> header_quality("gzip;q=0.5")
+        0.5
+    """
+    for param in item.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def prefers_msgpack(accept: Optional[str]) -> bool:
+    """
+    Return whether an ``Accept`` header prefers MessagePack over JSON.
+
+    JSON wins ties, so wildcards and missing headers select JSON.
+    """
+    if msgpack is None or not accept:
+        return False
+    json_q = msgpack_q = 0.0
+    for media_range in accept.split(","):
+        media_type = _media_type(media_range)
+        quality = header_quality(media_range)
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, quality)
+        elif media_type in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            json_q = max(json_q, quality)
+    return msgpack_q > json_q
+
+
+class MsgPackResponse(Response):
+    """Response encoded as MessagePack."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=encode_default, use_bin_type=True)
+
+
+def negotiated_response(request: Request, content: Any) -> Response:
+    """
+    Encode ``content`` in the format the client's ``Accept`` header prefers.
+
+    Args:
+        request: Incoming request
+        content: Response data
+
+    Returns:
+        Response: MessagePack or JSON response, marked ``Vary: Accept``
+    """
+    if prefers_msgpack(request.headers.get("accept")):
+        response: Response = MsgPackResponse(content)
+    else:
+        response = FastJSONResponse(content)
+    response.headers["Vary"] = "Accept"
+    return response
@@ -0,0 +1,110 @@
+"""
+Precomputed responses for the Blackjack Card Counter API.
+
+Some endpoints return data that only changes with the rule configuration,
+such as the list of counting systems or the basic strategy table for a rule
+set. For those, the JSON body is serialized once, given a strong ETag, and
+compressed ahead of time with gzip and, when the ``brotli`` package is
+installed, brotli. A request then costs a header comparison: a matching
+``If-None-Match`` is answered with 304 Not Modified, and anything else gets
+the stored variant that best matches ``Accept-Encoding``.
+"""
+import gzip
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from .negotiation import JSON_MEDIA_TYPE, header_quality
+from .responses import dumps
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - Brotli is listed in requirements.txt
+    brotli = None
+
+# Precompressed content codings, preferred first
+ENCODINGS = ("br", "gzip")
+
+# Clients may reuse a body for this long, then must revalidate with the ETag
+CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+
+def _choose_encoding(
+    accept_encoding: Optional[str], available: Dict[str, bytes]
+) -> str:
+    weights: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding = item.split(";", 1)[0].strip().lower()
+        if coding:
+            weights[coding] = header_quality(item)
+    wildcard = weights.get("*", 0.0)
+    best, best_q = "identity", 0.0
+    # Highest weight wins; ties go to the earlier (smaller) coding
+    for coding in ENCODINGS:
+        quality = weights.get(coding, wildcard)
+        if coding in available and quality > best_q:
+            best, best_q = coding, quality
+    # identity is acceptable unless excluded, so it is the fallback
+    if best_q < weights.get("identity", 0.0):
+        best = "identity"
+    return best
+
+
+class PrecomputedResponse:
+    """
+    A JSON body serialized once, with an ETag and precompressed variants.
+
+    Each content coding is a different representation, so each variant gets
+    its own strong ETag (the identity tag with the coding appended).
+
+    Args:
+        content: JSON-compatible data to serve
+    """
+
+    def __init__(self, content: Any) -> None:
+        body = dumps(content)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.bodies: Dict[str, bytes] = {
+            "identity": body,
+            "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+        }
+        if brotli is not None:
+            self.bodies["br"] = brotli.compress(body, quality=11)
+        self.etags: Dict[str, str] = {
+            coding: f'"{digest}"' if coding == "identity" else f'"{digest}-{coding}"'
+            for coding in self.bodies
+        }
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        """Return whether ``If-None-Match`` matches any variant of this body."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return not tags.isdisjoint(self.etags.values())
+
+    def response(self, request: Request) -> Response:
+        """
+        Build the response for ``request``.
+
+        Returns:
+            Response: 304 if the client's copy is current, otherwise the
+            best-matching encoded body
+        """
+        coding = _choose_encoding(request.headers.get("accept-encoding"), self.bodies)
+        headers = {
+            "ETag": self.etags[coding],
+            "Cache-Control": CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+        if self.not_modified(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(
+            content=self.bodies[coding], media_type=JSON_MEDIA_TYPE, headers=headers
+        )
@@ -0,0 +1,119 @@
+"""
+Managed Redis connection pool for the Blackjack Card Counter API.
+
+The rate limiter and the response cache share one client backed by a
+bounded, blocking connection pool. Connection, reply and pool checkout
+timeouts are kept short on purpose: when Redis is slow, the limiter and the
+cache give up quickly and fall back to local state (see ``token_bucket``,
+``gcra`` and ``cache.FallbackBackend``) instead of holding requests.
+
+At startup, :func:`warm_up` opens part of the pool ahead of traffic and
+loads the limiter scripts, so the first requests pay for neither a TCP
+handshake nor a script upload.
+
+Environment variables:
+    REDIS_URL: Redis server URL (default: redis://localhost:6379)
+    REDIS_MAX_CONNECTIONS: Maximum connections in the pool (default: 50)
+    REDIS_POOL_TIMEOUT: Seconds to wait for a free connection when the pool
+        is exhausted (default: 0.1)
+    REDIS_SOCKET_TIMEOUT: Seconds to wait for a reply (default: 0.25)
+    REDIS_CONNECT_TIMEOUT: Seconds to wait for a new connection
+        (default: 0.5)
+    REDIS_HEALTH_CHECK_INTERVAL: Seconds a connection may sit idle before it
+        is checked with a PING on checkout (default: 30)
+    REDIS_WARM_CONNECTIONS: Connections opened at startup (default: 10)
+"""
+import asyncio
+import os
+from typing import Iterable
+
+import redis.asyncio as redis
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "0.1"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.25"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "0.5"))
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+REDIS_WARM_CONNECTIONS = int(os.getenv("REDIS_WARM_CONNECTIONS", "10"))
+
+
+def create_redis_client(
+    url: str = REDIS_URL,
+    max_connections: int = REDIS_MAX_CONNECTIONS,
+    pool_timeout: float = REDIS_POOL_TIMEOUT,
+    socket_timeout: float = REDIS_SOCKET_TIMEOUT,
+    connect_timeout: float = REDIS_CONNECT_TIMEOUT,
+    health_check_interval: int = REDIS_HEALTH_CHECK_INTERVAL,
+) -> redis.Redis:
+    """
+    Create a Redis client backed by a bounded connection pool.
+
+    No connection is opened until the client is first used.
+
+    Args:
+        url: Redis server URL
+        max_connections: Maximum connections in the pool
+        pool_timeout: Seconds to wait for a free connection
+        socket_timeout: Seconds to wait for a reply
+        connect_timeout: Seconds to wait for a new connection
+        health_check_interval: Idle seconds before a connection is re-checked
+
+    Returns:
+        redis.Redis: Client that owns (and closes) the pool
+    """
+    pool = redis.BlockingConnectionPool.from_url(
+        url,
+        max_connections=max_connections,
+        timeout=pool_timeout,
+        socket_timeout=socket_timeout,
+        socket_connect_timeout=connect_timeout,
+        health_check_interval=health_check_interval,
+        encoding="utf-8",
+        decode_responses=True,
+    )
+    return redis.Redis(connection_pool=pool)
+
+
+async def warm_up(
+    client: redis.Redis,
+    connections: int = REDIS_WARM_CONNECTIONS,
+    scripts: Iterable[str] = (),
+) -> int:
+    """
+    Open pool connections ahead of traffic and preload Lua scripts.
+
+    Each connection runs one pipelined round trip; the first one also loads
+    ``scripts`` into the server's script cache.
+
+    Args:
+        client: Client returned by :func:`create_redis_client`
+        connections: Number of connections to open, capped at the pool size
+        scripts: Lua scripts to load
+
+    Returns:
+        int: Number of connections opened
+
+    Raises:
+        redis.RedisError: If Redis cannot be reached
+    """
+    max_connections = getattr(client.connection_pool, "max_connections", connections)
+    connections = max(1, min(connections, max_connections))
+    scripts = list(scripts)
+
+    async def prime(load_scripts: bool) -> None:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.ping()
+            if load_scripts:
+                for script in scripts:
+                    pipe.script_load(script)
+            await pipe.execute()
+
+    # Run concurrently so each pipeline checks out its own connection
+    await asyncio.gather(*(prime(i == 0) for i in range(connections)))
+    return connections
+
+
+async def close_redis_client(client: redis.Redis) -> None:
+    """Close ``client`` and disconnect every connection in its pool."""
+    await client.close(close_connection_pool=True)
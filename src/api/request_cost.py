@@ -0,0 +1,99 @@
+"""
+Per-request compute accounting for cost-weighted rate limiting.
+
+The rate-limit middleware opens a :class:`RequestCost` for every request.
+Code doing measurable work reports it with :func:`charge` (the strategy
+cache reports hits and misses, the decision engine reports simulated
+rounds), and the middleware charges the client's bucket by the total once
+the response is ready. A cached answer then costs a fraction of a token,
+while an uncached Monte Carlo decision costs several.
+
+The current cost lives in a context variable, so it follows the request
+into tasks and, through ``EngineExecutor``, into engine worker threads.
+"""
+import contextvars
+from typing import Optional
+
+# Tokens charged for a request that reports no cost of its own
+DEFAULT_REQUEST_COST = 1.0
+
+# Tokens charged for an answer served from the cache
+CACHE_HIT_COST = 0.1
+
+# Tokens charged for an answer that had to be computed (cache miss)
+CACHE_MISS_COST = 1.0
+
+# Simulated engine rounds per token
+ROUNDS_PER_TOKEN = 10000
+
+
+class RequestCost:
+    """Compute consumed by one request, in rate-limit tokens."""
+
+    __slots__ = ("units", "measured", "cache_misses")
+
+    def __init__(self) -> None:
+        self.units = 0.0
+        self.measured = False
+        # Cache misses charged so far; see ``charge_shared_answer``
+        self.cache_misses = 0
+
+    def add(self, units: float) -> None:
+        self.units += units
+        self.measured = True
+
+    @property
+    def total(self) -> float:
+        """Tokens to charge; requests that reported nothing cost the default."""
+        return self.units if self.measured else DEFAULT_REQUEST_COST
+
+
+_current_cost: contextvars.ContextVar[Optional[RequestCost]] = contextvars.ContextVar(
+    "request_cost", default=None
+)
+
+
+def start_request_cost() -> RequestCost:
+    """Open a cost accumulator for the current request context."""
+    cost = RequestCost()
+    _current_cost.set(cost)
+    return cost
+
+
+def charge(units: float) -> None:
+    """Add ``units`` tokens to the current request's cost, if one is open."""
+    cost = _current_cost.get()
+    if cost is not None:
+        cost.add(units)
+
+
+def charge_cache_lookup(hit: bool) -> None:
+    """Report a cache lookup for the current request."""
+    cost = _current_cost.get()
+    if cost is not None:
+        cost.add(CACHE_HIT_COST if hit else CACHE_MISS_COST)
+        if not hit:
+            cost.cache_misses += 1
+
+
+def charge_shared_answer() -> None:
+    """
+    Report an answer shared with a computation already in flight.
+
+    It costs as much as a cache hit. If the request was charged a cache
+    miss for this answer, that miss becomes the hit instead of being billed
+    as well.
+    """
+    cost = _current_cost.get()
+    if cost is None:
+        return
+    if cost.cache_misses:
+        cost.cache_misses -= 1
+        cost.add(CACHE_HIT_COST - CACHE_MISS_COST)
+    else:
+        cost.add(CACHE_HIT_COST)
+
+
+def charge_rounds(rounds: int) -> None:
+    """Report simulated engine rounds for the current request."""
+    charge(rounds / ROUNDS_PER_TOKEN)
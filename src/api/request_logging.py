@@ -0,0 +1,227 @@
+"""
+Structured, sampled request logging for the Blackjack Card Counter API.
+
+Detailed per-request logging (full payloads, results, headers) is far too
+expensive to emit on every call. This module decides once per request
+whether debug detail is wanted, either because a trusted client asked for
+it with the ``X-Debug-Log`` header or because the request was sampled, and
+otherwise turns every debug call into a cheap no-op.
+
+Records are handed to a bounded queue on the request thread and formatted
+as JSON lines by a background listener thread, so serialising payloads
+never runs on the event loop.
+
+Environment variables:
+    REQUEST_LOG_LEVEL: Level of the request logger (default: INFO). Sampling
+        only applies when this is DEBUG.
+    REQUEST_LOG_SAMPLE_RATE: Fraction of requests logged in detail when
+        the level is DEBUG (default: 0.01)
+    REQUEST_LOG_DEBUG_HEADER: Set to 1 to honour the debug header
+        (default: 0)
+    REQUEST_LOG_TRUSTED_CLIENTS: Comma-separated client addresses allowed
+        to use the debug header (default: 127.0.0.1,::1)
+"""
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+
+from .log_queue import FlushingQueueListener, queued_handlers
+
+REQUEST_LOGGER_NAME = "blackjack.requests"
+DEBUG_HEADER = "x-debug-log"
+
+REQUEST_LOG_LEVEL = os.getenv("REQUEST_LOG_LEVEL", "INFO").upper()
+REQUEST_LOG_SAMPLE_RATE = float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "0.01"))
+_TRUTHY = {"1", "true", "yes", "on"}
+
+ALLOW_DEBUG_HEADER = os.getenv("REQUEST_LOG_DEBUG_HEADER", "0").lower() in _TRUTHY
+TRUSTED_CLIENTS = frozenset(
+    host.strip()
+    for host in os.getenv("REQUEST_LOG_TRUSTED_CLIENTS", "127.0.0.1,::1").split(",")
+    if host.strip()
+)
+
+# Headers whose values are never written to the logs
+SENSITIVE_HEADERS = frozenset(
+    {"authorization", "proxy-authorization", "cookie", "set-cookie", "x-api-key"}
+)
+
+
+def redact_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Return a copy of ``headers`` with credentials replaced by a marker."""
+    return {
+        name: "[REDACTED]" if name.lower() in SENSITIVE_HEADERS else value
+        for name, value in headers.items()
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line.
+
+    Structured fields passed as ``extra={"fields": {...}}`` are merged into
+    the top-level object.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(
+                record.created, timezone.utc
+            ).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestLog:
+    """Logger bound to a single request.
+
+    Attributes:
+        request_id: ID from the ``X-Request-ID`` header, or a generated one
+        enabled: Whether debug detail is logged for this request
+    """
+
+    __slots__ = ("_logger", "request_id", "enabled")
+
+    def __init__(self, logger: logging.Logger, request_id: str, enabled: bool):
+        self._logger = logger
+        self.request_id = request_id
+        self.enabled = enabled
+
+    def _emit(self, level: int, event: str, fields: Dict[str, Any], exc_info=None):
+        fields["request_id"] = self.request_id
+        record = self._logger.makeRecord(
+            self._logger.name,
+            level,
+            "(request)",
+            0,
+            event,
+            (),
+            exc_info,
+            extra={"fields": fields},
+        )
+        self._logger.handle(record)
+
+    def debug(self, event: str, **fields: Any) -> None:
+        """Log debug detail if this request was selected for it.
+
+        The per-request decision already includes the level check, so the
+        record bypasses the logger level (a debug header from a trusted
+        client must work in production, where the logger runs at INFO).
+        """
+        if self.enabled:
+            self._emit(logging.DEBUG, event, fields)
+
+    def error(self, event: str, exc_info: bool = True, **fields: Any) -> None:
+        """Log an error for this request, always and with the traceback."""
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._emit(
+                logging.ERROR,
+                event,
+                fields,
+                exc_info=sys.exc_info() if exc_info else None,
+            )
+
+
+class RequestLogger:
+    """Factory for :class:`RequestLog` objects with sampling.
+
+    Args:
+        name: Logger name
+        sample_rate: Fraction of requests logged in detail when the logger
+            is enabled for DEBUG
+        allow_debug_header: Whether the ``X-Debug-Log`` header forces detail
+        trusted_clients: Client addresses allowed to use the header
+    """
+
+    def __init__(
+        self,
+        name: str = REQUEST_LOGGER_NAME,
+        sample_rate: float = REQUEST_LOG_SAMPLE_RATE,
+        allow_debug_header: bool = ALLOW_DEBUG_HEADER,
+        trusted_clients: frozenset = TRUSTED_CLIENTS,
+    ):
+        self.logger = logging.getLogger(name)
+        self.sample_rate = sample_rate
+        self.allow_debug_header = allow_debug_header
+        self.trusted_clients = trusted_clients
+
+    def debug_enabled(self, request: Optional[Request]) -> bool:
+        """Decide whether ``request`` is logged in detail."""
+        if (
+            self.allow_debug_header
+            and request is not None
+            and request.client is not None
+            and request.client.host in self.trusted_clients
+            and request.headers.get(DEBUG_HEADER, "").lower() in _TRUTHY
+        ):
+            return True
+        return (
+            self.sample_rate > 0
+            and self.logger.isEnabledFor(logging.DEBUG)
+            and random.random() < self.sample_rate
+        )
+
+    def for_request(self, request: Optional[Request]) -> RequestLog:
+        """Return a logger bound to ``request``."""
+        request_id = None
+        if request is not None:
+            request_id = request.headers.get("x-request-id")
+        return RequestLog(
+            self.logger,
+            request_id or uuid.uuid4().hex,
+            self.debug_enabled(request),
+        )
+
+
+_listener: Optional[FlushingQueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def configure_request_logging(
+    handler: Optional[logging.Handler] = None, level: str = REQUEST_LOG_LEVEL
+) -> logging.Logger:
+    """
+    Route the request logger through a queue to a JSON handler.
+
+    Idempotent; the listener thread is started on the first call and
+    flushed at interpreter exit.
+
+    Args:
+        handler: Destination handler (default: JSON lines on stderr)
+        level: Level of the request logger
+
+    Returns:
+        logging.Logger: The configured request logger
+    """
+    global _listener
+
+    logger = logging.getLogger(REQUEST_LOGGER_NAME)
+    with _listener_lock:
+        if _listener is not None:
+            return logger
+        if handler is None:
+            handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+
+        queue_handler, _listener = queued_handlers([handler], pipeline="requests")
+        logger.addHandler(queue_handler)
+        logger.setLevel(level)
+        logger.propagate = False
+    return logger
+
+
+# Shared request logger
+request_logger = RequestLogger()
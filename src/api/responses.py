@@ -0,0 +1,53 @@
+"""
+Fast JSON responses for the Blackjack Card Counter API.
+
+Handlers that return large nested results (card analysis, strategy
+recommendations) wrap them in :class:`FastJSONResponse`. Returning a response
+object skips FastAPI's ``jsonable_encoder`` pass over the result, and the
+body is rendered by orjson, which serializes dicts, lists and numpy values
+natively. If orjson is not installed, the standard library ``json`` module is
+used with the same output.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def encode_default(obj: Any) -> Any:
+    """Convert numpy scalars and arrays, which orjson handles on its own."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize ``content`` to compact UTF-8 JSON.
+
+    Args:
+        content: JSON-compatible data; numpy scalars and arrays are allowed
+
+    Returns:
+        bytes: Encoded JSON document
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=encode_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with :func:`dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,352 @@
+"""
+Persistent result store for the Blackjack Card Counter API.
+
+Engine answers and cached responses otherwise live in process memory, or in
+Redis when it is reachable, so every restart starts cold. A
+:class:`ResultStore` keeps them in a SQLite file that outlives the process:
+after a deploy, a hand answered before is answered from disk.
+
+Rows are filed under a version, normally built by :func:`store_version`
+from the producer's version and a hash of the rules it plays by, so results
+of an older engine or of other rules are never served. The file is opened
+lazily, in WAL mode so the server's worker processes can read while one of
+them writes, and its pages are memory-mapped. Writes are queued and
+committed in batches by a background thread, which also compacts the file:
+it drops expired rows and gives the freed pages back to the file system.
+Rows of other versions are left to expire like any other: during a rolling
+restart, old and new workers share the file and must not empty each
+other's results.
+
+Environment variables:
+    RESULT_STORE_DIR: Directory of the store files; empty disables the
+        store (default: ``blackjack-results-<uid>`` in the temp directory,
+        private to the user)
+    RESULT_STORE_TTL_SECONDS: Seconds a stored result is served
+        (default: 86400)
+    RESULT_STORE_COMPACT_INTERVAL: Seconds between compactions
+        (default: 600)
+    RESULT_STORE_MMAP_BYTES: Bytes of each file mapped into memory
+        (default: 268435456)
+"""
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .metrics import RESULT_STORE_ROWS_COMPACTED, RESULT_STORE_WRITES_DROPPED
+from .utils.paths import private_temp_directory
+
+logger = logging.getLogger(__name__)
+
+RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR")
+RESULT_STORE_TTL_SECONDS = int(os.getenv("RESULT_STORE_TTL_SECONDS", "86400"))
+RESULT_STORE_COMPACT_INTERVAL = float(os.getenv("RESULT_STORE_COMPACT_INTERVAL", "600"))
+RESULT_STORE_MMAP_BYTES = int(os.getenv("RESULT_STORE_MMAP_BYTES", "268435456"))
+
+# Writes waiting for the writer thread; further writes are dropped
+_WRITE_QUEUE_SIZE = 10000
+
+# Most rows committed in one transaction
+_WRITE_BATCH = 500
+
+# Queued to stop the writer thread
+_STOP = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    version TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (version, key)
+) WITHOUT ROWID
+"""
+
+Value = Union[str, bytes]
+
+
+def store_version(version: Any, rules: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Build a store version from a producer's version and its rules.
+
+    Args:
+        version: Version of the code producing the results
+        rules: JSON-compatible settings the results depend on
+
+    Returns:
+        str: ``<version>-<hash of the rules>``
+    """
+    encoded = json.dumps(rules or {}, sort_keys=True).encode("utf-8")
+    return f"{version}-{hashlib.sha256(encoded).hexdigest()[:12]}"
+
+
+class ResultStore:
+    """
+    Results kept in a SQLite file shared across processes and restarts.
+
+    Lookups never raise: a store that cannot be opened or read logs a
+    warning and misses, so requests are computed as if it were empty.
+
+    Args:
+        name: Name of the store, used for its file and metric label
+        version: Version the results are filed under (see
+            :func:`store_version`)
+        directory: Directory of the file; empty disables the store
+            (default: ``RESULT_STORE_DIR``, or a private directory in the
+            temp directory)
+        ttl: Seconds a result is served unless ``put`` says otherwise
+        compact_interval: Seconds between compactions
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        directory: Optional[str] = None,
+        ttl: int = RESULT_STORE_TTL_SECONDS,
+        compact_interval: float = RESULT_STORE_COMPACT_INTERVAL,
+    ) -> None:
+        directory = RESULT_STORE_DIR if directory is None else directory
+        self.name = name
+        self.version = version
+        # None until the default directory is checked on first use
+        self.path = os.path.join(directory, f"{name}.sqlite3") if directory else None
+        self._disabled = directory == ""
+        self.ttl = ttl
+        self.compact_interval = compact_interval
+        self._local = threading.local()
+        self._writes: queue.Queue = queue.Queue(_WRITE_QUEUE_SIZE)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._failed = False
+
+    @property
+    def enabled(self) -> bool:
+        """Whether results are persisted."""
+        return not self._disabled and not self._failed
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.path is None:
+            directory = private_temp_directory("blackjack-results", "RESULT_STORE_DIR")
+            self.path = os.path.join(directory, f"{self.name}.sqlite3")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Autocommit; the writer opens its transactions explicitly
+        connection = sqlite3.connect(
+            self.path, timeout=5, isolation_level=None, check_same_thread=False
+        )
+        # auto_vacuum only takes effect before the table is created
+        connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA mmap_size={RESULT_STORE_MMAP_BYTES}")
+        connection.execute(_SCHEMA)
+        return connection
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # One connection per thread, opened on first use
+        connection = getattr(self._local, "connection", None)
+        if connection is None and self.enabled:
+            try:
+                connection = self._local.connection = self._connect()
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Result store {self.name} unavailable: {e!r}")
+                self._failed = True
+        return connection
+
+    def get_with_ttl(self, key: str) -> Tuple[int, Optional[Value]]:
+        """
+        Look up a result.
+
+        Returns:
+            Tuple[int, Optional[Value]]: Seconds the result has left and the
+            result, or ``(0, None)`` if there is none
+        """
+        connection = self._connection()
+        if connection is None:
+            return 0, None
+        now = time.time()
+        try:
+            row = connection.execute(
+                "SELECT value, expires FROM results "
+                "WHERE version = ? AND key = ? AND expires > ?",
+                (self.version, key, now),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Result store {self.path} read failed: {e!r}")
+            return 0, None
+        if row is None:
+            return 0, None
+        return int(row[1] - now), row[0]
+
+    def get(self, key: str) -> Optional[Value]:
+        """Return the result stored under ``key``, if any."""
+        return self.get_with_ttl(key)[1]
+
+    def put(self, key: str, value: Value, ttl: Optional[int] = None) -> None:
+        """
+        Queue ``value`` to be stored under ``key``.
+
+        The caller does not wait for the disk. Results that do not fit in
+        the write queue are dropped and counted in the
+        ``result_store_writes_dropped_total`` metric.
+
+        Args:
+            key: Key of the result within this store's version
+            value: Encoded result
+            ttl: Seconds the result is served (default: the store's ``ttl``)
+        """
+        if not self.enabled:
+            return
+        self._start_writer()
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        try:
+            self._writes.put_nowait((key, value, expires))
+        except queue.Full:
+            RESULT_STORE_WRITES_DROPPED.labels(self.name).inc()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the results queued so far are on disk.
+
+        Returns:
+            bool: False if ``timeout`` passed first
+        """
+        if self._writer is None or not self._writer.is_alive():
+            return True
+        written = threading.Event()
+        self._writes.put(written)
+        return written.wait(timeout)
+
+    def clear(self, prefix: Optional[str] = None, key: Optional[str] = None) -> int:
+        """
+        Delete the results of this version under ``key`` or starting with
+        ``prefix``, or all of them if neither is given.
+
+        Returns:
+            int: Number of results deleted
+        """
+        self.flush()
+        connection = self._connection()
+        if connection is None:
+            return 0
+        if key is not None:
+            condition, args = "key = ?", (key,)
+        elif prefix:
+            condition, args = "substr(key, 1, ?) = ?", (len(prefix), prefix)
+        else:
+            condition, args = "1", ()
+        try:
+            return connection.execute(
+                f"DELETE FROM results WHERE version = ? AND {condition}",
+                (self.version, *args),
+            ).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Result store {self.path} clear failed: {e!r}")
+            return 0
+
+    def compact(self, connection: Optional[sqlite3.Connection] = None) -> int:
+        """
+        Drop expired results of every version, and shrink the file by the
+        pages they used.
+
+        Returns:
+            int: Number of results dropped
+        """
+        connection = connection or self._connection()
+        if connection is None:
+            return 0
+        dropped = connection.execute(
+            "DELETE FROM results WHERE expires <= ?", (time.time(),)
+        ).rowcount
+        connection.execute("PRAGMA incremental_vacuum").fetchall()
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        RESULT_STORE_ROWS_COMPACTED.labels(self.name).inc(dropped)
+        return dropped
+
+    def close(self) -> None:
+        """Write out the queued results and stop the writer thread."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None and writer.is_alive():
+            self._writes.put(_STOP)
+            writer.join()
+
+    def _start_writer(self) -> None:
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write, name=f"result-store-{self.name}", daemon=True
+                )
+                self._writer.start()
+                atexit.register(self.close)
+
+    def _write(self) -> None:
+        connection = None
+        # Compact first, so results that expired while no process ran go
+        # right away
+        next_compaction = time.monotonic()
+        stopping = False
+        while not stopping:
+            try:
+                item = self._writes.get(
+                    timeout=max(0.0, next_compaction - time.monotonic())
+                )
+            except queue.Empty:
+                item = None
+            rows: List[Tuple[str, Value, float]] = []
+            written: List[threading.Event] = []
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    written.append(item)
+                else:
+                    rows.append(item)
+                if stopping or len(rows) >= _WRITE_BATCH:
+                    break
+                try:
+                    item = self._writes.get_nowait()
+                except queue.Empty:
+                    item = None
+            compacting = time.monotonic() >= next_compaction
+            if compacting:
+                next_compaction = time.monotonic() + self.compact_interval
+            try:
+                if connection is None:
+                    connection = self._connect()
+                if rows:
+                    self._commit(connection, rows)
+                if compacting:
+                    self.compact(connection)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Result store {self.path} write failed: {e!r}")
+                # A file that cannot be opened stays unusable; stop queueing
+                self._failed = connection is None
+            finally:
+                for event in written:
+                    event.set()
+        if connection is not None:
+            connection.close()
+
+    def _commit(
+        self, connection: sqlite3.Connection, rows: List[Tuple[str, Value, float]]
+    ) -> None:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT OR REPLACE INTO results (version, key, value, expires) "
+                "VALUES (?, ?, ?, ?)",
+                [(self.version, key, value, expires) for key, value, expires in rows],
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
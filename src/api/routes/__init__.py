@@ -4,7 +4,7 @@ API routes for the Blackjack Card Counter application.
 This module imports and includes all route modules.
 """
 from fastapi import APIRouter
-from . import cards, strategy, bankroll, root
+from . import cards, strategy, bankroll, root, metrics, jobs
 
 # Create main router
 router = APIRouter()
@@ -14,3 +14,5 @@ router.include_router(root.router, tags=["root"])
 router.include_router(cards.router, prefix="/api/cards", tags=["cards"])
 router.include_router(strategy.router, prefix="/api/strategy", tags=["strategy"])
 router.include_router(bankroll.router, prefix="/api/bankroll", tags=["bankroll"])
+router.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+router.include_router(metrics.router, tags=["monitoring"])
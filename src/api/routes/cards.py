@@ -4,23 +4,59 @@ Card analysis endpoints for the Blackjack Card Counter API.
 This module handles all card-related API endpoints.
 """
 import logging
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import List, Optional
 
+from ..middleware.request_validation import body_openapi, validated_body
 from ..models.schemas import CardInput
+from ..negotiation import negotiated_response
+from ..precomputed import PrecomputedResponse
 from ..services import card_service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Serialized and compressed once; the list only changes with a release
+COUNTING_SYSTEMS_RESPONSE = PrecomputedResponse(
+    {
+        "counting_systems": [
+            {"id": "hiLo", "name": "Hi-Lo", "description": "Balanced, level 1 system"},
+            {
+                "id": "hiOptI",
+                "name": "Hi-Opt I",
+                "description": "Balanced, level 1 system",
+            },
+            {
+                "id": "hiOptII",
+                "name": "Hi-Opt II",
+                "description": "Balanced, level 2 system",
+            },
+            {"id": "ko", "name": "KO (Knock-Out)", "description": "Unbalanced system"},
+            {
+                "id": "omegaII",
+                "name": "Omega II",
+                "description": "Balanced, level 2 system",
+            },
+            {
+                "id": "zenCount",
+                "name": "Zen Count",
+                "description": "Balanced, level 2 system",
+            },
+        ]
+    }
+)
+
 
 @router.post(
     "/analyze",
     summary="Analyze cards",
     description="Analyze the current game state and get recommendations",
     response_description="Analysis results and recommendations",
+    openapi_extra=body_openapi(CardInput),
 )
-async def analyze_cards(card_input: CardInput):
+async def analyze_cards(
+    request: Request, card_input: CardInput = Depends(validated_body(CardInput))
+):
     """
     Analyze the current game state and provide recommendations.
 
@@ -35,11 +71,14 @@ async def analyze_cards(card_input: CardInput):
     - **counting_system**: Card counting system to use (default: "hiLo")
     - **penetration**: Deck penetration (0-1, default: 0.5)
 
+    Bodies may be JSON or MessagePack, and the response is MessagePack when
+    the Accept header prefers it (see ``negotiation``).
+
     Returns:
         dict: Analysis results and recommendations
     """
     try:
-        return card_service.analyze_cards(card_input)
+        return negotiated_response(request, card_service.analyze_cards(card_input))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -53,39 +92,17 @@ async def analyze_cards(card_input: CardInput):
     description="Get a list of supported card counting systems",
     response_description="List of counting system names",
 )
-async def list_counting_systems():
+async def list_counting_systems(request: Request):
     """
     Get a list of all supported card counting systems.
 
+    The body is precomputed and carries an ETag; a request whose
+    If-None-Match matches it gets 304 Not Modified.
+
     Returns:
         dict: List of counting system names and their descriptions
     """
-    return {
-        "counting_systems": [
-            {"id": "hiLo", "name": "Hi-Lo", "description": "Balanced, level 1 system"},
-            {
-                "id": "hiOptI",
-                "name": "Hi-Opt I",
-                "description": "Balanced, level 1 system",
-            },
-            {
-                "id": "hiOptII",
-                "name": "Hi-Opt II",
-                "description": "Balanced, level 2 system",
-            },
-            {"id": "ko", "name": "KO (Knock-Out)", "description": "Unbalanced system"},
-            {
-                "id": "omegaII",
-                "name": "Omega II",
-                "description": "Balanced, level 2 system",
-            },
-            {
-                "id": "zenCount",
-                "name": "Zen Count",
-                "description": "Balanced, level 2 system",
-            },
-        ]
-    }
+    return COUNTING_SYSTEMS_RESPONSE.response(request)
 
 
 @router.get(
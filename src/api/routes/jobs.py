@@ -0,0 +1,140 @@
+"""
+Simulation job endpoints for the Blackjack Card Counter API.
+
+Long-running analyses are submitted as jobs, whose progress can be polled
+or streamed as server-sent events and whose results are kept for a limited
+time (see ``services.simulation_jobs``).
+"""
+import json
+import logging
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from ..middleware.request_validation import body_openapi, validated_body
+from ..models.schemas import SimulationJobRequest
+from ..services import simulation_jobs
+from ..services.simulation_jobs import FINISHED, SUCCEEDED, JobLimitExceeded
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _job_not_found(job_id: str) -> HTTPException:
+    return HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+
+
+@router.post(
+    "",
+    status_code=202,
+    summary="Submit a simulation job",
+    description="Queue a long-running simulation and return its job id",
+    response_description="The queued job",
+    openapi_extra=body_openapi(SimulationJobRequest),
+)
+async def submit_job(
+    job_request: SimulationJobRequest = Depends(validated_body(SimulationJobRequest)),
+):
+    """
+    Queue a simulation job.
+
+    - **kind**: ``decision`` for one hand, ``chart`` for every hand against
+      every dealer up card
+    - **player_hand**, **dealer_card**, **seen_cards**: The hand (decision jobs)
+    - **rounds**: Rounds simulated per action
+
+    Returns:
+        JSONResponse: The job's state, with its URL in ``Location``
+    """
+    try:
+        job = await simulation_jobs.job_manager.submit(job_request.model_dump())
+    except JobLimitExceeded:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many simulation jobs in progress",
+            headers={"Retry-After": "60"},
+        )
+    return JSONResponse(
+        status_code=202,
+        content=job.snapshot(),
+        headers={"Location": f"/api/jobs/{job.id}"},
+    )
+
+
+@router.get("/{job_id}", summary="Get a simulation job's state")
+async def get_job(job_id: str):
+    """
+    Return a job's status and progress.
+
+    Raises:
+        HTTPException: 404 for an unknown or expired job
+    """
+    snapshot = simulation_jobs.job_manager.get(job_id)
+    if snapshot is None:
+        raise _job_not_found(job_id)
+    return snapshot
+
+
+@router.get("/{job_id}/result", summary="Get a simulation job's result")
+async def get_job_result(job_id: str):
+    """
+    Return the result of a succeeded job.
+
+    Raises:
+        HTTPException: 404 for an unknown or expired job, 409 while the job
+            is running or if it failed or was cancelled
+    """
+    snapshot = simulation_jobs.job_manager.get(job_id)
+    if snapshot is None:
+        raise _job_not_found(job_id)
+    if snapshot["status"] != SUCCEEDED:
+        raise HTTPException(
+            status_code=409, detail=f"Job is {snapshot['status']}, not succeeded"
+        )
+    record = await simulation_jobs.job_manager.result(job_id)
+    if record is None:
+        raise _job_not_found(job_id)
+    return record
+
+
+@router.get("/{job_id}/events", summary="Stream a simulation job's progress")
+async def stream_job_events(job_id: str):
+    """
+    Stream a job's state as server-sent events until it finishes.
+
+    Each change is sent as a ``progress`` event; the last event is named
+    after the final status (``succeeded``, ``failed`` or ``cancelled``).
+
+    Raises:
+        HTTPException: 404 for an unknown or expired job
+    """
+    if simulation_jobs.job_manager.get(job_id) is None:
+        raise _job_not_found(job_id)
+
+    async def events() -> AsyncIterator[str]:
+        async for snapshot in simulation_jobs.job_manager.watch(job_id):
+            event = snapshot["status"] if snapshot["status"] in FINISHED else "progress"
+            yield f"event: {event}\ndata: {json.dumps(snapshot)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.delete("/{job_id}", status_code=202, summary="Cancel a simulation job")
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job; finished jobs are left as they are.
+
+    Raises:
+        HTTPException: 404 for an unknown or expired job
+    """
+    snapshot = simulation_jobs.job_manager.cancel(job_id)
+    if snapshot is None:
+        raise _job_not_found(job_id)
+    return snapshot
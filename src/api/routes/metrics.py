@@ -0,0 +1,27 @@
+"""
+Metrics endpoint for the Blackjack Card Counter API.
+
+This module exposes the collected metrics in the Prometheus text format.
+"""
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from ..metrics import CONTENT_TYPE_LATEST, REGISTRY
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    summary="Prometheus metrics",
+    description="Request latency, engine, cache, rate limiter and executor metrics",
+    include_in_schema=False,
+)
+async def metrics():
+    """
+    Render all registered metrics.
+
+    Returns:
+        Response: Metrics in the Prometheus text exposition format
+    """
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
@@ -4,11 +4,16 @@ Strategy endpoints for the Blackjack Card Counter API.
 This module handles all strategy-related API endpoints.
 """
 import logging
-from fastapi import APIRouter, HTTPException
+from functools import lru_cache
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import List, Dict, Optional
 
+from ..middleware.request_validation import body_openapi, validated_body
 from ..models.schemas import StrategyRequest
+from ..negotiation import negotiated_response
+from ..precomputed import PrecomputedResponse
 from ..services import strategy_service
+from .. import tables
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -21,8 +26,12 @@ router = APIRouter()
     summary="Get strategy recommendation",
     description="Get a strategy recommendation for the current hand",
     response_description="Strategy recommendation",
+    openapi_extra=body_openapi(StrategyRequest),
 )
-async def get_strategy_recommendation(strategy_request: StrategyRequest):
+async def get_strategy_recommendation(
+    request: Request,
+    strategy_request: StrategyRequest = Depends(validated_body(StrategyRequest)),
+):
     """
     Get a strategy recommendation for the current hand.
 
@@ -41,7 +50,10 @@ async def get_strategy_recommendation(strategy_request: StrategyRequest):
     """
     try:
         # Await the async function
-        return await strategy_service.get_strategy_recommendation(strategy_request)
+        return negotiated_response(
+            request,
+            await strategy_service.get_strategy_recommendation(strategy_request),
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -49,6 +61,31 @@ async def get_strategy_recommendation(strategy_request: StrategyRequest):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@lru_cache(maxsize=128)  # 80 rule sets pass validation
+def _basic_strategy_response(
+    decks: int,
+    dealer_hits_soft_17: bool,
+    double_after_split: bool,
+    late_surrender: bool,
+    double_any: bool,
+) -> PrecomputedResponse:
+    # In a real implementation, this would load the strategy table
+    # from a file or database based on the rules
+    return PrecomputedResponse(
+        {
+            "rules": {
+                "decks": decks,
+                "dealer_hits_soft_17": dealer_hits_soft_17,
+                "double_after_split": double_after_split,
+                "late_surrender": late_surrender,
+                "double_any": double_any,
+            },
+            "strategy": "Basic strategy table would be returned here based on rules",
+            "dealer_outcomes": tables.dealer_outcomes(decks, dealer_hits_soft_17),
+        }
+    )
+
+
 @router.get(
     "/basic-strategy",
     summary="Get basic strategy",
@@ -56,6 +93,7 @@ async def get_strategy_recommendation(strategy_request: StrategyRequest):
     response_description="Basic strategy table",
 )
 async def get_basic_strategy(
+    request: Request,
     decks: int = 6,
     dealer_hits_soft_17: bool = True,
     double_after_split: bool = True,
@@ -65,6 +103,9 @@ async def get_basic_strategy(
     """
     Get the basic strategy for the specified rules.
 
+    The body for each rule set is precomputed and carries an ETag; a request
+    whose If-None-Match matches it gets 304 Not Modified.
+
     Args:
         decks: Number of decks (1, 2, 4, 6, or 8)
         dealer_hits_soft_17: Whether the dealer hits on soft 17
@@ -73,7 +114,8 @@ async def get_basic_strategy(
         double_any: Whether doubling is allowed on any two cards
 
     Returns:
-        dict: Basic strategy table
+        dict: Basic strategy table and the dealer's final-total
+        probabilities for each upcard
     """
     # This is a simplified implementation. In a real application,
     # this would load the appropriate strategy table based on the rules.
@@ -82,18 +124,9 @@ async def get_basic_strategy(
         if decks not in [1, 2, 4, 6, 8]:
             raise ValueError("Number of decks must be 1, 2, 4, 6, or 8")
 
-        # In a real implementation, this would load the strategy table
-        # from a file or database based on the rules
-        return {
-            "rules": {
-                "decks": decks,
-                "dealer_hits_soft_17": dealer_hits_soft_17,
-                "double_after_split": double_after_split,
-                "late_surrender": late_surrender,
-                "double_any": double_any,
-            },
-            "strategy": "Basic strategy table would be returned here based on rules",
-        }
+        return _basic_strategy_response(
+            decks, dealer_hits_soft_17, double_after_split, late_surrender, double_any
+        ).response(request)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
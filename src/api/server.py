@@ -5,19 +5,33 @@ This module provides a FastAPI-based web service for blackjack strategy and card
 """
 from __future__ import annotations
 
+import json
 import logging
 import os
-from collections import defaultdict
-from typing import Dict, List, Literal, TypedDict, Any, cast
+from typing import Dict, List, Literal, Optional, TypedDict, Any, cast
 import math
+import time
 import numpy as np
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 
-from .decision_engine import BlackjackDecisionEngine, get_decision_recommendation
+from .cancellation import (
+    ClientDisconnected,
+    DeadlineExceeded,
+    run_until_disconnected,
+)
+from .coalescing import SingleFlight
+from .decision_engine import ENGINE_RULES, ENGINE_VERSION, BlackjackDecisionEngine
+from .decision_tiers import choose_tier, get_tiered_decision, record_tier_latency
+from .metrics import (
+    CACHE_REQUESTS,
+    ENGINE_REQUESTS_ABANDONED,
+    ENGINE_REQUESTS_DEGRADED,
+    ENGINE_REQUESTS_SHED,
+)
 from .middleware.error_handler import (
     BlackjackError,
     InvalidCardError,
@@ -25,9 +39,33 @@ from .middleware.error_handler import (
     InvalidDeckCountError,
     register_error_handlers,
 )
+from .middleware.instrumentation import InstrumentationMiddleware
+from .middleware.rate_limiter import rate_limit_middleware
 from .middleware.request_validation import (
     BlackjackRequest,
-    request_validation_middleware,
+    RequestValidationMiddleware,
+    body_openapi,
+    validated_body,
+)
+from .request_logging import (
+    configure_request_logging,
+    redact_headers,
+    request_logger,
+)
+from .negotiation import negotiated_response
+from .request_cost import charge_cache_lookup
+from .responses import FastJSONResponse, dumps
+from .result_store import ResultStore, store_version
+from .routes.metrics import router as metrics_router
+from .services.admission import engine_admission
+from .services.engine_batcher import decision_batcher
+from .services.engine_executor import engine_executor
+from .tables import TABLES_VERSION
+from .utils.card_utils import (
+    CARD_RANKS,
+    CARD_RANK_VALUES,
+    card_indices,
+    normalize_cards,
 )
 
 # Type aliases
@@ -67,12 +105,18 @@ def create_app() -> FastAPI:
         docs_url="/api/docs",
         redoc_url="/api/redoc",
         openapi_url="/api/openapi.json",
+        default_response_class=FastJSONResponse,
     )
 
     # Register middleware and error handlers
-    app.middleware("http")(request_validation_middleware)
+    app.add_middleware(RequestValidationMiddleware)
+    app.middleware("http")(rate_limit_middleware)
+    app.add_middleware(InstrumentationMiddleware)
     register_error_handlers(app)
 
+    app.include_router(metrics_router, tags=["monitoring"])
+    configure_request_logging()
+
     return app
 
 
@@ -116,21 +160,22 @@ class CardInput(BaseModel):
         0.75, gt=0, le=1.0, description="Deck penetration percentage"
     )
 
-    @field_validator("cards", mode="each")
+    @field_validator("cards")
     @classmethod
-    def validate_cards(cls, v):
+    def validate_cards(cls, cards):
         """Validate each card in the list."""
-        if v.upper() not in VALID_CARDS:
-            raise ValueError(f"Invalid card value: {v}")
-        return v.upper()
+        return normalize_cards(cards)
 
     @field_validator("dealer_card")
     @classmethod
     def validate_dealer_card(cls, v):
         """Validate dealer's up card."""
-        if v and v.upper() not in VALID_CARDS:
+        if not v:
+            return ""
+        try:
+            return normalize_cards([v])[0]
+        except ValueError:
             raise ValueError(f"Invalid dealer card: {v}")
-        return v.upper() if v else ""
 
     @field_validator("counting_system")
     @classmethod
@@ -166,13 +211,20 @@ class StrategyRequest(BaseModel):
     true_count: float = 0
     decks_remaining: float = 3.0
     counting_system: str = "hiLo"
+    max_latency_ms: Optional[float] = Field(
+        None, gt=0, description="Longest acceptable computation time, in milliseconds"
+    )
+    accuracy: Optional[Literal["table", "approximate", "exact", "simulation"]] = Field(
+        None, description="Least precise answer tier that is acceptable"
+    )
 
     @field_validator("dealer_card")
     @classmethod
     def validate_dealer_card(cls, v):
-        if v.upper() not in VALID_CARDS:
+        try:
+            return normalize_cards([v])[0]
+        except ValueError:
             raise ValueError(f"Invalid dealer card: {v}")
-        return v.upper()
 
 
 class BankrollRequest(BaseModel):
@@ -601,18 +653,21 @@ def calculate_advanced_probabilities(
     if not player_cards or not dealer_card:
         raise ValueError("Player cards and dealer card are required")
 
+    # Convert every card to an index once; no per-card string handling below
+    seen_indices = card_indices(cards_seen)
+    player_indices = card_indices(player_cards)
+    (dealer_index,) = card_indices([dealer_card])
+
     # Count seen cards
-    seen_counts: Dict[str, int] = defaultdict(int)
-    for card in cards_seen:
-        card_upper = card.upper()
-        if card_upper not in total_cards_per_deck:
-            raise ValueError(f"Invalid card in seen cards: {card}")
-        seen_counts[card_upper] += 1
+    seen_counts = [0] * len(CARD_RANKS)
+    for index in seen_indices:
+        seen_counts[index] += 1
 
     # Calculate remaining cards
-    remaining_cards: Dict[str, int] = {}
-    for card, count in total_cards_per_deck.items():
-        remaining_cards[card] = count * decks - seen_counts[card]
+    remaining_cards: Dict[str, int] = {
+        rank: total_cards_per_deck[rank] * decks - seen_counts[index]
+        for index, rank in enumerate(CARD_RANKS)
+    }
 
     # Calculate total remaining cards
     total_remaining = sum(remaining_cards.values())
@@ -621,23 +676,8 @@ def calculate_advanced_probabilities(
         raise ValueError("No cards remaining in the deck")
 
     # Calculate hand value
-    hand_value = 0
-    aces = 0
-
-    for card in player_cards:
-        try:
-            card_upper = card.upper()
-            if card_upper not in CARD_VALUES:
-                raise ValueError(f"Invalid card in player hand: {card}")
-
-            if card_upper == "A":
-                aces += 1
-                hand_value += 11
-            else:
-                hand_value += CARD_VALUES[card_upper]
-
-        except (KeyError, AttributeError) as e:
-            raise ValueError(f"Invalid card in player hand: {card}") from e
+    hand_value = sum(CARD_RANK_VALUES[index] for index in player_indices)
+    aces = player_indices.count(CARD_RANKS.index("A"))
 
     # Adjust for aces if needed
     while hand_value > 21 and aces > 0:
@@ -645,13 +685,7 @@ def calculate_advanced_probabilities(
         aces -= 1
 
     # Get dealer card value
-    try:
-        dealer_card_upper = dealer_card.upper()
-        if dealer_card_upper not in CARD_VALUES:
-            raise ValueError(f"Invalid dealer card: {dealer_card}")
-        dealer_card_value = CARD_VALUES[dealer_card_upper]
-    except (KeyError, AttributeError) as e:
-        raise ValueError(f"Invalid dealer card: {dealer_card}") from e
+    dealer_card_value = CARD_RANK_VALUES[dealer_index]
 
     # Calculate probabilities
     bust_prob = calculate_bust_probability(hand_value, remaining_cards, total_remaining)
@@ -885,6 +919,7 @@ def calculate_dealer_bust_probability(
 @app.post("/debug/analyze")
 async def debug_analyze_cards(request: Request):
     """Debug endpoint to inspect the raw request data"""
+    log = request_logger.for_request(request)
     try:
         # Get raw request body
         body = await request.body()
@@ -893,24 +928,22 @@ async def debug_analyze_cards(request: Request):
         # Get headers
         headers = dict(request.headers)
 
-        # Log the raw request
-        print("\n[DEBUG] Raw request data:")
-        print(f"Method: {request.method}")
-        print(f"URL: {request.url}")
-        print("Headers:")
-        for k, v in headers.items():
-            print(f"  {k}: {v}")
-        print(f"Body: {body_str}")
-
         # Try to parse the JSON
         try:
             json_data = await request.json()
-            print("\n[DEBUG] Parsed JSON data:")
-            print(json_data)
         except Exception as e:
-            print(f"\n[ERROR] Failed to parse JSON: {str(e)}")
+            log.debug("debug.analyze.invalid_json", error=str(e))
             json_data = None
 
+        log.debug(
+            "debug.analyze.request",
+            method=request.method,
+            url=str(request.url),
+            headers=redact_headers(headers),
+            body=body_str,
+            parsed_json=json_data,
+        )
+
         return {
             "status": "debug_info",
             "method": request.method,
@@ -920,33 +953,23 @@ async def debug_analyze_cards(request: Request):
             "parsed_json": json_data,
         }
     except Exception as e:
-        print(f"[ERROR] Debug endpoint error: {str(e)}")
+        log.error("debug.analyze.error", error=str(e))
         raise HTTPException(status_code=500, detail=f"Debug error: {str(e)}")
 
 
-@app.post("/analyze")
-async def analyze_cards(data: CardInput) -> Dict[str, Any]:
+@app.post("/analyze", openapi_extra=body_openapi(CardInput))
+async def analyze_cards(
+    request: Request, data: CardInput = Depends(validated_body(CardInput))
+) -> Response:
+    log = request_logger.for_request(request)
     try:
-        # Log the raw request data
-        print(f"\n[DEBUG] ===== NEW REQUEST TO /analyze =====")
-        print(f"[DEBUG] Received data object type: {type(data).__name__}")
-
-        # Convert Pydantic model to dict for inspection
-        data_dict = data.dict() if hasattr(data, "dict") else {}
-        print(f"[DEBUG] Data as dictionary: {data_dict}")
+        if log.enabled:
+            log.debug("analyze.request", data=data.model_dump())
 
         # Check if cards exist in the request
         if not hasattr(data, "cards") or not data.cards:
-            print("[ERROR] No cards provided in request")
             raise HTTPException(status_code=400, detail="No cards provided")
 
-        print(f"[DEBUG] Cards: {data.cards}")
-        print(f"[DEBUG] Dealer card: {getattr(data, 'dealer_card', 'Not found')}")
-        print(f"[DEBUG] Decks: {getattr(data, 'decks', 'Not found')}")
-        print(
-            f"[DEBUG] Counting system: {getattr(data, 'counting_system', 'Not found')}"
-        )
-
         # Ensure all required fields are present with defaults if needed
         dealer_card = getattr(data, "dealer_card", "A")
         decks = float(getattr(data, "decks", 6.0))
@@ -957,26 +980,18 @@ async def analyze_cards(data: CardInput) -> Dict[str, Any]:
         player_total = 0
         aces = 0
 
-        # Calculate initial total and count aces
-        for card in player_cards:
-            if card.upper() == "A":
-                player_total += 11
+        # Calculate initial total and count aces; CardInput already
+        # normalized the cards, so this is a plain table lookup
+        for index in card_indices(player_cards):
+            player_total += CARD_RANK_VALUES[index]
+            if CARD_RANKS[index] == "A":
                 aces += 1
-            elif card.upper() in ["K", "Q", "J"]:
-                player_total += 10
-            else:
-                try:
-                    player_total += int(card)
-                except (ValueError, TypeError):
-                    print(f"[WARNING] Invalid card value: {card}, treating as 0")
 
         # Adjust for aces if total is over 21
         while player_total > 21 and aces > 0:
             player_total -= 10
             aces -= 1
 
-        print(f"[DEBUG] Player's hand value: {player_total}")
-
         # Calculate running count and true count
         running_count = calculate_running_count(player_cards, counting_system)
         remaining_cards = decks * 52 - len(player_cards)
@@ -1021,21 +1036,19 @@ async def analyze_cards(data: CardInput) -> Dict[str, Any]:
             else "low",
         }
 
-        print(f"[DEBUG] Successfully processed request. Result: {result}")
-        return result
+        log.debug("analyze.result", result=result)
+        return negotiated_response(request, result)
 
     except Exception as e:
         error_msg = f"Error in /analyze endpoint: {str(e)}"
-        print(f"[ERROR] {error_msg}")
-        print(f"[ERROR] Exception type: {type(e).__name__}")
-        import traceback
-
-        traceback.print_exc()
+        log.error("analyze.error", error=str(e), error_type=type(e).__name__)
         raise HTTPException(status_code=500, detail=error_msg)
 
 
-@app.post("/bankroll")
-async def calculate_bankroll_management(data: BankrollRequest) -> Dict[str, Any]:
+@app.post("/bankroll", openapi_extra=body_openapi(BankrollRequest))
+async def calculate_bankroll_management(
+    data: BankrollRequest = Depends(validated_body(BankrollRequest)),
+) -> Dict[str, Any]:
     """Calculate optimal bankroll management"""
     expected_value = calculate_expected_value(data.true_count)
     kelly_analysis = calculate_kelly_bet(
@@ -1062,8 +1075,25 @@ async def calculate_bankroll_management(data: BankrollRequest) -> Dict[str, Any]
     }
 
 
-@app.post("/strategy")
-async def get_optimal_strategy(data: StrategyRequest) -> Dict[str, Any]:
+# Engine computations in flight, keyed by the canonical strategy request
+decision_flight = SingleFlight("decision")
+
+# Engine answers kept on disk across restarts, keyed by tier and request
+decision_store = ResultStore(
+    "decisions",
+    store_version(ENGINE_VERSION, dict(ENGINE_RULES, tables_version=TABLES_VERSION)),
+)
+
+# Longest a strategy request waits for the engine before its work is
+# cancelled and it is answered with 504
+STRATEGY_DEADLINE_MS = float(os.getenv("STRATEGY_DEADLINE_MS", "10000"))
+
+
+@app.post("/strategy", openapi_extra=body_openapi(StrategyRequest))
+async def get_optimal_strategy(
+    request: Request,
+    data: StrategyRequest = Depends(validated_body(StrategyRequest)),
+) -> Response:
     """Get mathematically optimal strategy decision"""
     try:
         # Validate input
@@ -1076,15 +1106,115 @@ async def get_optimal_strategy(data: StrategyRequest) -> Dict[str, Any]:
         # In a real implementation, this would include all cards seen in the current shoe
         seen_cards = data.player_hand + [data.dealer_card]
 
-        # Get optimal decision from the mathematical engine
-        decision = get_decision_recommendation(
-            player_cards=data.player_hand,
-            dealer_card=data.dealer_card,
-            seen_cards=seen_cards,
-            true_count=data.true_count,
-            num_decks=int(data.decks_remaining * 1.5),  # Approximate total decks
+        num_decks = int(data.decks_remaining * 1.5)  # Approximate total decks
+        tier = choose_tier(data.max_latency_ms, data.accuracy)
+        flight_key = (
+            tuple(sorted(data.player_hand)),
+            data.dealer_card,
+            data.true_count,
+            num_decks,
         )
 
+        # Engine answers computed before, possibly by an earlier process
+        stored = None
+        if tier in ("exact", "simulation"):
+            store_key = ":".join(
+                [tier, ",".join(flight_key[0]), *map(str, flight_key[1:])]
+            )
+            stored = decision_store.get(store_key)
+            CACHE_REQUESTS.labels("decision", "miss" if stored is None else "hit").inc()
+            charge_cache_lookup(stored is not None)
+
+        # Turn new engine work away under overload; joining a simulation
+        # already in flight adds none
+        degraded = False
+        if (
+            stored is None
+            and tier in ("exact", "simulation")
+            and not (tier == "simulation" and decision_flight.in_flight(flight_key))
+            and engine_admission.overloaded()
+        ):
+            if data.accuracy in ("exact", "simulation"):
+                ENGINE_REQUESTS_SHED.labels("/strategy").inc()
+                retry_after = engine_admission.retry_after()
+                return JSONResponse(
+                    status_code=503,
+                    content={
+                        "detail": "Decision engine is overloaded",
+                        "retry_after": retry_after,
+                    },
+                    headers={"Retry-After": str(retry_after)},
+                )
+            ENGINE_REQUESTS_DEGRADED.labels("/strategy").inc()
+            tier, degraded = "approximate", True
+
+        if stored is not None:
+            decision = json.loads(stored)
+        elif tier == "table" or tier == "approximate":
+            decision = get_tiered_decision(
+                tier,
+                data.player_hand,
+                data.dealer_card,
+                seen_cards,
+                data.true_count,
+                num_decks,
+            )
+        else:
+            # Engine work stops when the client disconnects or the deadline
+            # passes
+            deadline = STRATEGY_DEADLINE_MS / 1000
+            try:
+                if tier == "exact":
+                    with engine_admission.admitted():
+                        decision = await run_until_disconnected(
+                            request,
+                            engine_executor.run(
+                                get_tiered_decision,
+                                tier,
+                                data.player_hand,
+                                data.dealer_card,
+                                seen_cards,
+                                data.true_count,
+                                num_decks,
+                            ),
+                            deadline,
+                        )
+                else:
+                    # Get optimal decision from the mathematical engine,
+                    # batched with other requests off the event loop;
+                    # identical requests share one computation
+                    start = time.perf_counter()
+                    with engine_admission.admitted():
+                        shared = await run_until_disconnected(
+                            request,
+                            decision_flight.run(
+                                flight_key,
+                                lambda: decision_batcher.recommend(
+                                    player_cards=data.player_hand,
+                                    dealer_card=data.dealer_card,
+                                    seen_cards=seen_cards,
+                                    true_count=data.true_count,
+                                    num_decks=num_decks,
+                                ),
+                            ),
+                            deadline,
+                        )
+                    record_tier_latency(tier, (time.perf_counter() - start) * 1000)
+                    decision = dict(shared, tier=tier)
+                decision_store.put(store_key, dumps(decision))
+            except ClientDisconnected:
+                ENGINE_REQUESTS_ABANDONED.labels("/strategy", "disconnect").inc()
+                # The client is gone; 499 (client closed request) is for logs
+                return Response(status_code=499)
+            except DeadlineExceeded:
+                ENGINE_REQUESTS_ABANDONED.labels("/strategy", "deadline").inc()
+                return JSONResponse(
+                    status_code=504,
+                    content={"detail": "Strategy calculation timed out"},
+                )
+        if degraded:
+            decision["degraded"] = True
+
         # Add additional context
         decision["counting_system"] = data.counting_system
         decision["decks_remaining"] = data.decks_remaining
@@ -1109,7 +1239,7 @@ async def get_optimal_strategy(data: StrategyRequest) -> Dict[str, Any]:
             else "low",
         }
 
-        return decision
+        return negotiated_response(request, decision)
 
     except Exception as e:
         raise HTTPException(
@@ -3,7 +3,7 @@ Blackjack Card Counter API
 
 This module provides a FastAPI-based web service for blackjack strategy and card counting.
 """
-from fastapi import FastAPI, Request, HTTPException, status
+from fastapi import Depends, FastAPI, Request, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
@@ -28,7 +28,11 @@ from .middleware.error_handler import (
     InvalidDeckCountError,
     InvalidCountingSystemError,
 )
-from .middleware.request_validation import request_validation_middleware
+from .middleware.request_validation import (
+    RequestValidationMiddleware,
+    body_openapi,
+    validated_body,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -52,7 +56,7 @@ def create_app() -> FastAPI:
     )
 
     # Register middleware
-    app.middleware("http")(request_validation_middleware)
+    app.add_middleware(RequestValidationMiddleware)
     register_error_handlers(app)
 
     # Configure CORS
@@ -246,8 +250,8 @@ async def root():
         return f.read()
 
 
-@app.post("/analyze")
-async def analyze_cards(data: CardInput):
+@app.post("/analyze", openapi_extra=body_openapi(CardInput))
+async def analyze_cards(data: CardInput = Depends(validated_body(CardInput))):
     """
     Analyze the current game state and provide recommendations.
 
@@ -319,8 +323,10 @@ async def analyze_cards(data: CardInput):
     }
 
 
-@app.post("/strategy")
-async def get_strategy(data: StrategyRequest):
+@app.post("/strategy", openapi_extra=body_openapi(StrategyRequest))
+async def get_strategy(
+    data: StrategyRequest = Depends(validated_body(StrategyRequest)),
+):
     """
     Get optimal strategy for the current hand.
 
@@ -342,8 +348,10 @@ async def get_strategy(data: StrategyRequest):
     return decision
 
 
-@app.post("/bankroll")
-async def manage_bankroll(data: BankrollRequest):
+@app.post("/bankroll", openapi_extra=body_openapi(BankrollRequest))
+async def manage_bankroll(
+    data: BankrollRequest = Depends(validated_body(BankrollRequest)),
+):
     """
     Calculate optimal bet size based on bankroll and true count.
 
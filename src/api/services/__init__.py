@@ -2,14 +2,32 @@
 Services package for the Blackjack Card Counter API.
 
 This package contains all the business logic services used by the API.
+
+Names are loaded on first access (PEP 562), so importing one service module
+(e.g. ``engine_executor`` in a worker) does not import the others.
 """
-from .card_service import analyze_cards
-from .strategy_service import get_strategy_recommendation
-from .bankroll_service import manage_bankroll, calculate_bankroll_needed
-
-__all__ = [
-    "analyze_cards",
-    "get_strategy_recommendation",
-    "manage_bankroll",
-    "calculate_bankroll_needed",
-]
+import importlib
+from typing import Any, Dict
+
+# Public name -> submodule that defines it
+_LAZY_ATTRIBUTES: Dict[str, str] = {
+    "analyze_cards": ".card_service",
+    "get_strategy_recommendation": ".strategy_service",
+    "manage_bankroll": ".bankroll_service",
+    "calculate_bankroll_needed": ".bankroll_service",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
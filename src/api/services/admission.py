@@ -0,0 +1,75 @@
+"""
+Admission control for decision engine work.
+
+The engine executor queues every job it is given. Under overload the queue
+grows without bound, every request waits longer than its client will, and
+the service stops answering anything in time. :class:`AdmissionController`
+decides before work is queued: once too many engine requests are in flight,
+or the oldest queued engine job has waited too long, new requests are
+degraded to answers from the precomputed tables, or, if the client
+insists on an engine answer, rejected with 503 and ``Retry-After``.
+
+Environment variables:
+    ENGINE_MAX_IN_FLIGHT: Engine requests allowed in flight at once
+        (default: 256)
+    ENGINE_MAX_QUEUE_WAIT_MS: Longest the oldest queued engine job may
+        wait before new requests are turned away (default: 500)
+"""
+import contextlib
+import math
+import os
+from typing import Iterator
+
+from ..metrics import ENGINE_ADMITTED
+from .engine_executor import EngineExecutor, engine_executor
+
+ENGINE_MAX_IN_FLIGHT = int(os.getenv("ENGINE_MAX_IN_FLIGHT", "256"))
+ENGINE_MAX_QUEUE_WAIT_MS = float(os.getenv("ENGINE_MAX_QUEUE_WAIT_MS", "500"))
+
+
+class AdmissionController:
+    """
+    Track engine requests in flight and report when the engine is overloaded.
+
+    Args:
+        max_in_flight: Requests allowed in flight at once
+        max_queue_wait_ms: Longest the oldest queued job may wait
+        executor: Executor whose queue is watched
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = ENGINE_MAX_IN_FLIGHT,
+        max_queue_wait_ms: float = ENGINE_MAX_QUEUE_WAIT_MS,
+        executor: EngineExecutor = engine_executor,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queue_wait = max_queue_wait_ms / 1000
+        self.executor = executor
+        self.in_flight = 0
+
+    def overloaded(self) -> bool:
+        """Return whether new engine requests should be turned away."""
+        return (
+            self.in_flight >= self.max_in_flight
+            or self.executor.queue_wait() > self.max_queue_wait
+        )
+
+    def retry_after(self) -> int:
+        """Return the seconds a turned-away client should wait, at least 1."""
+        return max(1, math.ceil(self.executor.queue_wait()))
+
+    @contextlib.contextmanager
+    def admitted(self) -> Iterator[None]:
+        """Count the enclosed engine request as in flight."""
+        self.in_flight += 1
+        ENGINE_ADMITTED.inc()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            ENGINE_ADMITTED.dec()
+
+
+# Shared controller used by the API endpoints
+engine_admission = AdmissionController()
@@ -0,0 +1,156 @@
+"""
+Micro-batching in front of the decision engine.
+
+Under load, many different strategy requests reach the engine within a few
+milliseconds of each other. Submitted one by one, each pays for its own
+executor hop and its own kernel call. :class:`DecisionBatcher` instead holds
+requests for a short window, or until a batch is full, and evaluates the
+whole batch with one :func:`get_decision_recommendations` call on the engine
+executor, where the compiled kernel simulates all of it without holding the
+GIL. Each request waits at most one window longer, in exchange for much
+higher throughput. A caller that is cancelled trips its request's
+cancellation token, and the engine drops that request from the batch.
+
+Without the compiled kernel, the engine evaluates a batch one request after
+another in a single executor job, so the last request would wait for all
+the others. The batcher then runs each request as its own executor job.
+
+Environment variables:
+    ENGINE_BATCH_WINDOW_MS: How long to collect requests before running a
+        batch (default: 2)
+    ENGINE_BATCH_SIZE: Run a batch as soon as it has this many requests
+        (default: 64)
+"""
+import asyncio
+import contextvars
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .. import simulation_kernel
+from ..cancellation import CancellationToken
+from ..decision_engine import DEFAULT_SIMULATION_ROUNDS, get_decision_recommendations
+from ..metrics import ENGINE_BATCH_SIZES
+from ..request_cost import charge_rounds
+from .engine_executor import EngineExecutor, engine_executor
+
+ENGINE_BATCH_WINDOW_MS = float(os.getenv("ENGINE_BATCH_WINDOW_MS", "2"))
+ENGINE_BATCH_MAX_SIZE = int(os.getenv("ENGINE_BATCH_SIZE", "64"))
+
+
+class DecisionBatcher:
+    """
+    Collect engine requests and evaluate them in batches.
+
+    Args:
+        window_ms: Milliseconds to wait for more requests after the first
+        max_size: Number of requests that triggers a batch immediately
+        executor: Runs the batches off the event loop
+        batched: Evaluate a batch in one executor job, rather than one job
+            per request (default: whether the compiled kernel is available)
+    """
+
+    def __init__(
+        self,
+        window_ms: float = ENGINE_BATCH_WINDOW_MS,
+        max_size: int = ENGINE_BATCH_MAX_SIZE,
+        executor: EngineExecutor = engine_executor,
+        batched: Optional[bool] = None,
+    ) -> None:
+        if batched is None:
+            batched = simulation_kernel.NUMBA_AVAILABLE
+        self.window = window_ms / 1000
+        self.max_size = max(max_size, 1)
+        self.executor = executor
+        self.batched = batched
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches: Set[asyncio.Task] = set()
+
+    async def recommend(
+        self,
+        player_cards: List[str],
+        dealer_card: str,
+        seen_cards: List[str],
+        true_count: float = 0.0,
+        num_decks: int = 6,
+    ) -> Dict:
+        """
+        Get a decision recommendation as part of the next batch.
+
+        Takes the arguments of :func:`get_decision_recommendation` and
+        returns its result. The simulated rounds are charged to the caller's
+        request cost.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        token = CancellationToken()
+        self._pending.append(
+            (
+                {
+                    "player_cards": player_cards,
+                    "dealer_card": dealer_card,
+                    "seen_cards": seen_cards,
+                    "true_count": true_count,
+                    "num_decks": num_decks,
+                    "cancellation": token,
+                },
+                future,
+            )
+        )
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        try:
+            decision = await future
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+        # A busted hand is decided without simulating anything
+        if decision["player_value"] <= 21:
+            charge_rounds(
+                DEFAULT_SIMULATION_ROUNDS * len(decision["all_expected_values"])
+            )
+        return decision
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Callers cancelled while waiting for the window need no answer
+        batch = [item for item in self._pending if not item[1].done()]
+        self._pending = []
+        # Without the kernel, a batch is only as fast as its requests one
+        # after another; let the executor run them side by side instead
+        groups = [batch] if self.batched else [[item] for item in batch]
+        for group in filter(None, groups):
+            # Start from an empty context: the engine must not charge the
+            # batch to whichever request happened to open it
+            task = contextvars.Context().run(
+                asyncio.get_running_loop().create_task, self._run(group)
+            )
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        ENGINE_BATCH_SIZES.observe(len(batch))
+        try:
+            decisions = await self.executor.run(
+                get_decision_recommendations, [request for request, _ in batch]
+            )
+        except Exception as error:
+            if len(batch) > 1:
+                # Retry one by one so a bad request fails only its own caller
+                await asyncio.gather(*(self._run([item]) for item in batch))
+            elif not batch[0][1].done():
+                batch[0][1].set_exception(error)
+            return
+
+        for (_, future), decision in zip(batch, decisions):
+            if not future.done():  # Skip callers that were cancelled
+                future.set_result(decision)
+
+
+# Shared batcher used by the API endpoints
+decision_batcher = DecisionBatcher()
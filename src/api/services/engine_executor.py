@@ -0,0 +1,131 @@
+"""
+Executor for running the decision engine off the event loop.
+
+The Monte Carlo engine is CPU bound and takes on the order of a second per
+decision. Running it directly inside an ``async def`` endpoint blocks every
+other request, so endpoints submit engine work to a bounded thread pool
+through :class:`EngineExecutor`, which also publishes the queue depth and
+the number of jobs in flight as metrics.
+
+Each job runs with its own cancellation token (see ``cancellation``). When
+the task awaiting a job is cancelled, a job still in the queue is dropped
+and a running job's token is tripped, so the engine stops at its next check.
+"""
+import asyncio
+import contextvars
+import functools
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from ..cancellation import CancellationToken, set_cancellation_token
+from ..metrics import EXECUTOR_IN_FLIGHT, EXECUTOR_QUEUE_DEPTH, EXECUTOR_QUEUE_WAIT
+
+T = TypeVar("T")
+
+# Number of worker threads for engine jobs
+ENGINE_WORKERS = int(os.getenv("ENGINE_WORKERS", min(4, os.cpu_count() or 1)))
+
+
+class EngineExecutor:
+    """Bounded thread pool for engine jobs with queue depth accounting."""
+
+    def __init__(self, max_workers: int = ENGINE_WORKERS) -> None:
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Submission times of queued jobs by job id, oldest first; the pool
+        # starts jobs in submission order
+        self._queued: Dict[int, float] = {}
+        self._queue_lock = threading.Lock()
+        self._job_ids = itertools.count()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="engine"
+                    )
+        return self._executor
+
+    def queue_wait(self) -> float:
+        """Return how many seconds the oldest queued job has been waiting."""
+        with self._queue_lock:
+            oldest = next(iter(self._queued.values()), None)
+        return 0.0 if oldest is None else time.perf_counter() - oldest
+
+    def _dequeue(self, job_id: int) -> Optional[float]:
+        # Whoever removes the job first, the worker or a cancelled caller,
+        # accounts for it leaving the queue
+        with self._queue_lock:
+            submitted = self._queued.pop(job_id, None)
+        if submitted is not None:
+            EXECUTOR_QUEUE_DEPTH.dec()
+        return submitted
+
+    def _run_job(
+        self,
+        job_id: int,
+        token: CancellationToken,
+        func: Callable[..., T],
+        *args: Any,
+        **kwargs: Any,
+    ) -> T:
+        submitted = self._dequeue(job_id)
+        if submitted is not None:
+            EXECUTOR_QUEUE_WAIT.observe(time.perf_counter() - submitted)
+        token.check()
+        EXECUTOR_IN_FLIGHT.inc()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            EXECUTOR_IN_FLIGHT.dec()
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run ``func(*args, **kwargs)`` on a worker thread and await the result.
+
+        Args:
+            func: Synchronous, CPU-bound callable
+            *args: Positional arguments for ``func``
+            **kwargs: Keyword arguments for ``func``
+
+        Returns:
+            The return value of ``func``
+        """
+        loop = asyncio.get_running_loop()
+        job_id = next(self._job_ids)
+        with self._queue_lock:
+            self._queued[job_id] = time.perf_counter()
+        EXECUTOR_QUEUE_DEPTH.inc()
+        # Run in a copy of the caller's context so per-request state, such as
+        # the request cost charged by the engine, follows the job
+        context = contextvars.copy_context()
+        token = CancellationToken()
+        context.run(set_cancellation_token, token)
+        job = functools.partial(
+            context.run, self._run_job, job_id, token, func, *args, **kwargs
+        )
+        try:
+            return await loop.run_in_executor(self._get_executor(), job)
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+        finally:
+            # Left over if the job never started
+            self._dequeue(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+# Shared executor used by the API endpoints
+engine_executor = EngineExecutor()
@@ -0,0 +1,567 @@
+"""
+Background simulation jobs.
+
+Some analyses take far longer than an HTTP request can wait: a decision
+simulated over millions of rounds, or a whole strategy chart. They run as
+jobs instead. The client submits a spec and gets a job id back at once,
+follows the progress as server-sent events, and fetches the result when
+the job is done.
+
+Jobs run in a pool of worker processes, so heavy analysis neither holds the
+API process's GIL nor queues behind interactive requests on the engine
+executor. Workers report progress over a queue that a thread in the API
+process forwards to the event loop, and write each result as JSON to the
+job directory, where a periodic sweep deletes it once it is older than
+``JOB_RESULT_TTL_SECONDS``. A running job is cancelled through a marker
+file that its worker checks between chunks of work.
+
+A job is tracked by the API process that accepted it, but the server runs
+several. That process also writes the job's state next to its result, so
+every process sharing the job directory can report the job's progress,
+stream it by polling the file, and cancel the job through its marker.
+
+Environment variables:
+    JOB_WORKERS: Worker processes for jobs (default: 1)
+    JOB_MAX_ACTIVE: Jobs queued or running at once (default: 16)
+    JOB_RESULTS_DIR: Directory for job results (default:
+        ``blackjack-jobs-<uid>`` in the system temp directory, private to
+        the user)
+    JOB_RESULT_TTL_SECONDS: How long finished jobs and their results are
+        kept (default: 3600)
+"""
+import asyncio
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..cancellation import ComputationCancelled
+from ..metrics import SIMULATION_JOBS_ACTIVE, SIMULATION_JOBS_FINISHED
+from ..utils.paths import private_temp_directory
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_MAX_ACTIVE = int(os.getenv("JOB_MAX_ACTIVE", "16"))
+JOB_RESULTS_DIR = os.getenv("JOB_RESULTS_DIR")
+JOB_RESULT_TTL_SECONDS = float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+
+# Rounds per action simulated unless the spec says otherwise; a chart
+# simulates each hand as often as the engine does by default
+DEFAULT_JOB_ROUNDS = {"decision": 1_000_000, "chart": 10_000}
+
+# Rounds a worker simulates between progress reports and cancellation checks
+JOB_CHUNK_ROUNDS = 10000
+
+# Minimum seconds between two progress reports of one job
+_PROGRESS_INTERVAL = 0.1
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = (
+    "queued",
+    "running",
+    "succeeded",
+    "failed",
+    "cancelled",
+)
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Hands of a strategy chart: hard 5-17, soft 13-20 and every pair
+CHART_HANDS: List[List[str]] = (
+    [[str(total - 2), "2"] for total in range(5, 12)]
+    + [["10", str(total - 10)] for total in range(12, 18)]
+    + [["A", str(card)] for card in range(2, 10)]
+    + [[card, card] for card in ("2", "3", "4", "5", "6", "7", "8", "9", "10", "A")]
+)
+UPCARDS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "A"]
+
+
+class JobLimitExceeded(Exception):
+    """Raised when ``JOB_MAX_ACTIVE`` jobs are already queued or running."""
+
+
+def _result_path(directory: str, job_id: str) -> str:
+    return os.path.join(directory, f"{job_id}.json")
+
+
+def _cancel_path(directory: str, job_id: str) -> str:
+    return os.path.join(directory, f"{job_id}.cancel")
+
+
+def _state_path(directory: str, job_id: str) -> str:
+    return os.path.join(directory, f"{job_id}.state.json")
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    # Readers never see a partly written file
+    os.replace(path + ".tmp", path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+# Progress queue of a worker process, set by _init_worker
+_progress_queue: Optional[Any] = None
+
+
+def _init_worker(progress_queue: Any) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+class _Progress:
+    """Progress reports and cancellation checks of a job in its worker."""
+
+    def __init__(self, job_id: str, total: int, cancel_path: str) -> None:
+        self.job_id = job_id
+        self.total = total
+        self.cancel_path = cancel_path
+        self.done = 0
+        self.reported = 0.0
+        self.check()
+        self._report()
+
+    def check(self) -> None:
+        if os.path.exists(self.cancel_path):
+            raise ComputationCancelled()
+
+    def _report(self) -> None:
+        self.reported = time.monotonic()
+        if _progress_queue is not None:
+            _progress_queue.put((self.job_id, self.done, self.total))
+
+    def advance(self) -> None:
+        """Count one unit of work done, then stop if the job was cancelled."""
+        self.done += 1
+        if (
+            self.done == self.total
+            or time.monotonic() - self.reported >= _PROGRESS_INTERVAL
+        ):
+            self._report()
+        self.check()
+
+
+# The engine, and with it Numba, is imported by the worker processes only;
+# the API process never needs it for jobs
+
+
+def _simulate_decision(
+    spec: Dict[str, Any], job_id: str, cancel_path: str
+) -> Dict[str, Any]:
+    from ..decision_engine import BlackjackDecisionEngine, count_adjustment
+
+    engine = BlackjackDecisionEngine(num_decks=spec["num_decks"])
+    player_cards = spec["player_hand"]
+    seen_cards = spec["seen_cards"]
+    remaining_cards = engine.get_remaining_cards(seen_cards)
+    actions = engine.available_actions(player_cards)
+    full, rest = divmod(spec["rounds"], JOB_CHUNK_ROUNDS)
+    chunks = [JOB_CHUNK_ROUNDS] * full + ([rest] if rest else [])
+
+    progress = _Progress(job_id, len(actions) * len(chunks), cancel_path)
+    expected_values = {"stand": -1.0}
+    if actions:
+        expected_values = {}
+        for action in actions:
+            total = 0.0
+            for rounds in chunks:
+                engine.simulation_rounds = rounds
+                total += rounds * engine.simulate_player_action(
+                    player_cards, action, spec["dealer_card"], remaining_cards
+                )
+                progress.advance()
+            expected_values[action] = total / spec["rounds"] + count_adjustment(
+                spec["true_count"]
+            )
+    return engine.build_decision(
+        player_cards,
+        spec["dealer_card"],
+        seen_cards,
+        spec["true_count"],
+        expected_values,
+    )
+
+
+def _strategy_chart(
+    spec: Dict[str, Any], job_id: str, cancel_path: str
+) -> Dict[str, Any]:
+    from ..decision_engine import BlackjackDecisionEngine
+
+    engine = BlackjackDecisionEngine(
+        num_decks=spec["num_decks"], simulation_rounds=spec["rounds"]
+    )
+    progress = _Progress(job_id, len(CHART_HANDS) * len(UPCARDS), cancel_path)
+    chart: Dict[str, Dict[str, Any]] = {}
+    for hand in CHART_HANDS:
+        row = chart[",".join(hand)] = {}
+        for upcard in UPCARDS:
+            expected_values = engine.calculate_expected_values(
+                hand, upcard, hand + [upcard], spec["true_count"]
+            )
+            row[upcard] = {
+                "action": max(expected_values, key=expected_values.get),
+                "expected_values": expected_values,
+            }
+            progress.advance()
+    return {"hands": chart}
+
+
+def run_job(job_id: str, spec: Dict[str, Any], directory: str) -> str:
+    """
+    Run a job in a worker process and write its result file.
+
+    Args:
+        job_id: Id of the job
+        spec: Normalized job spec, see :meth:`JobManager.submit`
+        directory: Directory for the result file
+
+    Returns:
+        str: Path of the result file
+
+    Raises:
+        ComputationCancelled: If the job was cancelled
+    """
+    cancel_path = _cancel_path(directory, job_id)
+    if spec["kind"] == "chart":
+        result = _strategy_chart(spec, job_id, cancel_path)
+    else:
+        result = _simulate_decision(spec, job_id, cancel_path)
+
+    path = _result_path(directory, job_id)
+    _write_json(
+        path,
+        {"id": job_id, "spec": spec, "result": result, "finished_at": time.time()},
+    )
+    return path
+
+
+class Job:
+    """State of one job, as the API process sees it."""
+
+    def __init__(self, job_id: str, spec: Dict[str, Any]) -> None:
+        self.id = job_id
+        self.spec = spec
+        self.status = QUEUED
+        self.done = 0
+        self.total = 0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.future: Optional[asyncio.Future] = None
+        # Replaced on every change; watchers wait on the one they saw
+        self.changed = asyncio.Event()
+
+    def touch(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the job's state in the API's response format."""
+        return {
+            "id": self.id,
+            "kind": self.spec["kind"],
+            "status": self.status,
+            "progress": self.done / self.total if self.total else 0.0,
+            "done": self.done,
+            "total": self.total,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Queue simulation jobs on a process pool and track their progress.
+
+    Args:
+        workers: Worker processes
+        directory: Directory for result files (default: ``JOB_RESULTS_DIR``,
+            or a private directory in the temp directory)
+        ttl: Seconds finished jobs and their results are kept
+        max_active: Jobs queued or running at once
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        directory: Optional[str] = JOB_RESULTS_DIR,
+        ttl: float = JOB_RESULT_TTL_SECONDS,
+        max_active: int = JOB_MAX_ACTIVE,
+    ) -> None:
+        self.workers = max(workers, 1)
+        self._directory = directory
+        self.ttl = ttl
+        self.max_active = max_active
+        self._jobs: Dict[str, Job] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._progress_queue: Optional[Any] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sweeper: Optional[asyncio.Task] = None
+
+    @property
+    def directory(self) -> str:
+        """Directory for result files, created on first use."""
+        if self._directory is None:
+            self._directory = private_temp_directory(
+                "blackjack-jobs", "JOB_RESULTS_DIR"
+            )
+        return self._directory
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned, not forked: the API process runs threads whose locks
+            # a forked child could inherit in a locked state
+            context = multiprocessing.get_context("spawn")
+            self._progress_queue = context.Queue()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self._progress_queue,),
+            )
+            self._loop = asyncio.get_running_loop()
+            threading.Thread(
+                target=self._read_progress,
+                args=(self._progress_queue, self._loop),
+                name="job-progress",
+                daemon=True,
+            ).start()
+        return self._pool
+
+    def _read_progress(self, progress_queue: Any, loop: asyncio.AbstractEventLoop):
+        while True:
+            message = progress_queue.get()
+            if message is None:
+                return
+            try:
+                loop.call_soon_threadsafe(self._on_progress, *message)
+            except RuntimeError:  # The loop is closed
+                return
+
+    def _publish(self, job: Job) -> None:
+        # Wake this process's watchers, and let the other processes see the
+        # change through the state file
+        job.touch()
+        try:
+            _write_json(_state_path(self.directory, job.id), job.snapshot())
+        except OSError as e:
+            logger.warning(f"Could not write the state of job {job.id}: {e!r}")
+
+    def _on_progress(self, job_id: str, done: int, total: int) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None and job.status not in FINISHED:
+            job.status, job.done, job.total = RUNNING, done, total
+            self._publish(job)
+
+    def _on_done(self, job: Job, future: asyncio.Future) -> None:
+        if future.cancelled():
+            job.status = CANCELLED
+        elif isinstance(future.exception(), ComputationCancelled):
+            job.status = CANCELLED
+        elif future.exception() is not None:
+            job.status = FAILED
+            job.error = str(future.exception()) or type(future.exception()).__name__
+            logger.error(f"Simulation job {job.id} failed: {job.error}")
+        else:
+            job.status = SUCCEEDED
+            job.done = job.total
+        job.finished_at = time.time()
+        SIMULATION_JOBS_ACTIVE.dec()
+        SIMULATION_JOBS_FINISHED.labels(job.status).inc()
+        self._publish(job)
+
+    def active(self) -> int:
+        """Return the number of jobs queued or running."""
+        return sum(job.status not in FINISHED for job in self._jobs.values())
+
+    async def submit(self, spec: Dict[str, Any]) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            spec: ``kind`` (``decision`` or ``chart``), ``rounds`` per
+                action, ``num_decks`` and ``true_count``; decision jobs also
+                take ``player_hand``, ``dealer_card`` and ``seen_cards``
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            JobLimitExceeded: If ``max_active`` jobs are queued or running
+        """
+        if self.active() >= self.max_active:
+            raise JobLimitExceeded()
+        kind = spec.get("kind") or "decision"
+        spec = dict(
+            spec, kind=kind, rounds=spec.get("rounds") or DEFAULT_JOB_ROUNDS[kind]
+        )
+        if kind == "decision" and not spec.get("seen_cards"):
+            spec["seen_cards"] = spec["player_hand"] + [spec["dealer_card"]]
+
+        os.makedirs(self.directory, exist_ok=True)
+        job = Job(uuid.uuid4().hex, spec)
+        self._jobs[job.id] = job
+        self._publish(job)
+        job.future = asyncio.get_running_loop().run_in_executor(
+            self._get_pool(), run_job, job.id, spec, self.directory
+        )
+        job.future.add_done_callback(functools.partial(self._on_done, job))
+        SIMULATION_JOBS_ACTIVE.inc()
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.ensure_future(self._sweep_periodically())
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the state of a job.
+
+        Jobs of other processes are found through their state files, and
+        jobs that finished before a restart through their result files.
+
+        Returns:
+            Optional[Dict]: Job snapshot, or None for an unknown job
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.snapshot()
+        # Job ids are hex; anything else could name a path outside the
+        # directory
+        if not job_id.isalnum():
+            return None
+        state = _read_json(_state_path(self.directory, job_id))
+        if state is not None:
+            return state
+        record = self._read_result(job_id)
+        if record is None:
+            return None
+        return {
+            "id": job_id,
+            "kind": record["spec"]["kind"],
+            "status": SUCCEEDED,
+            "progress": 1.0,
+            "done": None,
+            "total": None,
+            "created_at": None,
+            "finished_at": record["finished_at"],
+            "error": None,
+        }
+
+    def _read_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not job_id.isalnum():
+            return None
+        return _read_json(_result_path(self.directory, job_id))
+
+    async def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the result record of a succeeded job, or None."""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._read_result, job_id
+        )
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a queued or running job.
+
+        Returns:
+            Optional[Dict]: Job snapshot, or None for an unknown job
+        """
+        job = self._jobs.get(job_id)
+        snapshot = self.get(job_id)
+        if snapshot is None:
+            return None
+        if snapshot["status"] not in FINISHED:
+            # The marker stops the job even if the pool already handed it to
+            # a worker, or another process accepted it; it is swept with the
+            # results
+            with open(_cancel_path(self.directory, job_id), "w"):
+                pass
+            if job is not None and job.status == QUEUED:
+                job.future.cancel()
+        return snapshot if job is None else job.snapshot()
+
+    async def watch(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a job's state now and after every change, until it finishes.
+
+        Yields nothing for an unknown job. The state of a job accepted by
+        another process is polled from its state file.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            last = None
+            while True:
+                snapshot = self.get(job_id)
+                if snapshot is None:
+                    return
+                if snapshot != last:
+                    yield snapshot
+                if snapshot["status"] in FINISHED:
+                    return
+                last = snapshot
+                await asyncio.sleep(_PROGRESS_INTERVAL)
+        while True:
+            changed = job.changed
+            yield job.snapshot()
+            if job.status in FINISHED:
+                return
+            await changed.wait()
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """
+        Forget finished jobs and delete files older than the TTL.
+
+        Returns:
+            int: Number of files deleted
+        """
+        now = time.time() if now is None else now
+        for job in list(self._jobs.values()):
+            if job.finished_at is not None and now - job.finished_at > self.ttl:
+                del self._jobs[job.id]
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    async def _sweep_periodically(self) -> None:
+        while True:
+            self.sweep()
+            await asyncio.sleep(min(self.ttl, 60.0))
+
+    def shutdown(self) -> None:
+        """Cancel every unfinished job and stop the worker processes."""
+        for job in self._jobs.values():
+            if job.status not in FINISHED:
+                self.cancel(job.id)
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._progress_queue.put(None)
+            self._pool = None
+
+
+# Shared manager used by the API endpoints
+job_manager = JobManager()
@@ -11,8 +11,7 @@ from functools import lru_cache
 import hashlib
 import json
 
-from fastapi_cache.decorator import cache
-
+from ..coalescing import coalesced_cache
 from ..models.schemas import StrategyRequest
 from ..utils import card_utils, counting_systems
 import logging
@@ -58,7 +57,7 @@ def _generate_cache_key(strategy_request: StrategyRequest) -> str:
     return hashlib.sha256(key_str).hexdigest()
 
 
-@cache(expire=3600)  # Cache results for 1 hour
+@coalesced_cache("strategy", expire=3600, key=_generate_cache_key)  # 1 hour
 async def get_strategy_recommendation(
     strategy_request: StrategyRequest,
 ) -> StrategyRecommendation | Dict[str, str]:
@@ -69,7 +68,8 @@ async def get_strategy_recommendation(
     and current true count to determine the optimal playing strategy according to basic strategy
     and card counting principles.
 
-    The results are cached to improve performance for identical requests.
+    The results are cached to improve performance for identical requests, and
+    concurrent identical requests share a single computation.
 
     Args:
         strategy_request: A StrategyRequest object containing:
@@ -85,10 +85,6 @@ async def get_strategy_recommendation(
             - confidence: Confidence level of the recommendation (0.0 to 1.0)
             - alternatives: List of alternative actions in order of preference
     """
-    # Generate a cache key for this request
-    cache_key = _generate_cache_key(strategy_request)
-    logger.debug(f"Cache key for request: {cache_key}")
-
     try:
         # Validate input
         if not strategy_request.player_hand:
@@ -0,0 +1,223 @@
+"""
+Compiled Monte Carlo kernel for the decision engine.
+
+:meth:`BlackjackDecisionEngine.simulate_player_action` plays every round over
+dicts and lists of card strings. This module plays the same rounds over
+integer arrays instead: a shoe is an array of 13 counts in ``CARD_RANKS``
+order, a card is its index into that array, and drawing a card walks the
+counts rather than building and searching a list of every card in the shoe.
+
+When Numba is installed the functions below are compiled to machine code on
+first use and the engine selects them automatically. Without Numba they stay
+plain Python; the engine then keeps its original implementation, which is
+faster than running this module uncompiled.
+
+:func:`simulate_batch` runs the simulations of many requests in one call, so
+the micro-batcher in front of the engine pays the call overhead once per
+batch, and releases the GIL while it runs.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from .utils.card_utils import CARD_INDEX, CARD_RANK_VALUES, CARD_RANKS
+
+try:
+    import numba
+except ImportError:  # pragma: no cover - numba is listed in requirements.txt
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+# Action codes passed to simulate_action
+STAND, HIT, DOUBLE, SPLIT = 0, 1, 2, 3
+ACTION_CODES: Dict[str, int] = {
+    "stand": STAND,
+    "hit": HIT,
+    "double": DOUBLE,
+    "split": SPLIT,
+}
+
+# Hard value of each card index; the ace counts 11 until that would bust
+CARD_VALUES = np.array(CARD_RANK_VALUES, dtype=np.int64)
+ACE = CARD_INDEX["A"]
+
+
+def shoe_counts(remaining_cards: Dict[str, int]) -> np.ndarray:
+    """
+    Convert a ``{card: count}`` mapping to an array of counts.
+
+    Args:
+        remaining_cards: Cards left in the shoe, as returned by
+            ``BlackjackDecisionEngine.get_remaining_cards``
+
+    Returns:
+        np.ndarray: Count of each card in ``CARD_RANKS`` order
+    """
+    return np.array(
+        [remaining_cards.get(rank, 0) for rank in CARD_RANKS], dtype=np.int64
+    )
+
+
+def hand_indices(cards: List[str]) -> np.ndarray:
+    """Convert card values to an array of card indices."""
+    return np.array([CARD_INDEX[card] for card in cards], dtype=np.int64)
+
+
+def add_card(total, aces, card):
+    """Add a card to a hand given as (total, soft aces) and return the new hand."""
+    if card == ACE:
+        aces += 1
+    total += CARD_VALUES[card]
+    while total > 21 and aces > 0:
+        total -= 10
+        aces -= 1
+    return total, aces
+
+
+def draw_card(deck, cards_left):
+    """Remove a card chosen uniformly from ``deck`` and return its index."""
+    pick = np.random.randint(0, cards_left)
+    for card in range(deck.shape[0]):
+        pick -= deck[card]
+        if pick < 0:
+            deck[card] -= 1
+            return card
+    return deck.shape[0] - 1
+
+
+def play_dealer(upcard, deck):
+    """
+    Play out a dealer hand that hits soft 17.
+
+    Returns:
+        int: Final dealer total (22 or more for a bust)
+    """
+    deck = deck.copy()
+    cards_left = deck.sum()
+    total, aces = add_card(0, 0, upcard)
+    while total < 17 or (total == 17 and aces > 0):
+        if cards_left == 0:
+            break
+        total, aces = add_card(total, aces, draw_card(deck, cards_left))
+        cards_left -= 1
+    return total
+
+
+def play_rounds(player, action, upcard, counts, rounds):
+    """Play ``rounds`` rounds of one action and return the total return."""
+    shoe_size = counts.sum()
+    if shoe_size == 0:
+        return 0.0
+    split = action == SPLIT and player.shape[0] == 2 and player[0] == player[1]
+
+    wins = 0.0
+    for _ in range(rounds):
+        deck = counts.copy()
+        cards_left = shoe_size
+        bet = 1.0
+
+        if split:
+            # Only the first of the two split hands is played
+            total, aces = add_card(0, 0, player[0])
+            total, aces = add_card(total, aces, draw_card(deck, cards_left))
+            cards_left -= 1
+        else:
+            total, aces = 0, 0
+            for card in player:
+                total, aces = add_card(total, aces, card)
+
+        if action == HIT:
+            # Take a card, then keep hitting until 17 or more
+            while total < 21 and cards_left > 0:
+                before = total
+                total, aces = add_card(total, aces, draw_card(deck, cards_left))
+                cards_left -= 1
+                if before >= 17:
+                    break
+        elif action == DOUBLE:
+            bet = 2.0
+            total, aces = add_card(total, aces, draw_card(deck, cards_left))
+            cards_left -= 1
+
+        if total > 21:
+            wins -= bet
+            continue
+
+        # The dealer deals from the shoe as it stood before the player's
+        # draws, minus any card the player used up, as in the engine
+        dealer = play_dealer(upcard, np.where(deck > 0, counts, 0))
+        if dealer > 21 or total > dealer:
+            wins += bet
+        elif total < dealer:
+            wins -= bet
+
+    return wins
+
+
+def simulate_action(player, action, upcard, counts, rounds, seed):
+    """
+    Estimate the expected return of one action by Monte Carlo simulation.
+
+    Rounds are played with the same rules as
+    ``BlackjackDecisionEngine.simulate_player_action``.
+
+    Args:
+        player: Player card indices
+        action: One of the ``ACTION_CODES`` values
+        upcard: Dealer upcard index
+        counts: Cards left in the shoe, from :func:`shoe_counts`
+        rounds: Number of rounds to simulate
+        seed: Seed for the kernel's random number generator
+
+    Returns:
+        float: Average return per round
+    """
+    np.random.seed(seed)
+    return play_rounds(player, action, upcard, counts, rounds) / max(rounds, 1)
+
+
+def simulate_batch(players, hand_sizes, actions, upcards, counts, rounds, seeds):
+    """
+    Run :func:`simulate_action` for many independent jobs in one call.
+
+    Compiled, the call releases the GIL, so batches submitted from several
+    engine executor threads run on separate cores. Each job is seeded on its
+    own, so its result does not depend on which other jobs share the batch.
+
+    Args:
+        players: Player card indices, one row per job, padded to equal length
+        hand_sizes: Number of cards in each row of ``players``
+        actions: Action code of each job
+        upcards: Dealer upcard index of each job
+        counts: Cards left in the shoe, one row per job
+        rounds: Number of rounds to simulate per job
+        seeds: Random seed of each job
+
+    Returns:
+        np.ndarray: Average return per round of each job
+    """
+    results = np.zeros(actions.shape[0])
+    for job in range(actions.shape[0]):
+        np.random.seed(seeds[job])
+        wins = play_rounds(
+            players[job, : hand_sizes[job]],
+            actions[job],
+            upcards[job],
+            counts[job],
+            rounds,
+        )
+        results[job] = wins / max(rounds, 1)
+    return results
+
+
+if numba is not None:
+    # Compiled on first call, when the callees below are already dispatchers
+    add_card = numba.njit(cache=True)(add_card)
+    draw_card = numba.njit(cache=True)(draw_card)
+    play_dealer = numba.njit(cache=True)(play_dealer)
+    play_rounds = numba.njit(cache=True)(play_rounds)
+    simulate_action = numba.njit(cache=True)(simulate_action)
+    # Not parallel=True: Numba's thread pools misbehave when entered from
+    # several executor threads
+    simulate_batch = numba.njit(cache=True, nogil=True)(simulate_batch)
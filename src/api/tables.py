@@ -0,0 +1,377 @@
+"""
+Precomputed probability tables shared by every worker process.
+
+The tables hold exact dealer results for each rule set the API supports:
+the distribution of the dealer's final total for every upcard, and the
+expected value of standing on each player total. Building them enumerates
+every dealer drawing sequence and takes a noticeable time, and the arrays
+would otherwise be duplicated in every worker.
+
+Instead, the server's parent process calls :func:`preload_tables` before it
+starts its workers. That writes each table once to a ``.npy`` file and
+exports the directory in ``BLACKJACK_TABLES_DIR``. Workers then open the
+files with ``mmap``, read-only, so they skip the computation and all read
+the same physical pages from the OS page cache. Resident memory does not grow
+with the number of workers. A process started without the variable builds
+the tables in memory on first use.
+"""
+import logging
+import os
+import tempfile
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .utils.paths import private_temp_directory
+
+logger = logging.getLogger(__name__)
+
+# Environment variable naming the directory that holds the table files
+TABLES_DIR_ENV = "BLACKJACK_TABLES_DIR"
+
+# Bump when the layout or contents of a table change, so stale files are rebuilt
+TABLES_VERSION = 2
+
+# Table axes
+DECK_COUNTS = (1, 2, 4, 6, 8)
+UPCARDS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "A")
+DEALER_OUTCOMES = ("17", "18", "19", "20", "21", "bust")
+STAND, HIT_SOFT_17 = 0, 1  # dealer rule axis: stands or hits on soft 17
+PLAYER_ACTIONS = ("stand", "hit", "double")
+
+# Card value of each upcard index; the ace is 11 until that would bust
+_VALUES = (2, 3, 4, 5, 6, 7, 8, 9, 10, 11)
+_ACE = len(_VALUES) - 1
+
+TABLE_NAMES = ("dealer_outcomes", "stand_ev", "player_ev", "removal_effects")
+
+_tables: Optional[Dict[str, np.ndarray]] = None
+
+
+def full_shoe(decks: int) -> list:
+    """Return the count of each rank (2-9, ten, ace) in a full shoe."""
+    # Four of each rank per deck, and sixteen ten-valued cards
+    return [4 * decks] * 8 + [16 * decks, 4 * decks]
+
+
+def add_card(total: int, soft_aces: int, card: int) -> Tuple[int, int]:
+    """Add a card index to a hand given as (total, soft aces)."""
+    total += _VALUES[card]
+    soft_aces += card == _ACE
+    if total > 21 and soft_aces:
+        total -= 10
+        soft_aces -= 1
+    return total, soft_aces
+
+
+def dealer_distribution(
+    counts: Sequence[int], upcard: int, hits_soft_17: bool
+) -> np.ndarray:
+    """
+    Return the exact distribution of the dealer's final total.
+
+    Args:
+        counts: Cards left in the shoe per rank (2-9, ten, ace), without the
+            upcard
+        upcard: Upcard index into ``UPCARDS``
+        hits_soft_17: Whether the dealer hits soft 17
+
+    Returns:
+        np.ndarray: Probability of each of ``DEALER_OUTCOMES``
+    """
+    counts = list(counts)
+    outcomes = np.zeros(len(DEALER_OUTCOMES))
+
+    def play(total: int, soft_aces: int, cards_left: int, probability: float):
+        if total > 21:
+            outcomes[-1] += probability
+            return
+        if total > 17 or (total == 17 and not (soft_aces and hits_soft_17)):
+            outcomes[total - 17] += probability
+            return
+        for card, count in enumerate(counts):
+            if not count:
+                continue
+            counts[card] -= 1
+            new_total, new_soft = add_card(total, soft_aces, card)
+            play(new_total, new_soft, cards_left - 1, probability * count / cards_left)
+            counts[card] += 1
+
+    play(*add_card(0, 0, upcard), sum(counts), 1.0)
+    return outcomes
+
+
+def _dealer_distribution(upcard: int, decks: int, hits_soft_17: bool) -> np.ndarray:
+    counts = full_shoe(decks)
+    counts[upcard] -= 1
+    return dealer_distribution(counts, upcard, hits_soft_17)
+
+
+def _infinite_dealer_distribution(
+    probabilities: np.ndarray, upcard: int, hits_soft_17: bool
+) -> np.ndarray:
+    # Dealer outcomes when every card is drawn with fixed probabilities, for
+    # each row of card probabilities
+    memo: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def play(total: int, soft_aces: int) -> np.ndarray:
+        outcome = np.zeros((len(probabilities), len(DEALER_OUTCOMES)))
+        if total > 21:
+            outcome[:, -1] = 1.0
+            return outcome
+        if total > 17 or (total == 17 and not (soft_aces and hits_soft_17)):
+            outcome[:, total - 17] = 1.0
+            return outcome
+        if (total, soft_aces) not in memo:
+            for card in range(len(_VALUES)):
+                outcome += probabilities[:, card, None] * play(
+                    *add_card(total, soft_aces, card)
+                )
+            memo[total, soft_aces] = outcome
+        return memo[total, soft_aces]
+
+    return play(*add_card(0, 0, upcard))
+
+
+def stand_values(dealer: np.ndarray) -> np.ndarray:
+    """
+    Return the expected value of standing on each player total.
+
+    Args:
+        dealer: Dealer outcome probabilities along the last axis
+
+    Returns:
+        np.ndarray: ``dealer`` with the last axis replaced by player totals
+        0-21
+    """
+    # Standing on a total wins against a bust or a lower dealer total
+    totals = np.arange(22)
+    final = np.arange(17, 22)
+    bust = dealer[..., -1:]
+    wins = bust + (dealer[..., :-1, None] * (final[:, None] < totals)).sum(axis=-2)
+    losses = (dealer[..., :-1, None] * (final[:, None] > totals)).sum(axis=-2)
+    return wins - losses
+
+
+def player_values(probabilities: np.ndarray, stand: np.ndarray) -> np.ndarray:
+    """
+    Return the expected value of each player action, drawing with replacement.
+
+    Actions are played as the decision engine plays them: ``hit`` draws
+    until it has drawn from a total of 17 or more or reached 21, and
+    ``double`` draws one card for twice the bet.
+
+    Args:
+        probabilities: Card probabilities, one row per shoe, ranks along
+            the last axis
+        stand: Expected value of standing on totals 0-21, one row per shoe
+
+    Returns:
+        np.ndarray: Values indexed by (shoe, player total 0-21, soft,
+        ``PLAYER_ACTIONS`` index)
+    """
+    values = np.zeros((len(probabilities), 22, 2, len(PLAYER_ACTIONS)))
+    memo: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def hit(total: int, soft_aces: int) -> np.ndarray:
+        if total >= 21:
+            return stand[:, total]
+        if (total, soft_aces) not in memo:
+            value = np.zeros(len(probabilities))
+            for card in range(len(_VALUES)):
+                new_total, new_soft = add_card(total, soft_aces, card)
+                if new_total > 21:
+                    outcome = -1.0
+                elif total >= 17 or new_total == 21:
+                    outcome = stand[:, new_total]
+                else:
+                    outcome = hit(new_total, new_soft)
+                value += probabilities[:, card] * outcome
+            memo[total, soft_aces] = value
+        return memo[total, soft_aces]
+
+    for total in range(22):
+        for soft in (0, 1):
+            values[:, total, soft, 0] = stand[:, total]
+            values[:, total, soft, 1] = hit(total, soft)
+            for card in range(len(_VALUES)):
+                new_total, _ = add_card(total, soft, card)
+                outcome = -1.0 if new_total > 21 else stand[:, new_total]
+                values[:, total, soft, 2] += 2 * probabilities[:, card] * outcome
+    return values
+
+
+def _probabilities(counts: Sequence[int]) -> np.ndarray:
+    counts = np.asarray(counts, dtype=float)
+    return counts / counts.sum(axis=-1, keepdims=True)
+
+
+def build_tables() -> Dict[str, np.ndarray]:
+    """
+    Compute every table from scratch.
+
+    Returns:
+        Dict[str, np.ndarray]: Tables indexed by dealer rule, deck count and
+        upcard first:
+
+        - ``dealer_outcomes``: then by outcome
+        - ``stand_ev``: then by player total 0-21
+        - ``player_ev``: then by player total, soft and action
+          (``PLAYER_ACTIONS``); the player draws from the full shoe
+        - ``removal_effects``: then by player total, soft, action and rank
+          (2-9, ten, ace); the change in ``player_ev`` when one card of
+          that rank is removed from the shoe
+    """
+    shape = (2, len(DECK_COUNTS), len(UPCARDS))
+    dealer = np.zeros(shape + (len(DEALER_OUTCOMES),))
+    for rule in (STAND, HIT_SOFT_17):
+        for deck_index, decks in enumerate(DECK_COUNTS):
+            for upcard in range(len(UPCARDS)):
+                dealer[rule, deck_index, upcard] = _dealer_distribution(
+                    upcard, decks, rule == HIT_SOFT_17
+                )
+    stand_ev = stand_values(dealer)
+
+    player_ev = np.zeros(shape + (22, 2, len(PLAYER_ACTIONS)))
+    removal_effects = np.zeros(player_ev.shape + (len(_VALUES),))
+    for rule in (STAND, HIT_SOFT_17):
+        for deck_index, decks in enumerate(DECK_COUNTS):
+            for upcard in range(len(UPCARDS)):
+                counts = full_shoe(decks)
+                counts[upcard] -= 1
+                # The full shoe, then the shoe without one card of each rank
+                shoes = np.array([counts] * (len(_VALUES) + 1))
+                shoes[1:] -= np.eye(len(_VALUES), dtype=int)
+                probabilities = _probabilities(shoes)
+                player_ev[rule, deck_index, upcard] = player_values(
+                    probabilities[:1], stand_ev[None, rule, deck_index, upcard]
+                )[0]
+                # Effects of removal use the infinite-deck dealer on both
+                # sides, so only the change in composition is measured
+                approximate = player_values(
+                    probabilities,
+                    stand_values(
+                        _infinite_dealer_distribution(
+                            probabilities, upcard, rule == HIT_SOFT_17
+                        )
+                    ),
+                )
+                removal_effects[rule, deck_index, upcard] = np.moveaxis(
+                    approximate[1:] - approximate[0], 0, -1
+                )
+    return {
+        "dealer_outcomes": dealer,
+        "stand_ev": stand_ev,
+        "player_ev": player_ev,
+        "removal_effects": removal_effects,
+    }
+
+
+def _path(directory: str, name: str) -> str:
+    return os.path.join(directory, f"{name}-v{TABLES_VERSION}.npy")
+
+
+def write_tables(directory: str, tables: Dict[str, np.ndarray]) -> None:
+    """
+    Write tables to ``directory``, one ``.npy`` file per table.
+
+    Each file is written under a temporary name and renamed into place, so
+    a worker never maps a partly written table.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for name, table in tables.items():
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.save(file, table)
+            os.replace(temp_path, _path(directory, name))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def load_tables(directory: str) -> Dict[str, np.ndarray]:
+    """
+    Map the tables in ``directory`` into memory, read-only.
+
+    Raises:
+        FileNotFoundError: If a table has not been written
+    """
+    return {
+        name: np.load(_path(directory, name), mmap_mode="r") for name in TABLE_NAMES
+    }
+
+
+def get_tables() -> Dict[str, np.ndarray]:
+    """
+    Return the tables for this process, loading them on first use.
+
+    With ``BLACKJACK_TABLES_DIR`` set, the tables are mapped from that
+    directory, and written there first if no process has done so yet.
+    Otherwise they are built in this process.
+    """
+    global _tables
+    if _tables is None:
+        directory = os.getenv(TABLES_DIR_ENV)
+        if not directory:
+            _tables = build_tables()
+            return _tables
+        try:
+            _tables = load_tables(directory)
+        except (OSError, ValueError):
+            logger.info(f"Building probability tables in {directory}")
+            write_tables(directory, build_tables())
+            _tables = load_tables(directory)
+    return _tables
+
+
+def _default_directory() -> str:
+    return private_temp_directory("blackjack-tables", TABLES_DIR_ENV)
+
+
+def preload_tables(directory: Optional[str] = None) -> str:
+    """
+    Build the table files before worker processes start.
+
+    Call this in the parent process. Workers started afterwards inherit
+    ``BLACKJACK_TABLES_DIR`` and map the same files instead of building
+    their own copies.
+
+    Args:
+        directory: Where to keep the files; defaults to the current
+            ``BLACKJACK_TABLES_DIR`` or a directory under the system temp
+            dir that only the current user can write
+
+    Raises:
+        PermissionError: If the default directory exists but belongs to
+            another user or others can write to it
+
+    Returns:
+        str: The tables directory
+    """
+    global _tables
+    directory = directory or os.getenv(TABLES_DIR_ENV) or _default_directory()
+    os.environ[TABLES_DIR_ENV] = directory
+    _tables = None
+    get_tables()
+    return directory
+
+
+def dealer_outcomes(decks: int, hits_soft_17: bool) -> Dict[str, Dict[str, float]]:
+    """
+    Return the dealer's final-total probabilities for every upcard.
+
+    Args:
+        decks: Number of decks, one of ``DECK_COUNTS``
+        hits_soft_17: Whether the dealer hits soft 17
+
+    Returns:
+        Dict[str, Dict[str, float]]: ``{upcard: {outcome: probability}}``
+    """
+    table = get_tables()["dealer_outcomes"][
+        HIT_SOFT_17 if hits_soft_17 else STAND, DECK_COUNTS.index(decks)
+    ]
+    return {
+        upcard: dict(zip(DEALER_OUTCOMES, row.tolist()))
+        for upcard, row in zip(UPCARDS, table)
+    }
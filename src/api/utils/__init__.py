@@ -3,31 +3,44 @@ Utility functions for the Blackjack Card Counter API.
 
 This package contains various utility functions used throughout the application,
 including validation, card utilities, and counting systems.
+
+Names are loaded on first access (PEP 562), so importing one utility module
+does not import the others (``validators`` pulls in FastAPI).
 """
-from .card_utils import calculate_hand_value, calculate_advanced_probabilities
-from .counting_systems import (
-    get_counting_system,
-    calculate_running_count,
-    calculate_true_count,
-)
-from .validators import (
-    validate_with_schema,
-    validate_range,
-    validate_enum,
-    ValidationResult,
-)
-
-__all__ = [
+import importlib
+from typing import Any, Dict
+
+# Public name -> submodule that defines it
+_LAZY_ATTRIBUTES: Dict[str, str] = {
     # Card utilities
-    "calculate_hand_value",
-    "calculate_advanced_probabilities",
+    "calculate_hand_value": ".card_utils",
+    "calculate_advanced_probabilities": ".card_utils",
+    "card_indices": ".card_utils",
+    "normalize_cards": ".card_utils",
     # Counting systems
-    "get_counting_system",
-    "calculate_running_count",
-    "calculate_true_count",
+    "get_counting_system": ".counting_systems",
+    "calculate_running_count": ".counting_systems",
+    "calculate_true_count": ".counting_systems",
+    # File system locations
+    "private_temp_directory": ".paths",
     # Validation
-    "validate_with_schema",
-    "validate_range",
-    "validate_enum",
-    "ValidationResult",
-]
+    "validate_with_schema": ".validators",
+    "validate_range": ".validators",
+    "validate_enum": ".validators",
+    "ValidationResult": ".validators",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -1,7 +1,77 @@
 """
 Utility functions for card and game calculations.
 """
-from typing import List, Dict, Tuple, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Canonical card ranks; a card's index is its position in this tuple
+CARD_RANKS: Tuple[str, ...] = (
+    "2",
+    "3",
+    "4",
+    "5",
+    "6",
+    "7",
+    "8",
+    "9",
+    "10",
+    "J",
+    "Q",
+    "K",
+    "A",
+)
+
+# Blackjack value of each rank, by index (aces count as 11)
+CARD_RANK_VALUES: Tuple[int, ...] = (2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11)
+
+# Every accepted spelling of a card mapped to its index, built once at import
+# so validating a card is a single dict lookup instead of upper() and set checks
+CARD_INDEX: Dict[str, int] = {}
+for _index, _rank in enumerate(CARD_RANKS):
+    CARD_INDEX[_rank] = _index
+    CARD_INDEX[_rank.lower()] = _index
+CARD_INDEX["T"] = CARD_INDEX["t"] = CARD_INDEX["10"]
+del _index, _rank
+
+
+def card_indices(cards: Iterable[Any]) -> List[int]:
+    """
+    Validate cards and convert them to indices into ``CARD_RANKS``.
+
+    Args:
+        cards: Card values (e.g., ['a', 'K', '10'])
+
+    Returns:
+        List[int]: One index per card
+
+    Raises:
+        ValueError: If a card is not a valid card value
+    """
+    indices = []
+    for card in cards:
+        index = CARD_INDEX.get(card) if isinstance(card, str) else None
+        if index is None:
+            # Slow path for padded input such as " 10"
+            index = CARD_INDEX.get(card.strip()) if isinstance(card, str) else None
+            if index is None:
+                raise ValueError(f"Invalid card value: {card}")
+        indices.append(index)
+    return indices
+
+
+def normalize_cards(cards: Iterable[Any]) -> List[str]:
+    """
+    Validate cards and return their canonical ranks (e.g., 'k' -> 'K').
+
+    Args:
+        cards: Card values
+
+    Returns:
+        List[str]: Canonical rank of each card
+
+    Raises:
+        ValueError: If a card is not a valid card value
+    """
+    return [CARD_RANKS[index] for index in card_indices(cards)]
 
 
 def calculate_hand_value(cards: List[str]) -> int:
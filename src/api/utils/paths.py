@@ -0,0 +1,47 @@
+"""
+File system locations for the Blackjack API.
+
+The server keeps tables, results and job files in a directory each. When
+the deployment does not name one, a directory in the system temp directory
+is used instead. The temp directory is shared with other users, who could
+create the directory first and plant files in it, so each user gets one of
+its own, private to it, and a directory that someone else owns or can write
+to is refused.
+"""
+import os
+import stat
+import tempfile
+
+
+def private_temp_directory(name: str, env_name: str) -> str:
+    """
+    Create, or check, a directory in the temp directory only this user can write.
+
+    Args:
+        name: Name of the directory; the user id is appended where there is one
+        env_name: Environment variable that names the directory instead,
+            suggested in the error
+
+    Returns:
+        str: Path of the directory
+
+    Raises:
+        PermissionError: If the directory exists but is not private to this
+            user
+    """
+    uid = os.getuid() if hasattr(os, "getuid") else None
+    if uid is not None:
+        name = f"{name}-{uid}"
+    directory = os.path.join(tempfile.gettempdir(), name)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if uid is not None and (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != uid
+        or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+    ):
+        raise PermissionError(
+            f"{directory} is not a private directory of this user; "
+            f"set {env_name} to a directory only the server can write"
+        )
+    return directory
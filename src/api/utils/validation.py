@@ -22,6 +22,7 @@ if TYPE_CHECKING:
 
 # Import validation constants from constants module
 from ..constants import VALID_CARDS, VALID_COUNTING_SYSTEMS
+from .card_utils import CARD_INDEX, CARD_RANKS
 
 # Constants for validation
 MIN_DECKS = 1
@@ -129,6 +130,11 @@ def validate_card(card: Any) -> str:
         >>> validate_card('10')
         '10'
     """
+    # Fast path: exact spellings are precomputed in CARD_INDEX
+    index = CARD_INDEX.get(card) if isinstance(card, str) else None
+    if index is not None:
+        return CARD_RANKS[index]
+
     if card is None:
         raise InvalidCardError(
             message="Card value cannot be None",
@@ -233,6 +239,26 @@ def validate_counting_system(system: Any) -> str:
     return system_str
 
 
+def validate_true_count(true_count: Any) -> float:
+    """Validate the true count.
+
+    Args:
+        true_count: The true count to validate (will be converted to float)
+
+    Returns:
+        float: The validated true count
+
+    Raises:
+        ValidationError: If the true count is not numeric or out of range
+
+    Example:
+        >>> validate_true_count('1.5')
+        1.5
+    """
+    count = float(_ensure_numeric(true_count, "true_count"))
+    return _validate_range(count, MIN_TRUE_COUNT, MAX_TRUE_COUNT, "true_count")
+
+
 def validate_penetration(penetration: Any) -> float:
     """Validate deck penetration percentage.
 
@@ -1,58 +1,113 @@
 #!/usr/bin/env python3
 """
 Blackjack Card Counter - Hauptstartscript
-Startet den API-Server mit integriertem Frontend
+Startet die API (src.api.main:app) mit mehreren Uvicorn-Workern unter Gunicorn
+
+Der Master-Prozess berechnet die Wahrscheinlichkeitstabellen einmal vor dem
+Forken; die Worker binden sie per mmap ein. Einstellungen stehen in config.py.
+
+Signale an den Master-Prozess:
+    HUP   Worker nacheinander neu starten (neuer Code, gleiche Adresse)
+    TTIN  Einen Worker hinzufügen
+    TTOU  Einen Worker entfernen
+    TERM  Laufende Anfragen beenden, dann stoppen
 """
-import subprocess
 import sys
-import time
-import signal
-import os
-from config import API_PORT, SERVER_HOST
+from typing import Any, Dict
+
+from config import (
+    API_PORT,
+    APP_MODULE,
+    GRACEFUL_TIMEOUT,
+    PRELOAD_APP,
+    SERVER_HOST,
+    WORKER_MAX_REQUESTS,
+    WORKER_MAX_REQUESTS_JITTER,
+    WORKER_TIMEOUT,
+    WORKERS,
+)
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.util import import_app
+except ImportError:  # pragma: no cover - gunicorn needs a POSIX system
+    BaseApplication = None
+
+
+def on_starting(server: Any) -> None:
+    """Berechnet die gemeinsamen Tabellen einmal im Master-Prozess"""
+    from src.api.tables import preload_tables
+
+    directory = preload_tables()
+    server.log.info(f"Probability tables ready in {directory}")
+
 
+def pre_fork(server: Any, worker: Any) -> None:
+    """Stoppt den Log-Thread des Masters, damit Worker einen eigenen starten"""
+    # Threads überleben fork nicht; der Worker startet den Listener beim
+    # Startup neu, sobald er ihn als gestoppt sieht
+    main = sys.modules.get("src.api.main")
+    if main is not None:
+        main.log_listener.stop()
 
-def get_python_executable():
-    """Ermittelt den Python-Interpreter (venv falls vorhanden)"""
-    venv_python = os.path.join(os.getcwd(), "venv", "bin", "python")
-    if os.path.exists(venv_python):
-        return venv_python
-    return sys.executable
+
+def server_options() -> Dict[str, Any]:
+    """Gunicorn-Einstellungen aus config.py"""
+    return {
+        "bind": f"{SERVER_HOST}:{API_PORT}",
+        "workers": max(WORKERS, 1),
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "max_requests": WORKER_MAX_REQUESTS,
+        "max_requests_jitter": WORKER_MAX_REQUESTS_JITTER,
+        "timeout": WORKER_TIMEOUT,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "preload_app": PRELOAD_APP,
+        "on_starting": on_starting,
+        "pre_fork": pre_fork,
+    }
+
+
+if BaseApplication is not None:
+
+    class BlackjackServer(BaseApplication):
+        """Gunicorn-Anwendung, konfiguriert über config.py statt Kommandozeile"""
+
+        def __init__(self, options: Dict[str, Any]) -> None:
+            self.options = options
+            super().__init__()
+
+        def load_config(self) -> None:
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self) -> Any:
+            return import_app(APP_MODULE)
 
 
 def start_server():
     """Startet den API-Server mit integriertem Frontend"""
-    python_exe = get_python_executable()
+    print("Starting Blackjack Card Counter...")
+    print(f"Server running on http://{SERVER_HOST}:{API_PORT}")
+    print(f"API Documentation: http://{SERVER_HOST}:{API_PORT}/api/docs")
+
+    if BaseApplication is None:
+        # Ohne Gunicorn (z.B. unter Windows): Uvicorns eigene Worker, ohne
+        # Recycling und ohne Neuladen per Signal
+        import uvicorn
 
-    try:
-        print("Starting Blackjack Card Counter...")
-        print(f"Using Python: {python_exe}")
+        from src.api.tables import preload_tables
 
-        # API Server mit integriertem Frontend starten
-        print(f"Server running on http://{SERVER_HOST}:{API_PORT}")
-        api_process = subprocess.Popen(
-            [python_exe, "src/api/server.py"], cwd=os.getcwd()
+        preload_tables()
+        uvicorn.run(
+            APP_MODULE,
+            host=SERVER_HOST,
+            port=API_PORT,
+            workers=max(WORKERS, 1),
+            timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
         )
+        return
 
-        print("\nServer started!")
-        print(f"Open http://{SERVER_HOST}:{API_PORT} in your browser")
-        print(f"API Documentation: http://{SERVER_HOST}:{API_PORT}/docs")
-        print("\nPress Ctrl+C to exit\n")
-
-        # Warten auf Benutzerinteraktion
-        while True:
-            time.sleep(1)
-
-    except KeyboardInterrupt:
-        print("\nStopping server...")
-        api_process.terminate()
-        api_process.wait()
-        print("Server stopped")
-        sys.exit(0)
-
-    except Exception as e:
-        print(f"Error starting server: {e}")
-        api_process.terminate()
-        sys.exit(1)
+    BlackjackServer(server_options()).run()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 """
 Pytest configuration and fixtures for Blackjack API tests.
 """
+import os
 import sys
 from pathlib import Path
 
@@ -11,3 +12,7 @@ sys.path.insert(0, project_root)
 # Add the src directory to the Python path
 src_path = str(Path(__file__).parent.parent / "src")
 sys.path.insert(0, src_path)
+
+# Keep engine answers from persisting between tests and test runs; tests of
+# the result store give it a directory of their own
+os.environ["RESULT_STORE_DIR"] = ""
@@ -0,0 +1,107 @@
+"""
+Tests for admission control in front of the decision engine.
+"""
+import asyncio
+import threading
+import types
+
+import httpx
+import pytest
+
+from src.api import server
+from src.api.metrics import ENGINE_REQUESTS_DEGRADED, ENGINE_REQUESTS_SHED
+from src.api.services.admission import AdmissionController, engine_admission
+from src.api.services.engine_executor import EngineExecutor
+
+PAYLOAD = {"player_hand": ["10", "6"], "dealer_card": "10"}
+
+
+def idle_executor(wait: float = 0.0):
+    return types.SimpleNamespace(queue_wait=lambda: wait)
+
+
+def test_executor_reports_the_wait_of_its_oldest_queued_job():
+    executor = EngineExecutor(max_workers=1)
+    release = threading.Event()
+
+    async def scenario():
+        jobs = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        waiting = executor.queue_wait()
+        release.set()
+        await asyncio.gather(*jobs)
+        return waiting
+
+    try:
+        waiting = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert waiting >= 0.04
+    assert executor.queue_wait() == 0.0
+
+
+def test_in_flight_requests_are_counted_until_they_finish():
+    controller = AdmissionController(max_in_flight=2, executor=idle_executor())
+
+    with controller.admitted():
+        assert not controller.overloaded()
+        with controller.admitted():
+            assert controller.overloaded()
+    assert controller.in_flight == 0
+    assert not controller.overloaded()
+
+
+def test_a_long_queue_wait_overloads_the_engine():
+    controller = AdmissionController(
+        max_queue_wait_ms=500, executor=idle_executor(wait=2.2)
+    )
+    assert controller.overloaded()
+    assert controller.retry_after() == 3
+    assert AdmissionController(executor=idle_executor()).retry_after() == 1
+
+
+@pytest.fixture
+def overloaded(monkeypatch):
+    monkeypatch.setattr(engine_admission, "overloaded", lambda: True)
+
+
+def post_strategy(payload):
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=server.app), base_url="http://test"
+        ) as client:
+            return await client.post("/strategy", json=payload)
+
+    return asyncio.run(scenario())
+
+
+def test_overload_degrades_engine_answers_to_the_tables(overloaded):
+    degraded = ENGINE_REQUESTS_DEGRADED.labels("/strategy")
+    before = degraded.value
+
+    response = post_strategy(PAYLOAD)
+
+    assert response.status_code == 200
+    assert response.json()["tier"] == "approximate"
+    assert response.json()["degraded"] is True
+    assert degraded.value == before + 1
+
+
+def test_overload_sheds_requests_that_insist_on_the_engine(overloaded):
+    shed = ENGINE_REQUESTS_SHED.labels("/strategy")
+    before = shed.value
+
+    response = post_strategy({**PAYLOAD, "accuracy": "exact"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["retry_after"] == 1
+    assert shed.value == before + 1
+
+
+def test_table_answers_are_never_turned_away(overloaded):
+    response = post_strategy({**PAYLOAD, "accuracy": "table"})
+
+    assert response.status_code == 200
+    assert "degraded" not in response.json()
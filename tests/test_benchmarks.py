@@ -0,0 +1,47 @@
+"""
+Smoke tests for the benchmark runner.
+
+These tests only check that the suite is discoverable and that results are
+serialized and compared correctly; they do not assert on timings.
+"""
+import json
+
+from benchmarks import runner
+
+
+def test_discover_finds_hot_path_benchmarks():
+    """All hot-path suites are discovered."""
+    names = {
+        f"{module}.{suite.__name__}.{method}"
+        for module, suite, method in runner.discover()
+    }
+    assert "bench_counting.RunningCountSuite.time_running_count" in names
+    assert "bench_engine.DealerSimulationSuite.time_simulate_dealer_hand" in names
+    assert "bench_engine.ExpectedValueSuite.time_calculate_expected_values" in names
+    assert "bench_api.CardsAnalyzeEndpointSuite.time_cards_analyze" in names
+    assert "bench_api.StrategyEndpointSuite.time_strategy" in names
+    assert "bench_validation.CardValidationSuite.time_card_indices" in names
+
+
+def test_run_produces_json_serializable_results():
+    """A quick run returns one entry per parameter combination."""
+    document = runner.run("RunningCountSuite.time_running_count", quick=True)
+    entries = document["results"]["bench_counting.RunningCountSuite.time_running_count"]
+
+    assert len(entries) == 6  # 3 shoe sizes x 2 counting systems
+    assert entries[0]["stats"]["median"] > 0
+    assert json.loads(json.dumps(document)) == document
+
+
+def test_compare_reports_regressions_above_threshold():
+    """Only slowdowns above the threshold are reported."""
+
+    def document(median):
+        return {
+            "results": {
+                "bench.Suite.time_x": [{"params": {}, "stats": {"median": median}}]
+            }
+        }
+
+    assert runner.compare(document(1.05), document(1.0), threshold=0.10) == []
+    assert len(runner.compare(document(1.5), document(1.0), threshold=0.10)) == 1
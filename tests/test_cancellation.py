@@ -0,0 +1,223 @@
+"""
+Tests for cooperative cancellation of engine computations.
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.api import server, simulation_kernel
+from src.api.cancellation import (
+    CancellationToken,
+    ClientDisconnected,
+    ComputationCancelled,
+    DeadlineExceeded,
+    run_until_disconnected,
+)
+from src.api.decision_engine import (
+    BlackjackDecisionEngine,
+    get_decision_recommendations,
+)
+from src.api.metrics import ENGINE_REQUESTS_ABANDONED
+from src.api.services import engine_batcher
+from src.api.services.engine_batcher import DecisionBatcher
+from src.api.services.engine_executor import EngineExecutor
+
+USE_KERNEL = [
+    False,
+    pytest.param(
+        True,
+        marks=pytest.mark.skipif(
+            not simulation_kernel.NUMBA_AVAILABLE, reason="needs the compiled kernel"
+        ),
+    ),
+]
+
+REQUESTS = [
+    {"player_cards": ["10", "6"], "dealer_card": "9", "seen_cards": ["10", "6", "9"]},
+    {"player_cards": ["8", "8"], "dealer_card": "6", "seen_cards": ["8", "8", "6"]},
+]
+
+
+class FakeRequest:
+    """Stands in for a request whose client disconnects after ``delay``."""
+
+    def __init__(self, delay=None):
+        self.delay = delay
+        self.body_sent = False
+
+    async def receive(self):
+        if not self.body_sent:
+            self.body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        if self.delay is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.delay)
+        return {"type": "http.disconnect"}
+
+
+@pytest.mark.parametrize("use_kernel", USE_KERNEL)
+def test_cancelled_engine_job_stops_within_milliseconds(use_kernel):
+    # Compile the kernel before timing it
+    BlackjackDecisionEngine(
+        simulation_rounds=10, use_kernel=use_kernel
+    ).simulate_player_action(["10", "6"], "hit", "9", {"10": 16, "5": 4})
+    executor = EngineExecutor(max_workers=1)
+    stopped = threading.Event()
+    outcome = []
+
+    def simulate():
+        engine = BlackjackDecisionEngine(
+            simulation_rounds=10**8, use_kernel=use_kernel
+        )
+        try:
+            engine.calculate_expected_values(["10", "6"], "9", ["10", "6", "9"], 0.0)
+        except ComputationCancelled as error:
+            outcome.append(error)
+        finally:
+            stopped.set()
+
+    async def scenario():
+        job = asyncio.ensure_future(executor.run(simulate))
+        await asyncio.sleep(0.05)
+        job.cancel()
+        cancelled_at = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(None, stopped.wait, 10)
+        return time.perf_counter() - cancelled_at
+
+    try:
+        stop_latency = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert len(outcome) == 1
+    assert stop_latency < 0.1
+
+
+def test_cancelled_job_that_never_started_leaves_the_queue():
+    executor = EngineExecutor(max_workers=1)
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        blocker = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(ran.append, "queued"))
+        await asyncio.sleep(0.01)
+        queued.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+        await blocker
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert ran == []
+    assert executor.queue_wait() == 0.0
+
+
+@pytest.mark.parametrize("use_kernel", USE_KERNEL)
+def test_batch_drops_requests_whose_token_was_tripped(monkeypatch, use_kernel):
+    monkeypatch.setattr(simulation_kernel, "NUMBA_AVAILABLE", use_kernel)
+    token = CancellationToken()
+    token.cancel()
+
+    decisions = get_decision_recommendations(
+        [REQUESTS[0], dict(REQUESTS[1], cancellation=token)], simulation_rounds=600
+    )
+
+    assert decisions[0]["action"] in decisions[0]["all_expected_values"]
+    assert decisions[1] is None
+
+
+def test_cancelled_caller_trips_its_batched_request(monkeypatch):
+    seen = []
+
+    def decide(requests):
+        seen.extend(requests)
+        return [
+            None if request["cancellation"].cancelled else {"player_value": 22}
+            for request in requests
+        ]
+
+    class SlowExecutor:
+        async def run(self, func, requests):
+            await asyncio.sleep(0.02)
+            return func(requests)
+
+    monkeypatch.setattr(engine_batcher, "get_decision_recommendations", decide)
+    batcher = DecisionBatcher(window_ms=1, executor=SlowExecutor())
+
+    async def scenario():
+        gone = asyncio.ensure_future(batcher.recommend(["10", "6"], "9", []))
+        kept = asyncio.ensure_future(batcher.recommend(["10", "6"], "7", []))
+        await asyncio.sleep(0.01)
+        gone.cancel()
+        return await kept
+
+    assert asyncio.run(scenario()) == {"player_value": 22}
+    assert [request["cancellation"].cancelled for request in seen] == [True, False]
+
+
+def test_disconnect_cancels_the_work():
+    async def scenario():
+        work = asyncio.ensure_future(asyncio.sleep(10))
+        with pytest.raises(ClientDisconnected):
+            await run_until_disconnected(FakeRequest(delay=0.01), work)
+        await asyncio.sleep(0)
+        return work.cancelled()
+
+    assert asyncio.run(scenario())
+
+
+def test_deadline_cancels_the_work():
+    async def scenario():
+        work = asyncio.ensure_future(asyncio.sleep(10))
+        with pytest.raises(DeadlineExceeded):
+            await run_until_disconnected(FakeRequest(), work, timeout=0.01)
+        await asyncio.sleep(0)
+        return work.cancelled()
+
+    assert asyncio.run(scenario())
+
+
+def test_answer_ready_in_time_is_returned():
+    async def answer():
+        return 42
+
+    assert asyncio.run(run_until_disconnected(FakeRequest(), answer(), 1.0)) == 42
+
+
+def test_strategy_past_its_deadline_is_cancelled(monkeypatch):
+    cancelled = []
+
+    async def slow_recommend(**kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(kwargs["dealer_card"])
+            raise
+
+    monkeypatch.setattr(server, "STRATEGY_DEADLINE_MS", 20)
+    monkeypatch.setattr(server.decision_batcher, "recommend", slow_recommend)
+    abandoned = ENGINE_REQUESTS_ABANDONED.labels("/strategy", "deadline")
+    before = abandoned.value
+
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=server.app), base_url="http://test"
+        ) as client:
+            response = await client.post(
+                "/strategy", json={"player_hand": ["10", "6"], "dealer_card": "5"}
+            )
+        await asyncio.sleep(0.01)
+        return response
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 504
+    assert cancelled == ["5"]
+    assert abandoned.value == before + 1
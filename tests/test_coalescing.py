@@ -0,0 +1,180 @@
+"""
+Tests for request coalescing and early cache refresh.
+"""
+import asyncio
+
+import pytest
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+
+from src.api import coalescing
+from src.api.cache import InstrumentedBackend
+from src.api.coalescing import SingleFlight, coalesced_cache, should_refresh_early
+from src.api.metrics import CACHE_EARLY_REFRESHES, CACHE_REQUESTS, COALESCED_REQUESTS
+from src.api.request_cost import CACHE_HIT_COST, CACHE_MISS_COST, start_request_cost
+
+
+@pytest.fixture
+def instrumented_cache():
+    FastAPICache.reset()
+    FastAPICache.init(InstrumentedBackend(InMemoryBackend()), prefix="test-cache")
+    yield
+    FastAPICache.reset()
+    FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+
+
+def test_concurrent_duplicates_share_one_computation():
+    flight = SingleFlight("test")
+    calls = []
+    shared = COALESCED_REQUESTS.labels("test")
+    before = shared.value
+
+    async def compute():
+        calls.append(True)
+        await asyncio.sleep(0.01)
+        return {"action": "stand"}
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flight.run(("10", "6"), compute) for _ in range(5)),
+            flight.run(("9", "7"), compute),
+        )
+
+    results = asyncio.run(scenario())
+
+    assert results == [{"action": "stand"}] * 6
+    assert len(calls) == 2
+    assert shared.value == before + 4
+    assert not flight.in_flight(("10", "6"))
+    assert flight.duration is not None
+
+
+def test_every_caller_sees_the_shared_failure():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("engine failed")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flight.run("key", fail) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+
+    assert [str(result) for result in results] == ["engine failed"] * 3
+    assert not flight.in_flight("key")
+
+
+def test_cancelled_caller_does_not_cancel_the_computation():
+    flight = SingleFlight("test")
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.run("key", compute))
+        second = asyncio.ensure_future(flight.run("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == 42
+
+
+def test_computation_is_cancelled_once_every_caller_left():
+    flight = SingleFlight("test")
+    started = []
+
+    async def compute():
+        started.append(True)
+        await asyncio.sleep(10)
+
+    async def scenario():
+        callers = [asyncio.ensure_future(flight.run("key", compute)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.sleep(0)
+        return flight.in_flight("key")
+
+    assert asyncio.run(scenario()) is False
+    assert started == [True]
+
+
+def test_early_refresh_becomes_likely_near_expiry(monkeypatch):
+    monkeypatch.setattr(coalescing.random, "random", lambda: 0.5)
+
+    assert not should_refresh_early(ttl=60, duration=0.1)
+    assert should_refresh_early(ttl=0.05, duration=0.1)
+    assert not should_refresh_early(ttl=0.05, duration=0.1, beta=0)
+    assert not should_refresh_early(ttl=0.05, duration=None)
+
+
+def test_cached_results_are_counted_and_shared(instrumented_cache):
+    calls = []
+
+    @coalesced_cache("coalesce-test", expire=60, key=lambda hand: ":".join(hand))
+    async def recommend(hand):
+        calls.append(hand)
+        await asyncio.sleep(0.01)
+        return {"action": "hit", "hand": hand}
+
+    hits = CACHE_REQUESTS.labels("coalesce-test", "hit")
+    misses = CACHE_REQUESTS.labels("coalesce-test", "miss")
+    before_hits, before_misses = hits.value, misses.value
+
+    async def scenario():
+        first = await asyncio.gather(*(recommend(["10", "2"]) for _ in range(4)))
+        return first, await recommend(["10", "2"])
+
+    first, cached = asyncio.run(scenario())
+
+    assert first == [{"action": "hit", "hand": ["10", "2"]}] * 4
+    assert cached == first[0]
+    assert calls == [["10", "2"]]
+    assert misses.value == before_misses + 4
+    assert hits.value == before_hits + 1
+
+
+def test_joining_a_computation_turns_its_miss_into_a_hit(instrumented_cache):
+    @coalesced_cache("coalesce-cost", expire=60, key=lambda hand: hand)
+    async def recommend(hand):
+        await asyncio.sleep(0.01)
+        return {"action": "stand"}
+
+    async def request():
+        cost = start_request_cost()
+        await recommend("10,6")
+        return cost.total
+
+    async def scenario():
+        return await asyncio.gather(request(), request())
+
+    leader, joiner = asyncio.run(scenario())
+
+    assert leader == pytest.approx(CACHE_MISS_COST)
+    assert joiner == pytest.approx(CACHE_HIT_COST)
+
+
+def test_entries_due_for_refresh_are_recomputed(instrumented_cache, monkeypatch):
+    calls = []
+
+    @coalesced_cache("refresh-test", expire=60, key=str)
+    async def compute(value):
+        calls.append(value)
+        return value * 2
+
+    refreshes = CACHE_EARLY_REFRESHES.labels("refresh-test")
+    before = refreshes.value
+
+    async def scenario():
+        await compute(3)
+        monkeypatch.setattr(coalescing, "should_refresh_early", lambda *args: True)
+        return await compute(3)
+
+    assert asyncio.run(scenario()) == 6
+    assert calls == [3, 3]
+    assert refreshes.value == before + 1
@@ -0,0 +1,104 @@
+"""
+Tests for tiered decision answers.
+"""
+import random
+
+import pytest
+
+from src.api import decision_tiers, simulation_kernel
+from src.api.decision_engine import get_decision_recommendations
+from src.api.decision_tiers import choose_tier, get_tiered_decision
+
+HANDS = [
+    (["10", "6"], "10"),
+    (["8", "8"], "6"),
+    (["5", "6"], "6"),
+    (["A", "7"], "9"),
+]
+
+# Most of the tens and aces are gone from a single deck
+TEN_POOR = ["10", "J", "Q", "K"] * 3 + ["A", "A"]
+
+
+@pytest.fixture
+def latencies(monkeypatch):
+    monkeypatch.setattr(
+        decision_tiers, "_latency_ms", dict(decision_tiers.DEFAULT_TIER_LATENCY_MS)
+    )
+
+
+def test_without_a_budget_the_engine_answers(latencies):
+    assert choose_tier() == "simulation"
+    assert choose_tier(accuracy="approximate") == "approximate"
+
+
+def test_budget_selects_the_most_precise_tier_that_fits(latencies):
+    assert choose_tier(max_latency_ms=0.01) == "table"
+    assert choose_tier(max_latency_ms=1) == "approximate"
+    assert choose_tier(max_latency_ms=50) == "exact"
+    assert choose_tier(max_latency_ms=10_000) == "simulation"
+
+
+def test_accuracy_is_honoured_within_the_budget(latencies):
+    assert choose_tier(max_latency_ms=10_000, accuracy="table") == "table"
+    assert choose_tier(max_latency_ms=1, accuracy="exact") == "approximate"
+
+
+def test_observed_latency_moves_the_choice(latencies):
+    for _ in range(50):
+        decision_tiers.record_tier_latency("exact", 200.0)
+    assert choose_tier(max_latency_ms=50) == "approximate"
+
+
+@pytest.mark.skipif(
+    not simulation_kernel.NUMBA_AVAILABLE, reason="needs the compiled kernel"
+)
+@pytest.mark.parametrize("player_cards, dealer_card", HANDS)
+def test_tiers_agree_with_the_engine(player_cards, dealer_card):
+    request = {
+        "player_cards": player_cards,
+        "dealer_card": dealer_card,
+        "seen_cards": player_cards + [dealer_card],
+        "num_decks": 6,
+    }
+    random.seed(7)
+    simulated = get_decision_recommendations([request], simulation_rounds=20000)[0]
+
+    for tier in ("table", "approximate", "exact"):
+        decision = get_tiered_decision(tier, **request)
+        assert decision["tier"] == tier
+        assert set(decision) >= set(simulated)
+        for action, ev in simulated["all_expected_values"].items():
+            # The simulated means have standard errors of at most 0.015
+            assert decision["all_expected_values"][action] == pytest.approx(
+                ev, abs=0.05
+            )
+
+
+def test_approximation_tracks_the_exact_answer_for_a_depleted_shoe():
+    seen = TEN_POOR + ["10", "6", "6"]
+    table, approximate, exact = (
+        get_tiered_decision(tier, ["10", "6"], "6", seen, num_decks=1)[
+            "all_expected_values"
+        ]
+        for tier in ("table", "approximate", "exact")
+    )
+
+    for action in exact:
+        assert abs(approximate[action] - exact[action]) < abs(
+            table[action] - exact[action]
+        )
+
+
+def test_busted_hands_and_unsplittable_pairs():
+    busted = get_tiered_decision("table", ["10", "6", "9"], "7", [])
+    assert busted["all_expected_values"] == {"stand": -1.0}
+
+    mixed = get_tiered_decision("exact", ["K", "Q"], "7", ["K", "Q", "7"])
+    values = mixed["all_expected_values"]
+    assert values["split"] == values["stand"]
+
+
+def test_simulation_is_not_a_table_tier():
+    with pytest.raises(ValueError):
+        get_tiered_decision("simulation", ["10", "6"], "7", [])
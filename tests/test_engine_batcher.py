@@ -0,0 +1,158 @@
+"""
+Tests for batched engine evaluation and the micro-batcher in front of it.
+"""
+import asyncio
+import random
+
+import pytest
+
+from src.api import simulation_kernel
+from src.api.decision_engine import (
+    get_decision_recommendation,
+    get_decision_recommendations,
+)
+from src.api.request_cost import ROUNDS_PER_TOKEN, start_request_cost
+from src.api.services import engine_batcher
+from src.api.services.engine_batcher import DecisionBatcher
+
+REQUESTS = [
+    {"player_cards": ["10", "6"], "dealer_card": "9", "seen_cards": ["10", "6", "9"]},
+    {"player_cards": ["8", "8"], "dealer_card": "6", "seen_cards": ["8", "8", "6"]},
+    {
+        "player_cards": ["10", "5", "9"],
+        "dealer_card": "A",
+        "seen_cards": ["10", "5", "9", "A"],
+    },
+    {
+        "player_cards": ["A", "K"],
+        "dealer_card": "7",
+        "seen_cards": ["A", "K", "7"],
+        "true_count": 2.0,
+    },
+]
+
+
+class RecordingExecutor:
+    """Runs jobs inline and records the size of each batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    async def run(self, func, requests):
+        self.batches.append(len(requests))
+        await asyncio.sleep(0)
+        return func(requests)
+
+
+def fake_decisions(requests):
+    if any(request["dealer_card"] == "X" for request in requests):
+        raise ValueError("unknown dealer card")
+    return [
+        {
+            "action": "stand",
+            "player_value": 16,
+            "all_expected_values": {"hit": -0.5, "stand": -0.4},
+            "dealer_card": request["dealer_card"],
+        }
+        for request in requests
+    ]
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    monkeypatch.setattr(engine_batcher, "get_decision_recommendations", fake_decisions)
+    return DecisionBatcher(
+        window_ms=5, max_size=3, executor=RecordingExecutor(), batched=True
+    )
+
+
+def test_batched_decisions_have_the_shape_of_single_decisions():
+    decisions = get_decision_recommendations(REQUESTS, simulation_rounds=200)
+
+    assert [set(d["all_expected_values"]) for d in decisions] == [
+        {"hit", "stand", "double"},
+        {"hit", "stand", "double", "split"},
+        {"stand"},
+        {"stand"},
+    ]
+    single = get_decision_recommendation(**REQUESTS[0])
+    assert all(set(decision) == set(single) for decision in decisions)
+    assert decisions[2]["all_expected_values"] == {"stand": -1.0}
+
+
+@pytest.mark.skipif(
+    not simulation_kernel.NUMBA_AVAILABLE, reason="batches run on the compiled kernel"
+)
+def test_batch_matches_requests_simulated_one_at_a_time():
+    random.seed(42)
+    batched = get_decision_recommendations(REQUESTS, simulation_rounds=500)
+
+    random.seed(42)
+    one_by_one = [
+        get_decision_recommendations([request], simulation_rounds=500)[0]
+        for request in REQUESTS
+    ]
+
+    assert [d["all_expected_values"] for d in batched] == [
+        d["all_expected_values"] for d in one_by_one
+    ]
+
+
+def test_concurrent_requests_share_a_batch(batcher):
+    async def scenario():
+        return await asyncio.gather(
+            *(
+                batcher.recommend(["10", "6"], dealer_card, ["10", "6", dealer_card])
+                for dealer_card in ("2", "3", "4", "5", "6", "7", "8")
+            )
+        )
+
+    decisions = asyncio.run(scenario())
+
+    assert [d["dealer_card"] for d in decisions] == ["2", "3", "4", "5", "6", "7", "8"]
+    # Full batches run at once; the remainder waits for the window
+    assert batcher.executor.batches == [3, 3, 1]
+
+
+def test_without_the_kernel_each_request_gets_its_own_job(monkeypatch):
+    monkeypatch.setattr(engine_batcher, "get_decision_recommendations", fake_decisions)
+    monkeypatch.setattr(simulation_kernel, "NUMBA_AVAILABLE", False)
+    batcher = DecisionBatcher(window_ms=5, max_size=3, executor=RecordingExecutor())
+
+    async def scenario():
+        return await asyncio.gather(
+            *(batcher.recommend(["10", "6"], card, []) for card in ("2", "3", "4", "5"))
+        )
+
+    decisions = asyncio.run(scenario())
+
+    assert [d["dealer_card"] for d in decisions] == ["2", "3", "4", "5"]
+    assert batcher.executor.batches == [1, 1, 1, 1]
+
+
+def test_a_failing_request_only_fails_its_caller(batcher):
+    async def scenario():
+        return await asyncio.gather(
+            batcher.recommend(["10", "6"], "9", []),
+            batcher.recommend(["10", "6"], "X", []),
+            return_exceptions=True,
+        )
+
+    good, bad = asyncio.run(scenario())
+
+    assert good["dealer_card"] == "9"
+    assert isinstance(bad, ValueError)
+    assert batcher.executor.batches == [2, 1, 1]
+
+
+def test_simulated_rounds_are_charged_to_each_caller(batcher):
+    async def request():
+        cost = start_request_cost()
+        await batcher.recommend(["10", "6"], "9", [])
+        return cost.total
+
+    async def scenario():
+        return await asyncio.gather(request(), request())
+
+    expected = 2 * engine_batcher.DEFAULT_SIMULATION_ROUNDS / ROUNDS_PER_TOKEN
+    assert asyncio.run(scenario()) == [expected, expected]
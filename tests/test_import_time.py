@@ -0,0 +1,63 @@
+"""
+Import-time budget for the ``src.api`` package.
+
+Each import runs in a fresh interpreter under ``-X importtime``, so the
+numbers are not affected by modules this test session already loaded.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Cumulative import time allowed for a lightweight module, in microseconds.
+# Generous on purpose: the point is to catch an eager import of the app,
+# FastAPI or NumPy, which costs several hundred milliseconds.
+IMPORT_BUDGET_US = 100_000
+
+HEAVY_MODULES = ("fastapi", "numpy", "pydantic", "redis", "src.api.main")
+
+
+def _profile_import(module):
+    code = (
+        f"import sys, json, {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = None
+    for line in result.stderr.splitlines():
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative = int(fields[1])
+    return cumulative, json.loads(result.stdout)
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["src.api", "src.api.utils.counting_systems", "src.api.utils.card_utils"],
+)
+def test_lightweight_imports_stay_within_budget(module):
+    cumulative, heavy = _profile_import(module)
+    assert heavy == []
+    assert cumulative is not None
+    assert cumulative < IMPORT_BUDGET_US
+
+
+def test_package_attributes_are_loaded_on_access():
+    code = (
+        "import sys, src.api as api; "
+        "assert 'src.api.utils.counting_systems' not in sys.modules; "
+        "assert api.COUNTING_SYSTEMS['hiLo']['2'] == 1; "
+        "assert 'src.api.utils.counting_systems' in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
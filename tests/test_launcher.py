@@ -0,0 +1,88 @@
+"""
+Tests for the production launcher (start.py) and the lazily built ASGI app.
+"""
+import asyncio
+import sys
+import types
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import start
+from src.api import main, tables
+
+
+def test_lazy_application_builds_once_in_the_serving_loop():
+    built = []
+
+    async def factory():
+        await asyncio.sleep(0)
+        app = FastAPI()
+
+        @app.get("/ping")
+        async def ping():
+            return {"pong": True}
+
+        built.append(app)
+        return app
+
+    lazy = main.LazyApplication(factory)
+
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=lazy), base_url="http://test"
+        ) as client:
+            responses = await asyncio.gather(*(client.get("/ping") for _ in range(5)))
+        return responses, await lazy
+
+    responses, app = asyncio.run(scenario())
+
+    assert [response.json() for response in responses] == [{"pong": True}] * 5
+    assert built == [app]
+
+
+def test_main_app_is_built_by_create_app():
+    assert isinstance(main.app, main.LazyApplication)
+    assert main.app.factory is main.create_app
+
+
+def test_server_options_come_from_config(monkeypatch):
+    monkeypatch.setattr(start, "WORKERS", 0)
+    options = start.server_options()
+
+    assert options["workers"] == 1
+    assert options["worker_class"] == "uvicorn.workers.UvicornWorker"
+    assert options["max_requests"] == start.WORKER_MAX_REQUESTS
+    assert options["max_requests_jitter"] == start.WORKER_MAX_REQUESTS_JITTER
+    assert options["bind"] == f"{start.SERVER_HOST}:{start.API_PORT}"
+    assert options["on_starting"] is start.on_starting
+
+
+def test_gunicorn_accepts_every_option():
+    pytest.importorskip("gunicorn")
+    server = start.BlackjackServer(start.server_options())
+    assert server.cfg.worker_class_str == "uvicorn.workers.UvicornWorker"
+    assert server.cfg.max_requests == start.WORKER_MAX_REQUESTS
+
+
+def test_master_preloads_tables_before_forking(monkeypatch, tmp_path):
+    monkeypatch.setattr(tables, "preload_tables", lambda: str(tmp_path))
+    messages = []
+    server = types.SimpleNamespace(log=types.SimpleNamespace(info=messages.append))
+
+    start.on_starting(server)
+
+    assert messages == [f"Probability tables ready in {tmp_path}"]
+
+
+def test_pre_fork_stops_the_preloaded_log_listener(monkeypatch):
+    stopped = []
+    listener = types.SimpleNamespace(stop=lambda: stopped.append(True))
+    monkeypatch.setitem(
+        sys.modules, "src.api.main", types.SimpleNamespace(log_listener=listener)
+    )
+
+    start.pre_fork(server=None, worker=None)
+
+    assert stopped == [True]
@@ -0,0 +1,106 @@
+"""
+Tests for the load-testing harness and its latency histogram.
+"""
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from benchmarks.histogram import LatencyHistogram
+from benchmarks.loadtest import install_fake_redis, parse_mix, run_load
+
+
+def test_histogram_percentiles_within_relative_error():
+    """Reported percentiles stay within the configured precision."""
+    histogram = LatencyHistogram(significant_bits=8)
+    values = sorted(random.Random(7).randint(1, 5_000_000) for _ in range(20000))
+    for value in values:
+        histogram.record(value)
+
+    for percentile in (50, 95, 99):
+        exact = values[int(percentile / 100 * len(values)) - 1]
+        assert abs(histogram.percentile(percentile) - exact) / exact < 0.01
+    assert histogram.percentile(100) == histogram.max_value == values[-1]
+    assert histogram.min_value == values[0]
+
+
+def test_histogram_merge():
+    """Merging combines counts and extremes."""
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(10)
+    second.record(1000, count=3)
+    first.merge(second)
+
+    assert first.total_count == 4
+    assert first.min_value == 10
+    assert first.max_value == 1000
+    assert first.percentile(50) == pytest.approx(1000, rel=0.01)
+
+
+def test_parse_mix_rejects_unknown_scenarios():
+    """Mix specifications are validated."""
+    assert parse_mix("analyze=2,bankroll") == {"analyze": 2, "bankroll": 1}
+    with pytest.raises(ValueError):
+        parse_mix("analyze=1,roulette=2")
+
+
+def test_run_load_in_process_with_fake_redis():
+    """A short in-process run exercises rate limiting and caching via fakeredis."""
+    pytest.importorskip("fakeredis")
+    from fastapi_cache import FastAPICache
+    from fastapi_cache.backends.inmemory import InMemoryBackend
+    from fastapi_limiter import FastAPILimiter
+
+    from src.api.main import create_app
+
+    async def scenario():
+        app = await create_app(testing=True)
+        await install_fake_redis()
+        try:
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                return await run_load(
+                    client,
+                    {"analyze": 1, "strategy": 1, "bankroll": 1},
+                    concurrency=10,
+                    total_requests=60,
+                    distinct_clients=True,
+                )
+        finally:
+            FastAPILimiter.redis = None
+            FastAPICache.reset()
+            FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+
+    result = asyncio.run(scenario())
+
+    assert result.overall.total_count == 60
+    assert all(stats.errors == 0 for stats in result.scenarios.values())
+    codes = {code for stats in result.scenarios.values() for code in stats.status_codes}
+    assert codes == {200}
+    assert result.to_dict()["overall"]["p99"] >= result.to_dict()["overall"]["p50"]
+
+
+def test_run_load_survives_app_exceptions():
+    """Exceptions raised by the app are counted instead of aborting the run."""
+
+    async def failing_app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    async def scenario(raise_app_exceptions):
+        transport = httpx.ASGITransport(
+            app=failing_app, raise_app_exceptions=raise_app_exceptions
+        )
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await run_load(
+                client, {"bankroll": 1}, concurrency=4, total_requests=20
+            )
+
+    raised = asyncio.run(scenario(True))
+    assert raised.scenarios["bankroll"].errors == 20
+
+    reported = asyncio.run(scenario(False))
+    assert reported.scenarios["bankroll"].status_codes == {500: 20}
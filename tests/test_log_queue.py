@@ -0,0 +1,83 @@
+"""
+Tests for the non-blocking queued log handlers.
+"""
+import logging
+import queue
+import threading
+
+from src.api.log_queue import NonBlockingQueueHandler, queued_handlers
+from src.api.metrics import LOG_RECORDS_DROPPED
+
+
+class _SlowHandler(logging.Handler):
+    """Handler that blocks until released, then records formatted output."""
+
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+        self.lines = []
+
+    def emit(self, record):
+        self.unblock.wait(5)
+        self.lines.append(self.format(record))
+
+
+def _logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    """Logging never blocks; overflow is counted per pipeline."""
+    dropped = LOG_RECORDS_DROPPED.labels("test-overflow")
+    before = dropped.value
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2), "test-overflow")
+    logger = _logger("test.log_queue.overflow", handler)
+
+    for i in range(5):
+        logger.info("record %d", i)
+
+    assert handler.queue.qsize() == 2
+    assert dropped.value == before + 3
+
+
+def test_stop_flushes_queued_records_with_tracebacks():
+    """Stopping the listener writes out every queued record."""
+    output = _SlowHandler()
+    output.setFormatter(logging.Formatter("%(message)s"))
+    queue_handler, listener = queued_handlers([output], maxsize=100, pipeline="t")
+    logger = _logger("test.log_queue.flush", queue_handler)
+
+    logger.info("value=%s", {"count": 1})
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("failed")
+    output.unblock.set()
+    listener.stop()
+    listener.stop()
+
+    assert output.lines[0] == "value={'count': 1}"
+    assert output.lines[1].startswith("failed\nTraceback")
+    assert "RuntimeError: boom" in output.lines[1]
+
+
+def test_records_are_written_directly_while_listener_is_stopped():
+    """After shutdown nothing piles up in the queue; restarting resumes queueing."""
+    output = _SlowHandler()
+    output.unblock.set()
+    queue_handler, listener = queued_handlers([output], maxsize=10, pipeline="t")
+    logger = _logger("test.log_queue.stopped", queue_handler)
+    listener.stop()
+
+    logger.info("after shutdown")
+
+    assert output.lines == ["after shutdown"]
+    assert queue_handler.queue.qsize() == 0
+    listener.start()
+    logger.info("restarted")
+    listener.stop()
+    assert output.lines[-1] == "restarted"
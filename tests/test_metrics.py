@@ -0,0 +1,126 @@
+"""
+Tests for the metrics registry, instrumentation middleware and /metrics endpoint.
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+
+from src.api.cache import InstrumentedBackend
+from src.api.main import create_app
+from src.api.metrics import (
+    CACHE_REQUESTS,
+    Counter,
+    ENGINE_SIMULATIONS,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    REQUEST_LATENCY,
+)
+from src.api.services.engine_executor import EngineExecutor
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Histogram buckets are cumulative and end with +Inf."""
+    registry = MetricsRegistry()
+    histogram = registry.register(
+        Histogram("job_seconds", "Job duration.", ("kind",), buckets=(0.1, 1.0))
+    )
+    histogram.labels("a").observe(0.05)
+    histogram.labels("a").observe(0.5)
+    histogram.labels("a").observe(5)
+
+    text = registry.render()
+    assert "# TYPE job_seconds histogram" in text
+    assert 'job_seconds_bucket{kind="a",le="0.1"} 1' in text
+    assert 'job_seconds_bucket{kind="a",le="1"} 2' in text
+    assert 'job_seconds_bucket{kind="a",le="+Inf"} 3' in text
+    assert 'job_seconds_count{kind="a"} 3' in text
+    assert 'job_seconds_sum{kind="a"} 5.55' in text
+
+
+def test_counter_and_gauge():
+    """Counters only go up; gauges go both ways; label arity is checked."""
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("events", "Events.", ("type",)))
+    gauge = registry.register(Gauge("depth", "Depth."))
+    counter.labels("x").inc()
+    counter.labels("x").inc(2)
+    gauge.inc(3)
+    gauge.dec()
+
+    text = registry.render()
+    assert 'events_total{type="x"} 3' in text
+    assert "depth 2" in text
+    with pytest.raises(ValueError):
+        counter.labels("x").inc(-1)
+    with pytest.raises(ValueError):
+        counter.labels("x", "y")
+    with pytest.raises(ValueError):
+        registry.register(Counter("events", "Duplicate."))
+
+
+def test_requests_are_timed_per_route():
+    """The middleware labels latency by route template and status."""
+    FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+    client = TestClient(asyncio.run(create_app(testing=True)))
+    series = REQUEST_LATENCY.labels("GET", "/health", "200")
+    missing = REQUEST_LATENCY.labels("GET", "unmatched", "404")
+    before, before_missing = series.count, missing.count
+
+    assert client.get("/health").status_code == 200
+    assert client.get("/no-such-route").status_code == 404
+
+    assert series.count == before + 1
+    assert missing.count == before_missing + 1
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/health",status="200"}'
+        in response.text
+    )
+    assert "engine_executor_queue_depth" in response.text
+
+
+def test_strategy_cache_hits_and_misses_are_counted():
+    """The instrumented backend counts lookups by cache namespace."""
+    FastAPICache.reset()
+    FastAPICache.init(InstrumentedBackend(InMemoryBackend()), prefix="test-cache")
+    client = TestClient(asyncio.run(create_app(testing=True)))
+    payload = {"player_hand": ["10", "6"], "dealer_card": "9", "true_count": 2.5}
+    hits = CACHE_REQUESTS.labels("strategy", "hit")
+    misses = CACHE_REQUESTS.labels("strategy", "miss")
+    before_hits, before_misses = hits.value, misses.value
+
+    try:
+        for _ in range(2):
+            response = client.post("/api/strategy/recommend", json=payload)
+            assert response.status_code == 200
+    finally:
+        FastAPICache.reset()
+        FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+
+    assert misses.value == before_misses + 1
+    assert hits.value == before_hits + 1
+
+
+def test_engine_executor_runs_jobs_and_counts_simulations():
+    """Engine jobs run on the executor and record simulation metrics."""
+    from src.api.decision_engine import BlackjackDecisionEngine
+
+    executor = EngineExecutor(max_workers=1)
+    engine = BlackjackDecisionEngine(num_decks=1, simulation_rounds=50)
+    stand = ENGINE_SIMULATIONS.labels("stand")
+    before = stand.value
+    try:
+        values = asyncio.run(
+            executor.run(engine.calculate_expected_values, ["10", "7"], "6", [], 0.0)
+        )
+    finally:
+        executor.shutdown()
+
+    assert "stand" in values
+    assert stand.value == before + 1
@@ -0,0 +1,87 @@
+"""
+Tests for MessagePack content negotiation.
+"""
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, Request
+
+from src.api.middleware.request_validation import validated_body
+from src.api.models.schemas import CardInput
+from src.api.negotiation import (
+    decode_body,
+    negotiated_response,
+    pack_cards,
+    prefers_msgpack,
+    unpack_cards,
+)
+
+msgpack = pytest.importorskip("msgpack")
+
+
+def test_packed_cards_round_trip():
+    cards = ["2", "10", "J", "A"]
+    packed = pack_cards(cards)
+    assert packed == bytes([0, 8, 9, 12])
+    assert unpack_cards(packed) == cards
+    with pytest.raises(ValueError):
+        unpack_cards(bytes([13]))
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, False),
+        ("*/*", False),
+        ("application/json", False),
+        ("application/msgpack", True),
+        ("application/json;q=0.5, application/x-msgpack", True),
+        ("application/msgpack;q=0.5, */*", False),
+    ],
+)
+def test_accept_header_selects_msgpack(accept, expected):
+    assert prefers_msgpack(accept) is expected
+
+
+def test_msgpack_body_expands_packed_card_arrays():
+    body = msgpack.packb({"cards": pack_cards(["A", "K"]), "dealer_card": "6"})
+    assert decode_body("application/msgpack", body) == {
+        "cards": ["A", "K"],
+        "dealer_card": "6",
+    }
+
+
+def test_analyze_round_trip_in_msgpack():
+    app = FastAPI()
+
+    @app.post("/analyze")
+    async def analyze(
+        request: Request, data: CardInput = Depends(validated_body(CardInput))
+    ):
+        return negotiated_response(request, {"cards": data.cards})
+
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            body = msgpack.packb({"cards": pack_cards(["A", "K"]), "dealer_card": "6"})
+            packed = await client.post(
+                "/analyze",
+                content=body,
+                headers={
+                    "content-type": "application/msgpack",
+                    "accept": "application/msgpack",
+                },
+            )
+            default = await client.post(
+                "/analyze", json={"cards": ["a", "k"], "dealer_card": "6"}
+            )
+            return packed, default
+
+    packed, default = asyncio.run(scenario())
+    assert packed.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(packed.content) == {"cards": ["A", "K"]}
+    assert default.headers["content-type"] == "application/json"
+    assert default.json() == {"cards": ["A", "K"]}
+    assert default.headers["vary"] == "Accept"
@@ -0,0 +1,59 @@
+"""
+Tests for precomputed responses with ETags and compressed variants.
+"""
+import asyncio
+import gzip
+import json
+
+import httpx
+from fastapi import FastAPI, Request
+
+from src.api.precomputed import PrecomputedResponse
+
+CONTENT = {"counting_systems": [{"id": "hiLo", "name": "Hi-Lo"}] * 20}
+
+
+def _get(headers):
+    precomputed = PrecomputedResponse(CONTENT)
+    app = FastAPI()
+
+    @app.get("/systems")
+    async def systems(request: Request):
+        return precomputed.response(request)
+
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            return await client.get("/systems", headers=headers)
+
+    return precomputed, asyncio.run(scenario())
+
+
+def test_identity_body_and_strong_etag():
+    precomputed, response = _get({"accept-encoding": "identity"})
+    assert response.status_code == 200
+    assert response.json() == CONTENT
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == precomputed.etags["identity"]
+    assert not response.headers["etag"].startswith("W/")
+
+
+def test_gzip_variant_is_precompressed():
+    precomputed, response = _get({"accept-encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == precomputed.etags["gzip"]
+    assert json.loads(gzip.decompress(precomputed.bodies["gzip"])) == CONTENT
+
+
+def test_matching_if_none_match_is_not_modified():
+    etag = PrecomputedResponse(CONTENT).etags["gzip"]
+    _, response = _get({"accept-encoding": "gzip", "if-none-match": f"W/{etag}"})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_stale_etag_gets_the_body():
+    _, response = _get({"if-none-match": '"stale"'})
+    assert response.status_code == 200
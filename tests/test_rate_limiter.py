@@ -0,0 +1,240 @@
+"""
+Tests for the token-bucket rate limiter and its Redis reconciliation.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.api.middleware import gcra
+from src.api.middleware.gcra import GCRALimiter
+from src.api.middleware.token_bucket import (
+    LocalTokenBuckets,
+    TokenBucket,
+    TokenBucketLimiter,
+)
+
+
+def _fake_redis():
+    pytest.importorskip("lupa")
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.aioredis.FakeRedis(
+        server=fakeredis.FakeServer(), decode_responses=True
+    )
+
+
+def test_local_bucket_refills_continuously():
+    """Tokens come back in proportion to elapsed time, up to the capacity."""
+    bucket = TokenBucket(capacity=2, rate=1.0)
+    now = bucket.updated
+    assert bucket.take(now=now) and bucket.take(now=now)
+    assert not bucket.take(now=now)
+    assert bucket.retry_after() == pytest.approx(1.0)
+    assert bucket.take(now=now + 1.0)
+    assert not bucket.take(now=now + 1.5)
+    bucket.take(now=now + 100)
+    assert bucket.tokens == pytest.approx(1.0)
+
+
+def test_local_buckets_are_keyed():
+    buckets = LocalTokenBuckets()
+    assert buckets.acquire("a", limit=1).allowed
+    assert not buckets.acquire("a", limit=1).allowed
+    assert buckets.acquire("b", limit=1).allowed
+
+
+def test_limiter_serves_from_leases_and_enforces_the_limit():
+    """Only a fraction of requests reach Redis, and the limit holds."""
+    redis = _fake_redis()
+    limiter = TokenBucketLimiter(redis, lease_fraction=0.1)
+    calls = []
+    script = limiter._script
+
+    async def counting_script(*args, **kwargs):
+        calls.append(1)
+        return await script(*args, **kwargs)
+
+    limiter._script = counting_script
+
+    async def scenario():
+        return [
+            (await limiter.acquire("rate_limit:default:1.2.3.4", 60)).allowed
+            for _ in range(70)
+        ]
+
+    results = asyncio.run(scenario())
+    assert results.count(True) == 60
+    assert results[60:] == [False] * 10
+    assert len(calls) <= 20
+
+
+def test_limiters_in_different_processes_share_the_bucket():
+    """Two limiters on one Redis never admit more than the limit together."""
+    redis = _fake_redis()
+    first, second = TokenBucketLimiter(redis), TokenBucketLimiter(redis)
+
+    async def scenario():
+        allowed = 0
+        for i in range(100):
+            limiter = first if i % 2 else second
+            allowed += (await limiter.acquire("rate_limit:strategy:k", 30)).allowed
+        return allowed
+
+    assert asyncio.run(scenario()) == 30
+
+
+def test_expired_lease_hands_its_tokens_back():
+    """Tokens leased but unused before the lease expires are not lost."""
+    limiter = TokenBucketLimiter(_fake_redis(), lease_fraction=1.0, lease_ttl=0.0)
+
+    async def scenario():
+        return [
+            (await limiter.acquire("rate_limit:default:k", 10)).allowed
+            for _ in range(12)
+        ]
+
+    results = asyncio.run(scenario())
+    assert results[:10] == [True] * 10
+    assert results[10:] == [False, False]
+
+
+def test_limiter_falls_back_to_local_buckets_when_redis_fails():
+    class BrokenRedis:
+        def register_script(self, script):
+            async def call(*args, **kwargs):
+                raise ConnectionError("redis down")
+
+            return call
+
+    limiter = TokenBucketLimiter(BrokenRedis())
+
+    async def scenario():
+        return [(await limiter.acquire("k", 3)).allowed for _ in range(4)]
+
+    assert asyncio.run(scenario()) == [True, True, True, False]
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+def _counting(limiter):
+    calls = []
+    script = limiter._script
+
+    async def counting_script(*args, **kwargs):
+        calls.append(1)
+        return await script(*args, **kwargs)
+
+    limiter._script = counting_script
+    return calls
+
+
+def test_gcra_is_a_sliding_window_without_boundary_bursts(monkeypatch):
+    """After the limit is used up, capacity returns one slot per interval."""
+    clock = _Clock()
+    monkeypatch.setattr(gcra, "time", clock)
+    limiter = GCRALimiter(_fake_redis())
+
+    async def take(n):
+        return [(await limiter.acquire("k", 30, 60)).allowed for _ in range(n)]
+
+    async def scenario():
+        first = await take(31)
+        clock.now += 2.0  # one emission interval (60 s / 30)
+        second = await take(2)
+        clock.now += 59.0  # the old "next window" would allow another 30
+        third = await take(31)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first == [True] * 30 + [False]
+    assert second == [True, False]
+    assert third.count(True) == 29
+
+
+def test_gcra_denials_are_cached_locally(monkeypatch):
+    """Clients over the limit stop costing Redis calls until their retry time."""
+    clock = _Clock()
+    monkeypatch.setattr(gcra, "time", clock)
+    limiter = GCRALimiter(_fake_redis())
+    calls = _counting(limiter)
+
+    async def scenario():
+        decisions = [await limiter.acquire("k", 10, 60) for _ in range(50)]
+        clock.now += decisions[-1].retry_after
+        decisions.append(await limiter.acquire("k", 10, 60))
+        return decisions
+
+    decisions = asyncio.run(scenario())
+    assert [d.allowed for d in decisions[:11]] == [True] * 10 + [False]
+    assert decisions[-1].allowed
+    assert len(calls) == 12
+    assert decisions[20].retry_after == pytest.approx(6.0, abs=0.01)
+
+
+def test_gcra_limiters_share_the_limit_exactly():
+    """Interleaved limiters on one Redis admit exactly the limit."""
+    redis = _fake_redis()
+    limiters = [GCRALimiter(redis) for _ in range(3)]
+
+    async def scenario():
+        return sum(
+            [
+                (await limiters[i % 3].acquire("shared", 30, 60)).allowed
+                for i in range(90)
+            ]
+        )
+
+    assert asyncio.run(scenario()) == 30
+
+
+def test_middleware_returns_429_with_retry_after():
+    """The strategy tier admits 30 uncached requests per client, then rejects."""
+    pytest.importorskip("lupa")
+    pytest.importorskip("fakeredis")
+    from fastapi_cache import FastAPICache
+    from fastapi_cache.backends.inmemory import InMemoryBackend
+    from fastapi_limiter import FastAPILimiter
+
+    from benchmarks.loadtest import install_fake_redis
+    from src.api.main import create_app
+
+    async def scenario():
+        app = await create_app(testing=True)
+        FastAPICache.reset()
+        redis = await install_fake_redis()
+        await redis.flushall()
+        try:
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                return [
+                    await client.post(
+                        "/api/strategy/recommend",
+                        json={
+                            "player_hand": ["10", "6"],
+                            "dealer_card": "9",
+                            "true_count": i / 10,
+                        },
+                    )
+                    for i in range(32)
+                ]
+        finally:
+            FastAPILimiter.redis = None
+            FastAPICache.reset()
+            FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+
+    responses = asyncio.run(scenario())
+    codes = [r.status_code for r in responses]
+    assert codes[:30] == [200] * 30
+    assert codes[30:] == [429, 429]
+    assert int(responses[-1].headers["Retry-After"]) >= 1
+    assert responses[0].headers["X-RateLimit-Limit"] == "30"
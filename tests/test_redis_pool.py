@@ -0,0 +1,92 @@
+"""
+Tests for the shared Redis pool and the cache's in-memory fallback.
+"""
+import asyncio
+
+import pytest
+
+from src.api.cache import FallbackBackend
+from src.api.redis_pool import close_redis_client, create_redis_client, warm_up
+
+
+class _SlowBackend:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    async def get(self, key):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return "slow"
+
+    async def set(self, key, value, expire=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+
+
+def test_client_uses_a_bounded_pool():
+    client = create_redis_client(
+        "redis://localhost:6379", max_connections=7, socket_timeout=0.2
+    )
+    pool = client.connection_pool
+    assert pool.max_connections == 7
+    assert pool.connection_kwargs["socket_timeout"] == 0.2
+    asyncio.run(close_redis_client(client))
+
+
+def test_slow_backend_is_bypassed_until_retry_interval():
+    """One slow call costs at most the timeout; later calls skip the primary."""
+    primary = _SlowBackend(delay=1.0)
+    backend = FallbackBackend(primary, timeout=0.01, retry_interval=60)
+
+    async def scenario():
+        await backend.set("k", "memory")
+        return await backend.get("k")
+
+    assert asyncio.run(scenario()) == "memory"
+    assert primary.calls == 1
+    assert backend.degraded
+
+
+def test_warm_up_loads_scripts():
+    pytest.importorskip("lupa")
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+    async def scenario():
+        opened = await warm_up(client, connections=3, scripts=["return 1"])
+        sha = await client.script_load("return 1")
+        return opened, await client.script_exists(sha)
+
+    opened, exists = asyncio.run(scenario())
+    assert opened == 3
+    assert exists == [True]
+
+
+def test_failed_redis_init_turns_the_limiter_off_and_closes_the_pool(monkeypatch):
+    from fastapi_cache import FastAPICache
+    from fastapi_cache.backends.inmemory import InMemoryBackend
+    from fastapi_limiter import FastAPILimiter
+
+    from src.api import main
+
+    class _DeadClient:
+        closed = False
+
+        async def script_load(self, script):
+            raise ConnectionError("Redis is down")
+
+        async def close(self, close_connection_pool=False):
+            self.closed = close_connection_pool
+
+    client = _DeadClient()
+    monkeypatch.setattr(main, "create_redis_client", lambda: client)
+    try:
+        app = asyncio.run(main.create_app())
+    finally:
+        FastAPICache.reset()
+        FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+
+    assert FastAPILimiter.redis is None
+    assert client.closed
+    assert app.state.redis is None
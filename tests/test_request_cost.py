@@ -0,0 +1,97 @@
+"""
+Tests for cost-weighted rate limiting.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.api.decision_engine import BlackjackDecisionEngine
+from src.api.middleware.token_bucket import LocalTokenBuckets
+from src.api.request_cost import (
+    DEFAULT_REQUEST_COST,
+    RequestCost,
+    charge_cache_lookup,
+    start_request_cost,
+)
+from src.api.services.engine_executor import EngineExecutor
+
+
+def test_unmeasured_requests_cost_the_default():
+    cost = RequestCost()
+    assert cost.total == DEFAULT_REQUEST_COST
+    cost.add(0.1)
+    assert cost.total == pytest.approx(0.1)
+
+
+def test_engine_rounds_are_charged_from_executor_threads():
+    """The request cost follows engine jobs onto worker threads."""
+    executor = EngineExecutor(max_workers=1)
+    engine = BlackjackDecisionEngine(num_decks=1, simulation_rounds=500)
+
+    async def scenario():
+        cost = start_request_cost()
+        charge_cache_lookup(hit=False)
+        values = await executor.run(
+            engine.calculate_expected_values, ["10", "7"], "6", [], 0.0
+        )
+        return cost, values
+
+    try:
+        cost, values = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert cost.total == pytest.approx(1.0 + len(values) * 500 / 10000)
+
+
+def test_charges_can_put_a_bucket_into_debt():
+    """Work billed after the fact delays the next request."""
+    buckets = LocalTokenBuckets()
+    assert buckets.acquire("k", limit=10, period=10, cost=0.1).allowed
+    buckets.charge("k", limit=10, period=10, cost=15)
+
+    decision = buckets.acquire("k", limit=10, period=10, cost=0.1)
+    assert not decision.allowed
+    assert decision.retry_after == pytest.approx(5.2, abs=0.05)
+
+
+def test_cache_hits_cost_less_than_misses():
+    """Repeated cached strategy calls go far beyond the per-minute tier."""
+    pytest.importorskip("lupa")
+    pytest.importorskip("fakeredis")
+    from fastapi_cache import FastAPICache
+    from fastapi_cache.backends.inmemory import InMemoryBackend
+    from fastapi_limiter import FastAPILimiter
+
+    from benchmarks.loadtest import install_fake_redis
+    from src.api.main import create_app
+
+    payload = {"player_hand": ["9", "7"], "dealer_card": "10", "true_count": 1.5}
+    headers = {"X-Forwarded-For": "198.51.100.33"}
+
+    async def scenario():
+        app = await create_app(testing=True)
+        FastAPICache.reset()
+        redis = await install_fake_redis()
+        await redis.flushall()
+        try:
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                return [
+                    await client.post(
+                        "/api/strategy/recommend", json=payload, headers=headers
+                    )
+                    for _ in range(100)
+                ]
+        finally:
+            FastAPILimiter.redis = None
+            FastAPICache.reset()
+            FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+
+    responses = asyncio.run(scenario())
+
+    assert [r.status_code for r in responses] == [200] * 100
+    assert responses[0].headers["X-RateLimit-Cost"] == "1"
+    assert responses[1].headers["X-RateLimit-Cost"] == "0.1"
@@ -0,0 +1,128 @@
+"""
+Tests for the structured, sampled request logger.
+"""
+import json
+import logging
+
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from src.api.request_logging import JsonFormatter, RequestLogger, redact_headers
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _request(headers=None, client="127.0.0.1"):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/",
+            "headers": raw,
+            "client": (client, 50000),
+        }
+    )
+
+
+def _logger(name, level, sample_rate, allow_debug_header=True):
+    handler = _ListHandler()
+    request_logger = RequestLogger(
+        name, sample_rate=sample_rate, allow_debug_header=allow_debug_header
+    )
+    request_logger.logger.setLevel(level)
+    request_logger.logger.addHandler(handler)
+    request_logger.logger.propagate = False
+    return request_logger, handler
+
+
+def test_debug_detail_is_off_by_default():
+    """At INFO without the header, debug calls produce no records."""
+    request_logger, handler = _logger("test.requests.off", logging.INFO, 1.0)
+    log = request_logger.for_request(_request())
+
+    log.debug("analyze.request", cards=["A", "K"])
+
+    assert not log.enabled
+    assert handler.records == []
+
+
+def test_debug_header_forces_detail_at_info_level():
+    """The X-Debug-Log header enables detail even when the level is INFO."""
+    request_logger, handler = _logger("test.requests.header", logging.INFO, 0.0)
+    log = request_logger.for_request(
+        _request({"X-Debug-Log": "1", "X-Request-ID": "abc"})
+    )
+
+    log.debug("analyze.request", cards=["A", "K"])
+
+    assert [r.getMessage() for r in handler.records] == ["analyze.request"]
+    assert handler.records[0].fields == {"cards": ["A", "K"], "request_id": "abc"}
+
+
+def test_debug_header_is_ignored_unless_enabled_and_trusted():
+    """The header is off by default and only honoured for trusted clients."""
+    assert not RequestLogger("test.requests.default").allow_debug_header
+    headers = {"X-Debug-Log": "1"}
+
+    disabled, _ = _logger("test.requests.disabled", logging.INFO, 0.0, False)
+    assert not disabled.for_request(_request(headers)).enabled
+
+    enabled, _ = _logger("test.requests.untrusted", logging.INFO, 0.0)
+    assert not enabled.for_request(_request(headers, client="203.0.113.9")).enabled
+    assert enabled.for_request(_request(headers)).enabled
+
+
+def test_sensitive_headers_are_redacted():
+    """Credentials never reach the logs."""
+    headers = {"Authorization": "Bearer secret", "cookie": "s=1", "accept": "*/*"}
+
+    assert redact_headers(headers) == {
+        "Authorization": "[REDACTED]",
+        "cookie": "[REDACTED]",
+        "accept": "*/*",
+    }
+
+
+def test_sampling_applies_only_at_debug_level():
+    """Requests are sampled at the configured rate when DEBUG is enabled."""
+    request_logger, _ = _logger("test.requests.sampled", logging.DEBUG, 1.0)
+    assert request_logger.for_request(_request()).enabled
+
+    request_logger.sample_rate = 0.0
+    assert not request_logger.for_request(_request()).enabled
+
+
+def test_errors_are_logged_as_json_with_traceback():
+    """Errors are always logged and render as a single JSON line."""
+    request_logger, handler = _logger("test.requests.error", logging.INFO, 0.0)
+    log = request_logger.for_request(_request())
+    try:
+        raise ValueError("bad card")
+    except ValueError:
+        log.error("analyze.error", error="bad card")
+
+    entry = json.loads(JsonFormatter().format(handler.records[0]))
+    assert entry["event"] == "analyze.error"
+    assert entry["level"] == "ERROR"
+    assert entry["error"] == "bad card"
+    assert "ValueError" in entry["exception"]
+
+
+def test_debug_endpoint_no_longer_prints(capsys):
+    """The debug endpoint answers without writing to stdout."""
+    from src.api.server import app
+
+    client = TestClient(app)
+    response = client.post("/debug/analyze", json={"cards": ["A"]})
+
+    assert response.status_code == 200
+    assert response.json()["parsed_json"] == {"cards": ["A"]}
+    assert capsys.readouterr().out == ""
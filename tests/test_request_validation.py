@@ -0,0 +1,100 @@
+"""
+Tests for the request validation middleware and the parsed-body dependency.
+"""
+import asyncio
+import json
+
+import httpx
+from fastapi import Depends, FastAPI, Request
+
+from src.api.middleware.request_validation import (
+    RequestValidationMiddleware,
+    validated_body,
+)
+from src.api.models.schemas import CardInput
+from src.api.utils import card_utils
+
+
+def _make_app():
+    app = FastAPI()
+    app.add_middleware(RequestValidationMiddleware)
+
+    @app.post("/analyze")
+    async def analyze(
+        request: Request, data: CardInput = Depends(validated_body(CardInput))
+    ):
+        return {"cards": data.cards, "parsed": request.state.parsed_body["cards"]}
+
+    @app.get("/analyze")
+    async def analyze_get(request: Request):
+        return {"parsed": hasattr(request.state, "parsed_body")}
+
+    return app
+
+
+def _request(method, path, **kwargs):
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=_make_app()), base_url="http://test"
+        ) as client:
+            return await client.request(method, path, **kwargs)
+
+    return asyncio.run(scenario())
+
+
+def test_body_is_decoded_once_and_shared_with_the_handler(monkeypatch):
+    decodes = []
+    real_loads = json.loads
+
+    def counting_loads(*args, **kwargs):
+        decodes.append(args[0])
+        return real_loads(*args, **kwargs)
+
+    monkeypatch.setattr(json, "loads", counting_loads)
+    response = _request(
+        "POST", "/analyze", json={"cards": ["a", "k"], "dealer_card": "6"}
+    )
+
+    assert len(decodes) == 1
+    assert response.status_code == 200
+    assert response.json() == {"cards": ["A", "K"], "parsed": ["a", "k"]}
+
+
+def test_cards_are_validated_once_by_the_route_model(monkeypatch):
+    validated = []
+    real_card_indices = card_utils.card_indices
+
+    def counting_card_indices(cards):
+        cards = list(cards)
+        validated.append(cards)
+        return real_card_indices(cards)
+
+    monkeypatch.setattr(card_utils, "card_indices", counting_card_indices)
+    response = _request(
+        "POST", "/analyze", json={"cards": ["a", "k"], "dealer_card": "6"}
+    )
+
+    assert response.status_code == 200
+    assert validated == [["a", "k"], ["6"]]
+
+
+def test_invalid_json_is_rejected_before_the_handler():
+    response = _request(
+        "POST",
+        "/analyze",
+        content=b"[1, 2]",
+        headers={"content-type": "application/json"},
+    )
+    assert response.status_code == 400
+    assert response.json()["message"] == "Invalid request body"
+
+
+def test_body_not_matching_the_route_model_is_a_422():
+    response = _request("POST", "/analyze", json={"dealer_card": "6"})
+    assert response.status_code == 422
+
+
+def test_get_requests_are_not_validated():
+    response = _request("GET", "/analyze", params={"decks": "not-a-number"})
+    assert response.status_code == 200
+    assert response.json() == {"parsed": False}
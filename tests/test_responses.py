@@ -0,0 +1,32 @@
+"""
+Tests for the fast JSON response class.
+"""
+import json
+
+import numpy as np
+
+from src.api import responses
+from src.api.responses import FastJSONResponse, dumps
+
+
+def test_dumps_is_compact_json():
+    content = {"action": "stand", "alternatives": [{"confidence": 0.25}]}
+    assert dumps(content) == b'{"action":"stand","alternatives":[{"confidence":0.25}]}'
+
+
+def test_numpy_values_are_serialized():
+    content = {"ev": np.float64(0.5), "counts": np.array([1, 2])}
+    assert json.loads(dumps(content)) == {"ev": 0.5, "counts": [1, 2]}
+
+
+def test_stdlib_fallback_matches(monkeypatch):
+    content = {"cards": ["A", "K"], "ev": np.float64(-0.125), "count": np.int64(3)}
+    expected = dumps(content)
+    monkeypatch.setattr(responses, "orjson", None)
+    assert dumps(content) == expected
+
+
+def test_response_body_and_media_type():
+    response = FastJSONResponse({"value": 21})
+    assert response.body == b'{"value":21}'
+    assert response.media_type == "application/json"
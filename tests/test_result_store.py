@@ -0,0 +1,179 @@
+"""
+Tests for the persistent result store.
+"""
+import asyncio
+import os
+import sqlite3
+
+import httpx
+import pytest
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+
+from src.api import result_store, server
+from src.api.cache import StoreBackend
+from src.api.coalescing import coalesced_cache
+from src.api.result_store import ResultStore, store_version
+
+STRATEGY = {"player_hand": ["10", "6"], "dealer_card": "9", "accuracy": "exact"}
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    store = ResultStore("responses", "v1", directory=str(tmp_path))
+    FastAPICache.reset()
+    FastAPICache.init(StoreBackend(store), prefix="test-cache")
+    yield store
+    store.close()
+    FastAPICache.reset()
+    FastAPICache.init(InMemoryBackend(), prefix="test-cache")
+
+
+def post_strategy(json):
+    async def scenario():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=server.app), base_url="http://test"
+        ) as client:
+            return await client.post("/strategy", json=json)
+
+    return asyncio.run(scenario())
+
+
+def test_results_survive_a_restart(tmp_path):
+    store = ResultStore("decisions", "v1", directory=str(tmp_path), ttl=60)
+    store.put("10,6:9", b'{"action":"stand"}')
+    store.close()
+
+    ttl, value = ResultStore("decisions", "v1", directory=str(tmp_path)).get_with_ttl(
+        "10,6:9"
+    )
+
+    assert value == b'{"action":"stand"}'
+    assert 0 < ttl <= 60
+
+
+def test_results_of_other_versions_are_not_served(tmp_path):
+    old = ResultStore("decisions", store_version(1, {"decks": 6}), str(tmp_path))
+    old.put("10,6:9", "stand")
+    old.close()
+    new = ResultStore("decisions", store_version(1, {"decks": 8}), str(tmp_path))
+
+    assert old.version != new.version
+    assert new.get("10,6:9") is None
+
+
+def test_compaction_drops_expired_results_of_every_version(tmp_path):
+    old = ResultStore("decisions", "v1", directory=str(tmp_path))
+    old.put("old-expired", "stand", ttl=-1)
+    old.put("old-fresh", "stand")
+    old.close()
+    store = ResultStore("decisions", "v2", directory=str(tmp_path))
+    store.put("expired", "hit", ttl=-1)
+    store.put("fresh", "double")
+    store.flush()
+    store.compact()
+
+    with sqlite3.connect(store.path) as connection:
+        rows = connection.execute("SELECT version, key FROM results").fetchall()
+    assert sorted(rows) == [("v1", "old-fresh"), ("v2", "fresh")]
+    store.close()
+
+
+def test_workers_of_two_versions_keep_each_others_results(tmp_path):
+    """During a rolling reload, old and new workers share the file."""
+    old = ResultStore("decisions", "v1", directory=str(tmp_path))
+    new = ResultStore("decisions", "v2", directory=str(tmp_path))
+    old.put("10,6:9", "stand")
+    new.put("10,6:9", "hit")
+    old.flush()
+    new.flush()
+    old.compact()
+    new.compact()
+
+    assert old.get("10,6:9") == "stand"
+    assert new.get("10,6:9") == "hit"
+    old.close()
+    new.close()
+
+
+def test_unusable_store_misses_instead_of_failing(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    broken = ResultStore("decisions", "v1", directory=str(blocker))
+    disabled = ResultStore("decisions", "v1", directory="")
+
+    for store in (broken, disabled):
+        store.put("10,6:9", "stand")
+        assert store.get("10,6:9") is None
+        assert not store.enabled
+
+
+
+def test_default_directory_is_private_to_the_user(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_store, "RESULT_STORE_DIR", None)
+    monkeypatch.setattr("tempfile.gettempdir", lambda: str(tmp_path))
+    store = ResultStore("decisions", "v1")
+    store.put("10,6:9", "stand")
+    store.flush()
+
+    directory = os.path.dirname(store.path)
+    assert directory == str(tmp_path / f"blackjack-results-{os.getuid()}")
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    assert store.get("10,6:9") == "stand"
+    store.close()
+
+
+def test_default_directory_others_can_write_is_not_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_store, "RESULT_STORE_DIR", None)
+    monkeypatch.setattr("tempfile.gettempdir", lambda: str(tmp_path))
+    planted = tmp_path / f"blackjack-results-{os.getuid()}"
+    planted.mkdir()
+    planted.chmod(0o777)
+    store = ResultStore("decisions", "v1")
+
+    assert store.get("10,6:9") is None
+    assert not store.enabled
+    assert os.listdir(planted) == []
+
+def test_cached_responses_are_kept_on_disk(disk_cache):
+    calls = []
+
+    @coalesced_cache("strategy", expire=60, key=lambda hand: hand)
+    async def recommend(hand):
+        calls.append(hand)
+        return {"action": "stand"}
+
+    async def scenario():
+        first = await recommend("10,6")
+        disk_cache.flush()
+        return first, await recommend("10,6")
+
+    assert asyncio.run(scenario()) == ({"action": "stand"}, {"action": "stand"})
+    assert calls == ["10,6"]
+    assert asyncio.run(FastAPICache.clear(namespace="strategy")) == 1
+
+
+def test_strategy_is_answered_from_disk_after_a_restart(tmp_path, monkeypatch):
+    lookups = []
+    monkeypatch.setattr(server, "charge_cache_lookup", lookups.append)
+    version = server.decision_store.version
+    monkeypatch.setattr(
+        server, "decision_store", ResultStore("decisions", version, str(tmp_path))
+    )
+    computed = post_strategy(STRATEGY)
+    server.decision_store.close()
+
+    def unavailable(*args, **kwargs):
+        raise AssertionError("the engine should not be asked")
+
+    monkeypatch.setattr(
+        server, "decision_store", ResultStore("decisions", version, str(tmp_path))
+    )
+    monkeypatch.setattr(server, "get_tiered_decision", unavailable)
+    stored = post_strategy(STRATEGY)
+
+    assert computed.status_code == stored.status_code == 200
+    assert stored.json() == computed.json()
+    assert stored.json()["tier"] == "exact"
+    # Answers from disk are charged like cache hits by the rate limiter
+    assert lookups == [False, True]
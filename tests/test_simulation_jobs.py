@@ -0,0 +1,217 @@
+"""
+Tests for background simulation jobs and their endpoints.
+"""
+import asyncio
+import json
+import os
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.api.routes import jobs
+from src.api.services import simulation_jobs
+from src.api.services.simulation_jobs import (
+    CHART_HANDS,
+    UPCARDS,
+    JobManager,
+    run_job,
+)
+
+DECISION = {"player_hand": ["10", "6"], "dealer_card": "9", "rounds": 50_000}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    manager = JobManager(workers=1, directory=str(tmp_path))
+    monkeypatch.setattr(simulation_jobs, "job_manager", manager)
+    yield manager
+    manager.shutdown()
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.include_router(jobs.router, prefix="/api/jobs")
+    return app
+
+
+def client(app):
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=60
+    )
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        events.append((name[len("event: ") :], json.loads(data[len("data: ") :])))
+    return events
+
+
+def test_job_progress_is_streamed_until_the_result_is_ready(manager, app):
+    async def scenario():
+        async with client(app) as http:
+            submitted = await http.post("/api/jobs", json=DECISION)
+            job_id = submitted.json()["id"]
+            events = await http.get(f"/api/jobs/{job_id}/events")
+            state = await http.get(f"/api/jobs/{job_id}")
+            result = await http.get(f"/api/jobs/{job_id}/result")
+        return submitted, events, state, result
+
+    submitted, events, state, result = asyncio.run(scenario())
+
+    assert submitted.status_code == 202
+    assert submitted.headers["Location"] == f"/api/jobs/{submitted.json()['id']}"
+    assert events.headers["content-type"].startswith("text/event-stream")
+    stream = parse_events(events.text)
+    assert stream[-1][0] == "succeeded"
+    done = [snapshot["done"] for _, snapshot in stream]
+    assert done == sorted(done)
+    assert stream[-1][1]["progress"] == 1.0
+    assert state.json()["status"] == "succeeded"
+
+    record = result.json()
+    decision = record["result"]
+    assert set(decision["all_expected_values"]) == {"hit", "stand", "double"}
+    assert decision["action"] in decision["all_expected_values"]
+    assert record["spec"]["seen_cards"] == ["10", "6", "9"]
+
+
+def test_running_job_can_be_cancelled(manager, app):
+    async def scenario():
+        async with client(app) as http:
+            submitted = await http.post(
+                "/api/jobs", json=dict(DECISION, rounds=100_000_000)
+            )
+            job_id = submitted.json()["id"]
+            async for snapshot in manager.watch(job_id):
+                if snapshot["status"] == "running":
+                    break
+            cancelled = await http.delete(f"/api/jobs/{job_id}")
+            start = time.perf_counter()
+            async for snapshot in manager.watch(job_id):
+                pass
+            stopped_after = time.perf_counter() - start
+            result = await http.get(f"/api/jobs/{job_id}/result")
+        return cancelled, snapshot, stopped_after, result
+
+    cancelled, final, stopped_after, result = asyncio.run(scenario())
+
+    assert cancelled.status_code == 202
+    assert final["status"] == "cancelled"
+    assert stopped_after < 5
+    assert result.status_code == 409
+
+
+
+def test_other_workers_follow_and_cancel_a_job(manager, tmp_path):
+    """A job accepted by one API worker is visible to the others."""
+    other = JobManager(directory=str(tmp_path))
+
+    async def scenario():
+        job = await manager.submit(
+            dict(DECISION, rounds=100_000_000, num_decks=6, true_count=0.0)
+        )
+        seen = []
+        async for snapshot in other.watch(job.id):
+            seen.append(snapshot)
+            if snapshot["status"] == "running" and snapshot["done"]:
+                break
+        cancelled = other.cancel(job.id)
+        async for snapshot in other.watch(job.id):
+            seen.append(snapshot)
+        return job, seen, cancelled
+
+    job, seen, cancelled = asyncio.run(scenario())
+
+    assert [snapshot["id"] for snapshot in seen] == [job.id] * len(seen)
+    assert cancelled["status"] == "running"
+    assert seen[-1]["status"] == job.status == "cancelled"
+    assert other.get(job.id) == job.snapshot()
+
+def test_submissions_beyond_the_limit_are_refused(tmp_path, monkeypatch, app):
+    monkeypatch.setattr(
+        simulation_jobs,
+        "job_manager",
+        JobManager(directory=str(tmp_path), max_active=0),
+    )
+
+    async def scenario():
+        async with client(app) as http:
+            return await http.post("/api/jobs", json=DECISION)
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+
+def test_decision_jobs_need_a_hand(manager, app):
+    async def scenario():
+        async with client(app) as http:
+            return await http.post("/api/jobs", json={"kind": "decision"})
+
+    assert asyncio.run(scenario()).status_code == 422
+
+
+def test_unknown_jobs_are_not_found(manager, app):
+    async def scenario():
+        async with client(app) as http:
+            return [
+                await http.get("/api/jobs/0123abcd"),
+                await http.get("/api/jobs/..%2Fsecret/result"),
+                await http.delete("/api/jobs/0123abcd"),
+            ]
+
+    assert [response.status_code for response in asyncio.run(scenario())] == [
+        404,
+        404,
+        404,
+    ]
+
+
+def test_chart_covers_every_hand_and_upcard(tmp_path):
+    spec = {"kind": "chart", "rounds": 20, "num_decks": 6, "true_count": 0.0}
+
+    path = run_job("chart", spec, str(tmp_path))
+
+    with open(path) as file:
+        chart = json.load(file)["result"]["hands"]
+    assert len(chart) == len(CHART_HANDS)
+    assert all(set(row) == set(UPCARDS) for row in chart.values())
+    assert chart["10,6"]["9"]["action"] in chart["10,6"]["9"]["expected_values"]
+
+
+def test_results_survive_a_restart_until_they_expire(tmp_path):
+    spec = {"kind": "chart", "rounds": 1, "num_decks": 6, "true_count": 0.0}
+    path = run_job("abc123", spec, str(tmp_path))
+    manager = JobManager(directory=str(tmp_path), ttl=60)
+
+    assert manager.get("abc123")["status"] == "succeeded"
+    assert manager.sweep() == 0
+
+    os.utime(path, (time.time() - 120, time.time() - 120))
+    assert manager.sweep() == 1
+    assert manager.get("abc123") is None
+
+
+def test_default_directory_is_private_to_the_user(tmp_path, monkeypatch):
+    monkeypatch.setattr("tempfile.gettempdir", lambda: str(tmp_path))
+
+    directory = JobManager(directory=None).directory
+
+    assert directory == str(tmp_path / f"blackjack-jobs-{os.getuid()}")
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+
+def test_default_directory_others_can_write_is_refused(tmp_path, monkeypatch):
+    monkeypatch.setattr("tempfile.gettempdir", lambda: str(tmp_path))
+    planted = tmp_path / f"blackjack-jobs-{os.getuid()}"
+    planted.mkdir()
+    planted.chmod(0o777)
+
+    with pytest.raises(PermissionError):
+        JobManager(directory=None).directory
@@ -0,0 +1,113 @@
+"""
+Tests for the integer-array simulation kernel.
+
+The kernel runs compiled when Numba is installed and as plain Python
+otherwise; these tests pass either way.
+"""
+import math
+import random
+
+import numpy as np
+import pytest
+
+from src.api import simulation_kernel
+from src.api.decision_engine import BlackjackDecisionEngine
+
+ROUNDS = 8000
+
+
+def _only(card, count=50):
+    return simulation_kernel.shoe_counts({card: count})
+
+
+def _simulate(player, action, upcard, counts, rounds=10):
+    return simulation_kernel.simulate_action(
+        simulation_kernel.hand_indices(player),
+        simulation_kernel.ACTION_CODES[action],
+        simulation_kernel.CARD_INDEX[upcard],
+        counts,
+        rounds,
+        1234,
+    )
+
+
+def test_add_card_counts_aces_as_one_when_eleven_would_bust():
+    hand = (0, 0)
+    for card in ("A", "A", "9"):
+        hand = simulation_kernel.add_card(*hand, simulation_kernel.CARD_INDEX[card])
+    assert hand == (21, 1)  # soft 21
+
+    hand = simulation_kernel.add_card(*hand, simulation_kernel.CARD_INDEX["5"])
+    assert hand == (16, 0)  # hard 16
+
+
+def test_draw_card_only_returns_cards_left_in_the_deck():
+    deck = simulation_kernel.shoe_counts({"5": 2, "K": 1})
+    drawn = sorted(simulation_kernel.draw_card(deck, 3 - i) for i in range(3))
+
+    assert drawn == [simulation_kernel.CARD_INDEX[c] for c in ("5", "5", "K")]
+    assert deck.sum() == 0
+
+
+@pytest.mark.parametrize(
+    "player, action, upcard, card, expected",
+    [
+        (["10", "10"], "stand", "10", "10", 0.0),  # 20 v 20 push
+        (["10", "6"], "hit", "10", "10", -1.0),  # player busts on 26
+        (["5", "6"], "double", "10", "10", 2.0),  # 21 v 20 at double the bet
+        (["10", "7"], "stand", "6", "10", 1.0),  # dealer busts on 26
+        (["8", "8"], "split", "10", "10", -1.0),  # 8-10 v 20
+    ],
+)
+def test_single_rank_shoes_have_exact_outcomes(player, action, upcard, card, expected):
+    assert _simulate(player, action, upcard, _only(card)) == expected
+
+
+def test_empty_shoe_returns_zero():
+    assert _simulate(["10", "6"], "hit", "10", _only("10", 0)) == 0.0
+
+
+@pytest.mark.parametrize(
+    "player, upcard, action",
+    [
+        (["10", "6"], "9", "hit"),
+        (["10", "6"], "9", "stand"),
+        (["5", "6"], "6", "double"),
+        (["A", "7"], "10", "hit"),
+        (["8", "8"], "6", "split"),
+    ],
+)
+def test_kernel_and_python_engine_agree_on_expected_value(player, upcard, action):
+    random.seed(1234)
+    seen = player + [upcard]
+    kernel = BlackjackDecisionEngine(simulation_rounds=ROUNDS, use_kernel=True)
+    python = BlackjackDecisionEngine(simulation_rounds=ROUNDS, use_kernel=False)
+    remaining = python.get_remaining_cards(seen)
+
+    kernel_ev = kernel.simulate_player_action(player, action, upcard, remaining)
+    python_ev = python.simulate_player_action(player, action, upcard, remaining)
+
+    # Each round returns at most the bet, so a return's variance is at most
+    # bet**2; allow five standard errors of the difference
+    bet = 2.0 if action == "double" else 1.0
+    tolerance = 5 * bet * math.sqrt(2 / ROUNDS)
+    assert abs(kernel_ev - python_ev) < tolerance
+
+
+def test_engine_selects_the_kernel_when_numba_is_installed():
+    engine = BlackjackDecisionEngine()
+    assert engine.use_kernel is simulation_kernel.NUMBA_AVAILABLE
+
+
+def test_kernel_results_are_reproducible_and_leave_the_shoe_unchanged():
+    counts = simulation_kernel.shoe_counts(
+        BlackjackDecisionEngine().get_remaining_cards([])
+    )
+    original = counts.copy()
+
+    first = _simulate(["10", "6"], "hit", "9", counts, rounds=500)
+    second = _simulate(["10", "6"], "hit", "9", counts, rounds=500)
+
+    assert isinstance(first, float)
+    assert first == second
+    assert np.array_equal(counts, original)
@@ -0,0 +1,129 @@
+"""
+Tests for the shared probability tables.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from src.api import tables
+
+
+@pytest.fixture(scope="module")
+def built():
+    return tables.build_tables()
+
+
+@pytest.fixture
+def fresh(monkeypatch):
+    """Forget the tables this process has loaded and any preloaded directory."""
+    monkeypatch.setattr(tables, "_tables", None)
+    # setenv first so the variable preload_tables exports is removed afterwards
+    monkeypatch.setenv(tables.TABLES_DIR_ENV, "")
+    monkeypatch.delenv(tables.TABLES_DIR_ENV)
+
+
+def test_dealer_outcomes_are_probability_distributions(built):
+    dealer = built["dealer_outcomes"]
+    assert dealer.shape == (2, 5, 10, 6)
+    assert np.allclose(dealer.sum(axis=-1), 1.0)
+
+
+def test_dealer_bust_rates_match_published_figures(built):
+    six_decks = tables.DECK_COUNTS.index(6)
+    bust = built["dealer_outcomes"][tables.STAND, six_decks, :, -1]
+    by_upcard = dict(zip(tables.UPCARDS, bust))
+
+    assert by_upcard["6"] == pytest.approx(0.4228, abs=5e-4)
+    assert by_upcard["10"] == pytest.approx(0.2121, abs=5e-4)
+    assert max(by_upcard, key=by_upcard.get) == "6"
+
+
+def test_stand_ev_below_17_only_wins_on_a_dealer_bust(built):
+    bust = built["dealer_outcomes"][..., -1]
+    stand_ev = built["stand_ev"]
+    assert np.allclose(stand_ev[..., 16], 2 * bust - 1)
+    assert np.all(stand_ev[..., 21] > stand_ev[..., 20])
+
+
+def test_written_tables_are_mapped_read_only(tmp_path, built):
+    tables.write_tables(str(tmp_path), built)
+    loaded = tables.load_tables(str(tmp_path))
+
+    for name, table in built.items():
+        assert isinstance(loaded[name], np.memmap)
+        assert np.array_equal(loaded[name], table)
+        with pytest.raises(ValueError):
+            loaded[name][0] = 0
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_workers_map_preloaded_tables_without_rebuilding(tmp_path, monkeypatch, fresh):
+    directory = tables.preload_tables(str(tmp_path))
+    assert directory == str(tmp_path)
+
+    # A worker inherits the environment; it must not compute the tables again
+    monkeypatch.setattr(tables, "_tables", None)
+    monkeypatch.setattr(tables, "build_tables", pytest.fail)
+    loaded = tables.get_tables()
+    assert isinstance(loaded["dealer_outcomes"], np.memmap)
+    assert tables.get_tables() is loaded
+
+
+def test_tables_are_built_in_memory_without_a_directory(fresh):
+    assert not isinstance(tables.get_tables()["stand_ev"], np.memmap)
+
+
+def test_dealer_outcomes_by_upcard(fresh):
+    outcomes = tables.dealer_outcomes(6, hits_soft_17=True)
+    assert list(outcomes) == list(tables.UPCARDS)
+    assert list(outcomes["A"]) == list(tables.DEALER_OUTCOMES)
+    assert sum(outcomes["A"].values()) == pytest.approx(1.0)
+
+
+def test_player_values_match_the_dealer_tables(built):
+    player_ev = built["player_ev"]
+    assert player_ev.shape == (2, 5, 10, 22, 2, len(tables.PLAYER_ACTIONS))
+    stand = player_ev[..., tables.PLAYER_ACTIONS.index("stand")]
+    assert np.allclose(stand, built["stand_ev"][..., None])
+
+    # Hard 11 against a 6 is a textbook double
+    six_decks = tables.DECK_COUNTS.index(6)
+    eleven = player_ev[tables.HIT_SOFT_17, six_decks, tables.UPCARDS.index("6"), 11, 0]
+    assert eleven.argmax() == tables.PLAYER_ACTIONS.index("double")
+
+
+def test_removing_small_cards_helps_a_stiff_hand_that_hits(built):
+    effects = built["removal_effects"]
+    assert effects.shape == built["player_ev"].shape + (10,)
+
+    six_decks = tables.DECK_COUNTS.index(6)
+    hit_16 = effects[
+        tables.HIT_SOFT_17,
+        six_decks,
+        tables.UPCARDS.index("10"),
+        16,
+        0,
+        tables.PLAYER_ACTIONS.index("hit"),
+    ]
+    # Without a five a bust is likelier; without a ten it is less likely
+    assert hit_16[8] > 0 > hit_16[3]
+
+
+def test_default_directory_is_private_to_the_user(tmp_path, monkeypatch):
+    monkeypatch.setattr(tables.tempfile, "gettempdir", lambda: str(tmp_path))
+
+    directory = tables._default_directory()
+
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+
+
+def test_default_directory_others_can_write_is_refused(tmp_path, monkeypatch):
+    monkeypatch.setattr(tables.tempfile, "gettempdir", lambda: str(tmp_path))
+    planted = tmp_path / f"blackjack-tables-{os.getuid()}"
+    planted.mkdir()
+    planted.chmod(0o777)
+
+    with pytest.raises(PermissionError):
+        tables._default_directory()
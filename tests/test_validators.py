@@ -16,6 +16,8 @@ from src.api.utils.validators import (
     validate_enum,
     ValidationResult,
 )
+from src.api.models.schemas import CardInput
+from src.api.utils.card_utils import CARD_RANKS, card_indices, normalize_cards
 
 
 # Test models for schema validation - using _ prefix to avoid Pytest collection
@@ -189,3 +191,26 @@ class TestValidationResult:
         assert exc_info.value.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
         assert "validation_error" in str(exc_info.value.error_code)
         assert "errors" in str(exc_info.value.details)
+
+
+class TestCardLookup:
+    """Tests for the precomputed card lookup."""
+
+    def test_accepted_spellings(self):
+        """Lowercase, 'T' and padded cards map to the canonical rank."""
+        cards = normalize_cards(["a", "K", "t", " 10", "q"])
+        assert cards == ["A", "K", "10", "10", "Q"]
+        assert [CARD_RANKS[i] for i in card_indices(["2", "A"])] == ["2", "A"]
+
+    def test_invalid_card(self):
+        """Unknown and non-string cards are rejected."""
+        with pytest.raises(ValueError, match="Invalid card value: X"):
+            card_indices(["A", "X"])
+        with pytest.raises(ValueError):
+            card_indices([10])
+
+    def test_models_normalize_cards_once(self):
+        """Request models return canonical ranks."""
+        card_input = CardInput(cards=["a", "k"], dealer_card="t")
+        assert card_input.cards == ["A", "K"]
+        assert card_input.dealer_card == "10"